@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+mlmodels/utils.py 추론 hot path 마이크로벤치마크
+Triton 없이 합성 이미지와 합성(또는 저장해 둔) output0 텐서로 전처리, 후처리, 결과 그리기, 이미지 디코딩 시간을 측정하고
+baseline과 비교해 threshold 이상 느려진 케이스가 있으면 실패(exit 1)합니다.
+
+케이스마다 여러 round를 번갈아 측정해 round별 median 중 최솟값으로 비교하므로 일시적인 부하에 덜 민감합니다.
+(--normalize를 지정하면 고정된 numpy 연산인 calibration 케이스의 시간으로 나눈 상대 시간으로 비교)
+측정값은 CPU와 라이브러리 버전에 따라 달라지므로 baseline은 저장소에 커밋하지 않고, 비교할 두 commit을 같은 머신에서 측정합니다.
+PR에서는 .github/workflows/api-benchmark.yml이 merge-base와 PR HEAD를 같은 runner에서 측정해 비교합니다.
+
+사용 예시 (apis 디렉토리에서 실행):
+    git stash && python benchmarks/bench_utils.py --update_baseline && git stash pop   # 변경 전 코드로 baseline 저장
+    python benchmarks/bench_utils.py                                                   # 변경 후 코드를 baseline과 비교
+    python benchmarks/bench_utils.py --recorded_dir ./recorded --filter postprocess
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from mlmodels import utils  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+# 머신 속도 기준으로 사용하는 고정 연산 (측정 대상 코드와 무관하게 항상 같은 일을 함)
+CALIBRATION_CASE = "calibration/numpy_sort_1m"
+# (width, height): VGA, HD, Full HD, 4K
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (3840, 2160)]
+BATCH_SIZES = [1, 8]
+# conf_threshold를 넘는 anchor 수 (YOLO11 640x640 출력의 anchor는 8400개)
+DETECTION_DENSITIES = [0, 10, 100, 1000]
+NUM_ANCHORS = 8400
+NUM_CLASSES = len(utils.CLASS_NAMES)
+INPUT_SIZE = (640, 640)
+
+
+def make_image(width, height, seed=0):
+    """JPEG 압축률이 실제 사진과 비슷하도록 노이즈 위에 도형을 그린 합성 이미지"""
+    rng = np.random.default_rng(seed)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (7, 7), 0)
+    for _ in range(20):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.circle(image, (x, y), int(rng.integers(10, max(11, height // 4))), color, -1)
+    return image
+
+
+def make_output(num_detections, seed=0):
+    """
+    YOLO output0 형태(1, 4 + num_classes, num_anchors)의 합성 텐서
+    num_detections개의 anchor만 한 클래스의 score가 conf_threshold를 넘도록 만듭니다.
+    """
+    rng = np.random.default_rng(seed)
+    output = np.empty((1, 4 + NUM_CLASSES, NUM_ANCHORS), dtype=np.float32)
+    output[0, 0] = rng.uniform(0, INPUT_SIZE[0], NUM_ANCHORS)
+    output[0, 1] = rng.uniform(0, INPUT_SIZE[1], NUM_ANCHORS)
+    output[0, 2:4] = rng.uniform(8, 200, (2, NUM_ANCHORS))
+    output[0, 4:] = rng.uniform(0, 0.1, (NUM_CLASSES, NUM_ANCHORS))
+    anchors = rng.choice(NUM_ANCHORS, size=num_detections, replace=False)
+    classes = rng.integers(0, NUM_CLASSES, num_detections)
+    output[0, 4 + classes, anchors] = rng.uniform(0.5, 1.0, num_detections)
+    return output
+
+
+def load_recorded_outputs(recorded_dir):
+    """Triton 응답에서 저장한 output0 텐서(.npy) 로드 (파일 이름이 케이스 이름이 됨)"""
+    if not recorded_dir:
+        return {}
+    return {path.stem: np.load(path) for path in sorted(Path(recorded_dir).glob("*.npy"))}
+
+
+def measure(func, min_time=1.0, min_repeats=5, max_repeats=1000):
+    """
+    func를 반복 실행한 시간(ms) 목록
+    최소 min_repeats회, 누적 시간이 min_time초를 넘을 때까지 실행하며 첫 실행은 warmup으로 제외합니다.
+    """
+    func()
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < min_repeats or time.perf_counter() - start < min_time):
+        begin = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - begin) * 1000)
+    return timings
+
+
+def summarize(rounds):
+    """
+    round별 측정 시간 목록의 요약
+    median_ms는 round별 median 중 최솟값으로, 측정 중 다른 프로세스의 부하가 섞인 round의 영향을 받지 않습니다.
+    """
+    medians = [statistics.median(timings) for timings in rounds]
+    timings = sorted(value for timings in rounds for value in timings)
+    return {
+        "median_ms": round(min(medians), 4),
+        "round_medians_ms": [round(value, 4) for value in medians],
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "min_ms": round(timings[0], 4),
+        "repeats": len(timings),
+    }
+
+
+def run_rounds(cases, rounds, min_time):
+    """
+    모든 케이스를 rounds번 번갈아 측정해 케이스 이름 -> round별 시간 목록을 반환합니다.
+    한 케이스를 연속으로 측정하지 않으므로 일시적인 부하가 특정 케이스에만 몰리지 않습니다.
+    """
+    timings = {name: [] for name in cases}
+    for _ in range(rounds):
+        for name, func in cases.items():
+            timings[name].append(measure(func, min_time / rounds))
+    return timings
+
+
+def fake_response(content):
+    response = mock.Mock()
+    response.content = content
+    response.raise_for_status.return_value = None
+    return response
+
+
+def build_cases(recorded_outputs):
+    """벤치마크 케이스 이름 -> 실행 함수"""
+    calibration_data = np.random.default_rng(0).random(1_000_000)
+    cases = {CALIBRATION_CASE: lambda: np.sort(calibration_data)}
+    images = {(width, height): make_image(width, height) for width, height in RESOLUTIONS}
+
+    for (width, height), image in images.items():
+        encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+        def decode(encoded=encoded):
+            # 네트워크 대신 고정된 응답을 반환해 디코딩 비용만 측정
+            with mock.patch.object(utils.requests, "get", return_value=fake_response(encoded)):
+                utils.get_image_from_url("http://benchmark/image.jpg")
+
+        cases[f"get_image_from_url/{width}x{height}"] = decode
+
+        for batch_size in BATCH_SIZES:
+
+            def preprocess(image=image, batch_size=batch_size):
+                np.concatenate([utils.preprocess_image(image, INPUT_SIZE) for _ in range(batch_size)])
+
+            cases[f"preprocess_image/{width}x{height}/b{batch_size}"] = preprocess
+
+    outputs = {f"synthetic_d{density}": make_output(density) for density in DETECTION_DENSITIES}
+    outputs.update({f"recorded_{name}": output for name, output in recorded_outputs.items()})
+    original_shape = (1080, 1920)
+    for name, output in outputs.items():
+        for batch_size in BATCH_SIZES:
+
+            def postprocess(output=output, batch_size=batch_size):
+                for _ in range(batch_size):
+                    utils.postprocess_output(output, original_shape, INPUT_SIZE, 0.5, 0.5)
+
+            cases[f"postprocess_output/{name}/b{batch_size}"] = postprocess
+
+    for density in [10, 100]:
+        boxes, scores, class_ids = utils.postprocess_output(
+            outputs[f"synthetic_d{density}"], original_shape, INPUT_SIZE
+        )
+        image = images[(1920, 1080)]
+
+        def draw(image=image, boxes=boxes, scores=scores, class_ids=class_ids):
+            utils.draw_detections(image.copy(), boxes, scores, class_ids, 0.5)
+
+        cases[f"draw_detections/1920x1080/d{density}_kept{len(boxes)}"] = draw
+
+    return cases
+
+
+def compare(results, baseline, threshold, normalize=False):
+    """
+    baseline 대비 median이 threshold 비율을 넘게 늘어난 케이스 목록
+    normalize가 True이고 양쪽 모두 calibration 케이스가 있으면 calibration 시간으로 나눈 상대 시간끼리 비교합니다.
+    """
+    scale = 1.0
+    if normalize and CALIBRATION_CASE in results and baseline.get(CALIBRATION_CASE, {}).get("median_ms", 0) > 0:
+        scale = baseline[CALIBRATION_CASE]["median_ms"] / results[CALIBRATION_CASE]["median_ms"]
+
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None or name == CALIBRATION_CASE:
+            continue
+        ratio = result["median_ms"] * scale / previous["median_ms"] if previous["median_ms"] > 0 else 1.0
+        result["baseline_median_ms"] = previous["median_ms"]
+        result["change"] = round(ratio - 1, 4)
+        if ratio - 1 > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="mlmodels/utils.py 마이크로벤치마크")
+    parser.add_argument("--baseline", type=str, default=str(BASELINE_PATH), help="baseline 결과 JSON 경로")
+    parser.add_argument("--update_baseline", action="store_true", help="현재 결과로 baseline 갱신")
+    parser.add_argument("--threshold", type=float, default=0.2, help="실패로 판단할 median 증가 비율 (0.2 = 20%%)")
+    parser.add_argument("--filter", type=str, default="", help="이름에 이 문자열이 포함된 케이스만 실행")
+    parser.add_argument("--recorded_dir", type=str, default="", help="저장해 둔 output0 텐서(.npy) 디렉토리")
+    parser.add_argument("--min_time", type=float, default=1.0, help="케이스별 최소 측정 시간 (초, 모든 round 합계)")
+    parser.add_argument("--rounds", type=int, default=5, help="케이스마다 번갈아 측정할 round 수")
+    parser.add_argument("--normalize", action="store_true", help="calibration 케이스 시간으로 나눈 상대 시간으로 비교")
+    parser.add_argument("--output", type=str, default="", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    # 스레드 수에 따른 편차를 줄이기 위해 OpenCV를 단일 스레드로 고정
+    cv2.setNumThreads(1)
+    cases = build_cases(load_recorded_outputs(args.recorded_dir))
+    # calibration 케이스는 filter와 관계없이 항상 측정
+    cases = {name: func for name, func in cases.items() if args.filter in name or name == CALIBRATION_CASE}
+
+    results = {}
+    for name, rounds in run_rounds(cases, args.rounds, args.min_time).items():
+        results[name] = summarize(rounds)
+        spread = (
+            max(results[name]["round_medians_ms"]) / results[name]["median_ms"] - 1 if results[name]["median_ms"] else 0
+        )
+        print(
+            f"{name:<60} median {results[name]['median_ms']:>10.3f} ms  p95 {results[name]['p95_ms']:>10.3f} ms"
+            f"  round spread {spread * 100:>5.1f}%"
+        )
+
+    baseline_path = Path(args.baseline)
+    report = {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "python": sys.version.split()[0],
+        },
+        "threshold": args.threshold,
+        "rounds": args.rounds,
+        "normalize": args.normalize,
+        "results": results,
+    }
+
+    if args.update_baseline:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {"results": {}}
+        baseline["machine"] = report["machine"]
+        baseline["results"].update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"baseline 저장: {baseline_path} ({len(results)}개 케이스)")
+        regressions = []
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        regressions = compare(results, baseline["results"], args.threshold, args.normalize)
+        report["regressions"] = regressions
+        for name in regressions:
+            result = results[name]
+            print(
+                f"[REGRESSION] {name}: {result['baseline_median_ms']:.3f} ms -> {result['median_ms']:.3f} ms "
+                f"(+{result['change'] * 100:.1f}%)"
+            )
+        if baseline.get("machine", {}).get("platform") != report["machine"]["platform"]:
+            print("[경고] baseline과 다른 환경에서 측정했습니다. 같은 환경에서 비교해야 결과가 의미 있습니다.")
+    else:
+        print(f"baseline이 없습니다: {baseline_path} (변경 전 코드에서 --update_baseline으로 생성)")
+        regressions = []
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    if regressions:
+        print(f"{len(regressions)}개 케이스가 {args.threshold * 100:.0f}% 넘게 느려졌습니다.")
+        sys.exit(1)
+    print("성능 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
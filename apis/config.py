@@ -8,7 +8,60 @@ class Config(BaseSettings):
     SERVICE_HOST: str = os.getenv("SERVICE_HOST", "localhost")
     SERVICE_PORT: int = int(os.getenv("SERVICE_PORT", "8888"))
     ONNX_MODEL_TRITON_URL: str = os.getenv("ONNX_MODEL_TRITON_URL", "localhost:8000")
+    # Triton 전송 방식: http, grpc, grpc_stream (gRPC 양방향 스트리밍)
+    TRITON_PROTOCOL: str = os.getenv("TRITON_PROTOCOL", "http")
+    ONNX_MODEL_TRITON_GRPC_URL: str = os.getenv("ONNX_MODEL_TRITON_GRPC_URL", "localhost:8001")
+    TRITON_GRPC_CHANNELS: int = int(os.getenv("TRITON_GRPC_CHANNELS", "4"))
+    TRITON_GRPC_COMPRESSION: str = os.getenv("TRITON_GRPC_COMPRESSION", "")
+    TRITON_TIMEOUT_SECONDS: float = float(os.getenv("TRITON_TIMEOUT_SECONDS", "10"))
+    # Triton 모델 metadata/config(입력 크기, dynamic 축, 최대 배치 크기) 캐시 유지 시간 (초)
+    MODEL_INFO_TTL_SECONDS: float = float(os.getenv("MODEL_INFO_TTL_SECONDS", "30"))
+    # predict 요청 파라미터 기본값과 허용 범위 (입력 크기는 32의 배수, 고정 shape 모델은 모델 입력 크기만 허용)
+    PREDICT_DEFAULT_INPUT_SIZE: int = int(os.getenv("PREDICT_DEFAULT_INPUT_SIZE", "640"))
+    PREDICT_MIN_INPUT_SIZE: int = int(os.getenv("PREDICT_MIN_INPUT_SIZE", "160"))
+    PREDICT_MAX_INPUT_SIZE: int = int(os.getenv("PREDICT_MAX_INPUT_SIZE", "1280"))
+    PREDICT_CONF_THRESHOLD: float = float(os.getenv("PREDICT_CONF_THRESHOLD", "0.5"))
+    PREDICT_IOU_THRESHOLD: float = float(os.getenv("PREDICT_IOU_THRESHOLD", "0.5"))
+    PREDICT_MAX_DETECTIONS: int = int(os.getenv("PREDICT_MAX_DETECTIONS", "300"))
+    # 비율을 유지하는 letterbox 전처리 사용 여부 (요청의 letterbox 값이 우선)
+    PREDICT_LETTERBOX: bool = os.getenv("PREDICT_LETTERBOX", "False").lower() == "true"
+    # WebSocket 영상 추론 (/onnx-model/stream): 세션당 동시에 처리하는 frame 수, 대기 frame 수, 대기 frame이 가득 찼을 때 정책
+    # STREAM_DROP_POLICY: latest (오래된 frame을 버림), oldest (새 frame을 버림), block (버리지 않고 수신을 멈춤)
+    STREAM_MAX_INFLIGHT: int = int(os.getenv("STREAM_MAX_INFLIGHT", "2"))
+    STREAM_MAX_PENDING_FRAMES: int = int(os.getenv("STREAM_MAX_PENDING_FRAMES", "1"))
+    STREAM_DROP_POLICY: str = os.getenv("STREAM_DROP_POLICY", "latest")
+    # worker 시작 시 Triton 연결과 이미지 처리 경로를 미리 실행 (gunicorn으로 여러 worker를 실행하면 worker마다 실행)
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
     OTLP_GRPC_ENDPOINT: str = os.environ.get("OTLP_GRPC_ENDPOINT", "http://localhost:31834")
+    # shadow 트래픽 미러링 설정 (predict 요청 중 SHADOW_SAMPLE_RATE 비율을 후보 모델에 비동기로 전송)
+    SHADOW_ENABLED: bool = os.getenv("SHADOW_ENABLED", "False").lower() == "true"
+    SHADOW_TRITON_URL: str = os.getenv("SHADOW_TRITON_URL", "")
+    SHADOW_MODEL_NAME: str = os.getenv("SHADOW_MODEL_NAME", "onnx-model")
+    SHADOW_MODEL_VERSION: str = os.getenv("SHADOW_MODEL_VERSION", "")
+    # shadow metric의 shadow_version label (별도 Triton으로 후보 모델을 서빙하면 후보의 MLFLOW_MODEL_VERSION을 지정)
+    SHADOW_VERSION_LABEL: str = os.getenv("SHADOW_VERSION_LABEL", "")
+    SHADOW_SAMPLE_RATE: float = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+    SHADOW_QUEUE_SIZE: int = int(os.getenv("SHADOW_QUEUE_SIZE", "100"))
+    SHADOW_WORKERS: int = int(os.getenv("SHADOW_WORKERS", "2"))
+    SHADOW_IOU_THRESHOLD: float = float(os.getenv("SHADOW_IOU_THRESHOLD", "0.5"))
+    # predict 결과 캐시 (이미지 내용 해시 + 모델 버전 + 추론 파라미터 기준, PREDICT_CACHE_REDIS_URL을 설정하면 replica 간 공유)
+    PREDICT_CACHE_ENABLED: bool = os.getenv("PREDICT_CACHE_ENABLED", "False").lower() == "true"
+    PREDICT_CACHE_MAX_ENTRIES: int = int(os.getenv("PREDICT_CACHE_MAX_ENTRIES", "1024"))
+    PREDICT_CACHE_TTL_SECONDS: float = float(os.getenv("PREDICT_CACHE_TTL_SECONDS", "300"))
+    PREDICT_CACHE_REDIS_URL: str = os.getenv("PREDICT_CACHE_REDIS_URL", "")
+    PREDICT_CACHE_MODEL_CHECK_SECONDS: float = float(os.getenv("PREDICT_CACHE_MODEL_CHECK_SECONDS", "30"))
+    # 추론 동시 실행 수 제한 (limit은 Triton 지연 시간으로 MIN~MAX 사이에서 자동 조정, 초과 요청은 대기열에서 대기 후 429/503)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    ADMISSION_INITIAL_LIMIT: int = int(os.getenv("ADMISSION_INITIAL_LIMIT", "16"))
+    ADMISSION_MIN_LIMIT: int = int(os.getenv("ADMISSION_MIN_LIMIT", "1"))
+    ADMISSION_MAX_LIMIT: int = int(os.getenv("ADMISSION_MAX_LIMIT", "64"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_MAX_QUEUE_SECONDS: float = float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", "5"))
+    # 0이면 관측한 최소 Triton 지연 시간 x ADMISSION_LATENCY_TOLERANCE를 목표 지연 시간으로 사용
+    ADMISSION_TARGET_LATENCY_SECONDS: float = float(os.getenv("ADMISSION_TARGET_LATENCY_SECONDS", "0"))
+    ADMISSION_LATENCY_TOLERANCE: float = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "2.0"))
+    # 설정하면 요청을 JSONL로 기록 (examples/load_generator.py --mode replay로 재생)
+    REQUEST_CAPTURE_PATH: str = os.getenv("REQUEST_CAPTURE_PATH", "")
 
 
 settings = Config(_env_file=None)
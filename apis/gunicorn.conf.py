@@ -0,0 +1,71 @@
+"""
+여러 worker 프로세스로 API 서버를 실행하기 위한 gunicorn 설정
+    cd apis
+    gunicorn main:app -c gunicorn.conf.py
+
+- worker 수는 WEB_CONCURRENCY로 지정합니다. 지정하지 않으면 프로세스가 사용할 수 있는 CPU 수(CPU affinity와 cgroup CPU limit 중 작은 값)를 사용합니다.
+  multiprocessing.cpu_count()는 컨테이너의 CPU limit과 관계없이 노드의 전체 코어 수를 반환하므로 사용하지 않습니다.
+- Prometheus metric은 PROMETHEUS_MULTIPROC_DIR(기본값: /tmp/prometheus-multiproc)에 worker별로 기록하고 /metrics에서 합쳐서 반환합니다.
+- preload_app을 사용하지 않으므로 각 worker가 fork된 후에 앱을 import합니다.
+  OpenTelemetry TracerProvider(BatchSpanProcessor 스레드), Triton 클라이언트, shadow worker 스레드가 worker마다 새로 생성되어
+  fork 전에 만든 스레드나 연결을 공유하지 않습니다.
+"""
+
+import math
+import os
+import shutil
+
+
+def read_cgroup_cpu_limit():
+    """cgroup CPU quota로 제한된 CPU 수 (v2: cpu.max, v1: cpu.cfs_quota_us / cpu.cfs_period_us), 제한이 없으면 None"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as f:
+            quota, period = f.read().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", encoding="utf-8") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", encoding="utf-8") as f:
+            period = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus():
+    """프로세스가 사용할 수 있는 CPU 수 (CPU affinity와 cgroup CPU limit 중 작은 값, limit은 올림)"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    limit = read_cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '80')}"
+workers = int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+preload_app = False
+
+# worker 프로세스는 master의 환경변수를 상속하므로 prometheus_client를 import하기 전에 설정
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+
+def on_starting(server):  # pylint: disable=W0613
+    """이전 실행에서 남은 metric 파일 삭제"""
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):  # pylint: disable=W0613
+    """종료된 worker의 live gauge 값이 합계에 남지 않도록 정리"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
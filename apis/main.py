@@ -7,7 +7,7 @@ from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from middleware import log_request_middleware
-from mlmodels.router import router
+from mlmodels.router import result_cache, router, triton_transport, warmup
 from starlette.requests import Request
 from starlette_context.middleware import ContextMiddleware
 from tracing import PrometheusMiddleware, metrics, setting_otlp
@@ -20,6 +20,10 @@ app = FastAPI(
     swagger_ui_parameters={"syntaxHighlight.theme": "obsidian", "deepLinking": True},
 )
 app.include_router(router)
+app.add_event_handler("startup", warmup)
+app.add_event_handler("shutdown", triton_transport.close)
+if result_cache is not None:
+    app.add_event_handler("shutdown", result_cache.close)
 app.middleware("http")(log_request_middleware)
 app.add_middleware(PrometheusMiddleware, app_name=settings.APP_NAME)
 app.add_middleware(ContextMiddleware)
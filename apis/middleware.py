@@ -1,7 +1,10 @@
+import json
 import logging
 import logging.config
+import time
 
 import yaml
+from config import settings
 from starlette.background import BackgroundTask
 from starlette.requests import Request
 from starlette.responses import Response
@@ -29,11 +32,28 @@ def log_request(status_code, message):
         logging.info(message)
 
 
+def capture_request(path, record):
+    """부하 테스트 재생용으로 요청을 JSONL 한 줄로 기록"""
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logging.warning(f"request capture failed: {e}")
+
+
+def after_response(status_code, message, capture_record):
+    log_request(status_code, message)
+    if capture_record is not None:
+        capture_request(settings.REQUEST_CAPTURE_PATH, capture_record)
+
+
 async def log_request_middleware(request: Request, call_next):
     request_body = await request.body()
     decoded_request_body = request_body.decode("utf-8")
     await set_request_body(request, request_body)
 
+    timestamp = time.time()
+    start = time.perf_counter()
     response = await call_next(request)
 
     response_body = b""
@@ -47,7 +67,21 @@ async def log_request_middleware(request: Request, call_next):
                     \n Status code: {response.status_code} \
                     \n Request: {decoded_request_body} \
                     \n Response: {decoded_response_body}"
-        background_task = BackgroundTask(log_request, response.status_code, message)
+        capture_record = None
+        if settings.REQUEST_CAPTURE_PATH:
+            try:
+                body = json.loads(decoded_request_body) if decoded_request_body else None
+            except ValueError:
+                body = decoded_request_body
+            capture_record = {
+                "timestamp": timestamp,
+                "method": request.method,
+                "path": request.url.path + (f"?{request.url.query}" if request.url.query else ""),
+                "body": body,
+                "status_code": response.status_code,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+        background_task = BackgroundTask(after_response, response.status_code, message, capture_record)
 
     return Response(
         content=response_body,
@@ -0,0 +1,172 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# worker 프로세스가 여러 개면 limit, inflight, 대기열 크기는 모든 worker의 합계로 집계
+ADMISSION_LIMIT = Gauge(
+    "admission_concurrency_limit", "Current adaptive concurrency limit for inference.", multiprocess_mode="livesum"
+)
+ADMISSION_INFLIGHT = Gauge(
+    "admission_inflight_requests",
+    "Number of requests currently holding an inference slot.",
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_SIZE = Gauge(
+    "admission_queue_size", "Number of requests waiting for an inference slot.", multiprocess_mode="livesum"
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "admission_queue_wait_seconds",
+    "Time spent waiting for an inference slot (in seconds).",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Total count of requests rejected by admission control by reason (queue_full, queue_timeout).",
+    ["reason"],
+)
+
+
+class AdmissionRejected(Exception):
+    """대기열이 가득 찼거나 대기 시간을 넘겨 거절된 요청 (status_code, Retry-After 초 포함)"""
+
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    추론 동시 실행 수 제한과 부하 차단
+    동시에 limit개의 요청만 추론하고, 나머지는 최대 max_queue개까지 max_queue_seconds 동안 대기합니다.
+    대기열이 가득 차면 즉시 429, 대기 시간을 넘기면 503으로 거절해 이미 늦은 요청에 추론 자원을 쓰지 않습니다.
+
+    limit은 Triton 추론 지연 시간으로 AIMD 방식으로 조정합니다.
+    지연 시간이 목표 이하이면 limit개의 요청이 끝날 때마다 1씩 늘리고(additive increase),
+    목표를 넘거나 추론이 실패하면 backoff 비율로 줄입니다(multiplicative decrease, 지연 시간당 한 번).
+    target_latency가 0이면 관측한 최소 지연 시간(baseline)의 tolerance배를 목표로 사용합니다.
+    """
+
+    def __init__(
+        self,
+        initial_limit=16,
+        min_limit=1,
+        max_limit=64,
+        max_queue=64,
+        max_queue_seconds=5.0,
+        target_latency=0.0,
+        tolerance=2.0,
+        backoff=0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_seconds = max_queue_seconds
+        self.target_latency = target_latency
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.inflight = 0
+        self._waiters = deque()
+        self._baseline = None
+        self._latency = None
+        self._last_decrease = 0.0
+        ADMISSION_LIMIT.set(self.limit)
+
+    @classmethod
+    def from_settings(cls, settings):
+        """설정에서 admission control이 활성화된 경우에만 AdmissionController 생성"""
+        if not settings.ADMISSION_ENABLED:
+            return None
+        return cls(
+            initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+            min_limit=settings.ADMISSION_MIN_LIMIT,
+            max_limit=settings.ADMISSION_MAX_LIMIT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            max_queue_seconds=settings.ADMISSION_MAX_QUEUE_SECONDS,
+            target_latency=settings.ADMISSION_TARGET_LATENCY_SECONDS,
+            tolerance=settings.ADMISSION_LATENCY_TOLERANCE,
+        )
+
+    def _retry_after(self):
+        """대기 중인 요청이 모두 처리될 때까지의 예상 시간 (초, 최소 1)"""
+        latency = self._latency or 1.0
+        return max(1, math.ceil(latency * (len(self._waiters) / max(self.limit, 1) + 1)))
+
+    def _update_gauges(self):
+        ADMISSION_INFLIGHT.set(self.inflight)
+        ADMISSION_QUEUE_SIZE.set(len(self._waiters))
+        ADMISSION_LIMIT.set(self.limit)
+
+    async def acquire(self):
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            self._update_gauges()
+            ADMISSION_QUEUE_WAIT.observe(0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_REJECTED.labels(reason="queue_full").inc()
+            raise AdmissionRejected(429, "queue_full", self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._update_gauges()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, self.max_queue_seconds)
+        except asyncio.TimeoutError as e:
+            ADMISSION_REJECTED.labels(reason="queue_timeout").inc()
+            raise AdmissionRejected(503, "queue_timeout", self._retry_after()) from e
+        except asyncio.CancelledError:
+            # slot을 받은 직후 요청이 취소되면 slot을 반납
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+            ADMISSION_QUEUE_WAIT.observe(time.monotonic() - start)
+            self._update_gauges()
+
+    def release(self):
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.inflight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.inflight += 1
+                future.set_result(None)
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def observe(self, latency, ok=True):
+        """Triton 추론 결과로 limit 조정"""
+        now = time.monotonic()
+        if ok:
+            self._latency = latency if self._latency is None else 0.9 * self._latency + 0.1 * latency
+            # baseline은 더 낮은 값이 관측되면 바로 낮추고, 높은 값 쪽으로는 천천히 따라감
+            self._baseline = latency if self._baseline is None else min(latency, self._baseline * 0.99 + latency * 0.01)
+        target = self.target_latency or (self._baseline or latency) * self.tolerance
+
+        if ok and latency <= target:
+            # 유휴 상태에서 limit이 계속 커지지 않도록 limit의 절반 이상을 사용 중일 때만 증가
+            if self.inflight >= self.limit / 2:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif now - self._last_decrease >= (self._latency or latency):
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            self._last_decrease = now
+        self._wake()
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter, Gauge
+
+PREDICT_CACHE_EVENTS = Counter(
+    "predict_cache_events_total",
+    "Total count of predict cache events (hit, miss, result_coalesced, download_coalesced, invalidated).",
+    ["event"],
+)
+PREDICT_CACHE_ENTRIES = Gauge(
+    "predict_cache_entries", "Number of entries in the local predict result cache.", multiprocess_mode="livesum"
+)
+
+
+class SingleFlight:
+    """
+    같은 key로 동시에 들어온 작업을 하나로 합침
+    먼저 들어온 요청이 작업을 별도 task로 시작하고, 작업이 끝나기 전에 들어온 요청은 같은 결과(또는 예외)를 기다립니다.
+    작업을 시작한 요청이 취소되어도(클라이언트 연결 종료 등) 기다리는 다른 요청을 위해 작업은 계속 실행됩니다.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._tasks = {}
+
+    async def do(self, key, func):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            PREDICT_CACHE_EVENTS.labels(event=f"{self.name}_coalesced").inc()
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # 기다리는 요청이 모두 취소된 경우에도 예외가 처리되지 않은 채로 남지 않도록 확인
+        if not task.cancelled():
+            task.exception()
+
+
+class RedisBackend:
+    """여러 API 서버 replica가 공유하는 Redis 캐시 (redis 패키지 필요)"""
+
+    def __init__(self, url, ttl_seconds, prefix="predict-cache:"):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key):
+        data = await self._client.get(self.prefix + key)
+        return json.loads(data) if data else None
+
+    async def set(self, key, value):
+        await self._client.set(self.prefix + key, json.dumps(value), ex=max(1, int(self.ttl_seconds)))
+
+    async def get_epoch(self):
+        return int(await self._client.get(self.prefix + "epoch") or 0)
+
+    async def bump_epoch(self):
+        return int(await self._client.incr(self.prefix + "epoch"))
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class ResultCache:
+    """
+    predict 결과 캐시
+    이미지 내용 해시, 모델 버전, 추론 파라미터로 만든 key에 결과를 저장하며, 로컬 LRU(max_entries, ttl_seconds)를 먼저 조회하고
+    공유 backend(Redis)가 있으면 그 다음에 조회합니다. 같은 key의 동시 요청은 SingleFlight로 합쳐서 한 번만 계산합니다.
+
+    key에는 generation(서빙 중인 모델 상태의 fingerprint와 무효화 epoch)이 포함되므로
+    서빙 중인 모델이 바뀌거나 invalidate()를 호출하면 이전 결과는 더 이상 조회되지 않습니다.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300, backend=None, model_check_seconds=30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.model_check_seconds = model_check_seconds
+        self._entries = OrderedDict()
+        self._flight = SingleFlight("result")
+        self._model_fingerprint = ""
+        self._epoch = 0
+        self._next_model_check = 0.0
+        self._refresh_task = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        """설정에서 캐시가 활성화된 경우에만 ResultCache 생성"""
+        if not settings.PREDICT_CACHE_ENABLED:
+            return None
+        backend = None
+        if settings.PREDICT_CACHE_REDIS_URL:
+            backend = RedisBackend(settings.PREDICT_CACHE_REDIS_URL, settings.PREDICT_CACHE_TTL_SECONDS)
+        return cls(
+            max_entries=settings.PREDICT_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.PREDICT_CACHE_TTL_SECONDS,
+            backend=backend,
+            model_check_seconds=settings.PREDICT_CACHE_MODEL_CHECK_SECONDS,
+        )
+
+    @property
+    def generation(self):
+        return f"{self._model_fingerprint}:{self._epoch}"
+
+    def key(self, *parts):
+        payload = json.dumps([self.generation, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _clear_local(self):
+        self._entries.clear()
+        PREDICT_CACHE_ENTRIES.set(0)
+
+    async def refresh_generation(self, fetch_model_state):
+        """
+        model_check_seconds마다 서빙 중인 모델 상태(fetch_model_state의 결과)와 공유 무효화 epoch를 확인하고, 바뀌었으면 로컬 캐시를 비움
+        확인 중에 들어온 요청은 같은 확인 결과를 기다리며, 확인에 실패하면 기존 generation을 유지합니다.
+        """
+        if time.monotonic() < self._next_model_check:
+            return
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh_generation(fetch_model_state))
+            self._refresh_task.add_done_callback(lambda _: setattr(self, "_refresh_task", None))
+        await asyncio.shield(self._refresh_task)
+
+    async def _refresh_generation(self, fetch_model_state):
+        try:
+            state = await fetch_model_state()
+            fingerprint = hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()[:16]
+            epoch = await self.backend.get_epoch() if self.backend is not None else self._epoch
+        except Exception as e:
+            logging.warning(f"predict cache model check failed: {e}")
+            return
+        finally:
+            self._next_model_check = time.monotonic() + self.model_check_seconds
+        if (fingerprint, epoch) != (self._model_fingerprint, self._epoch):
+            if self._model_fingerprint:
+                PREDICT_CACHE_EVENTS.labels(event="invalidated").inc()
+            self._model_fingerprint, self._epoch = fingerprint, epoch
+            self._clear_local()
+
+    async def invalidate(self):
+        """모든 캐시 결과 무효화 (공유 backend가 있으면 다른 replica에도 적용)"""
+        removed = len(self._entries)
+        self._epoch = await self.backend.bump_epoch() if self.backend is not None else self._epoch + 1
+        self._clear_local()
+        PREDICT_CACHE_EVENTS.labels(event="invalidated").inc()
+        return removed
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        if self.backend is None:
+            return None
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logging.warning(f"predict cache backend get failed: {e}")
+            return None
+        if value is not None:
+            self._store_local(key, value)
+        return value
+
+    def _store_local(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        PREDICT_CACHE_ENTRIES.set(len(self._entries))
+
+    async def set(self, key, value):
+        self._store_local(key, value)
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, value)
+            except Exception as e:
+                logging.warning(f"predict cache backend set failed: {e}")
+
+    async def get_or_compute(self, key, compute):
+        """
+        캐시된 결과를 반환하거나 compute()로 계산해서 저장
+        (결과, 캐시 hit 여부)를 반환하며, 계산 중인 같은 key의 요청은 그 결과를 함께 기다립니다.
+        """
+        value = await self.get(key)
+        if value is not None:
+            PREDICT_CACHE_EVENTS.labels(event="hit").inc()
+            return value, True
+
+        async def fill():
+            PREDICT_CACHE_EVENTS.labels(event="miss").inc()
+            result = await compute()
+            await self.set(key, result)
+            return result
+
+        return await self._flight.do(key, fill), False
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import time
+
+from .cache import SingleFlight
+
+
+class ModelInfo:
+    """Triton 모델 metadata와 config에서 추론에 필요한 입력 정보 (입력 크기, dynamic 축, 최대 배치 크기)"""
+
+    def __init__(self, metadata, config):
+        self.metadata = metadata
+        self.config = config
+        # gRPC JSON 응답은 int64 값을 문자열로 반환하므로 int로 변환, dynamic 축은 -1
+        self.input_shape = [int(dim) for dim in metadata["inputs"][0]["shape"]]
+        self.input_height, self.input_width = self.input_shape[-2:]
+        self.max_batch_size = int(config.get("max_batch_size", 0))
+
+    @property
+    def dynamic_shape(self):
+        """높이와 너비가 모두 dynamic 축이면 임의 크기(직사각형 포함)의 입력으로 추론 가능"""
+        return self.input_height < 0 and self.input_width < 0
+
+    @property
+    def input_size(self):
+        """고정 입력 크기 (width, height), dynamic shape 모델이면 None"""
+        if self.dynamic_shape:
+            return None
+        return self.input_width, self.input_height
+
+
+class ModelInfoCache:
+    """
+    모델 이름, 버전별 ModelInfo 캐시
+    ttl_seconds가 지나면 Triton에서 다시 조회하며, 같은 모델에 대한 동시 조회는 하나로 합칩니다.
+    조회에 실패하면 이전에 조회한 정보가 있는 경우 그 정보를 계속 사용합니다.
+    """
+
+    def __init__(self, transport, ttl_seconds=30):
+        self.transport = transport
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._flight = SingleFlight("model_info")
+
+    async def get(self, model_name, model_version=""):
+        key = (model_name, model_version)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return await self._flight.do(key, lambda: self._fetch(key))
+
+    async def _fetch(self, key):
+        try:
+            metadata, config = await asyncio.gather(
+                self.transport.get_model_metadata(*key), self.transport.get_model_config(*key)
+            )
+        except Exception as e:
+            stale = self._entries.get(key)
+            if stale is None:
+                raise
+            logging.warning(f"model info refresh failed for {key}, using cached info: {e}")
+            return stale[1]
+        info = ModelInfo(metadata, config)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, info)
+        return info
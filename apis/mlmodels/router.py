@@ -1,18 +1,47 @@
+import contextlib
+import functools
+import hashlib
+import logging
 import os
+import time
 import uuid
 
 import cv2
+import numpy as np
 import requests
-import tritonclient.http as httpclient
 from config import settings
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from kubernetes import client, config
+from pydantic import ValidationError
 from schemas import PredictRequest, PredictResponse
+from starlette.concurrency import run_in_threadpool
+from tracing import INFERENCE_LATENCY
 from tritonclient.utils import InferenceServerException
 
 from . import utils
+from .admission import AdmissionController, AdmissionRejected
+from .cache import ResultCache, SingleFlight
+from .model_info import ModelInfoCache
+from .shadow import ShadowMirror
+from .stream import DROP_POLICIES, StreamSession
+from .transport import create_transport
 
 router = APIRouter()
+# Triton 전송 방식 (TRITON_PROTOCOL: http, grpc, grpc_stream)
+triton_transport = create_transport(settings)
+# 후보 모델로 요청 일부를 미러링 (SHADOW_ENABLED가 False면 None)
+shadow_mirror = ShadowMirror.from_settings(settings)
+# 같은 이미지/모델 버전/파라미터의 predict 결과 캐시 (PREDICT_CACHE_ENABLED가 False면 None)
+result_cache = ResultCache.from_settings(settings)
+# 같은 URL의 동시 다운로드를 하나로 합침
+download_flight = SingleFlight("download")
+# 추론 동시 실행 수 제한과 부하 차단 (ADMISSION_ENABLED가 False면 None)
+admission = AdmissionController.from_settings(settings)
+# 모델별 입력 크기, dynamic 축, 최대 배치 크기 (MODEL_INFO_TTL_SECONDS마다 Triton에서 다시 조회)
+model_info = ModelInfoCache(triton_transport, ttl_seconds=settings.MODEL_INFO_TTL_SECONDS)
+# 잘못된 STREAM_DROP_POLICY로 stream 연결마다 세션 생성이 실패하지 않도록 시작할 때 확인
+if settings.STREAM_DROP_POLICY not in DROP_POLICIES:
+    raise ValueError(f"Unsupported STREAM_DROP_POLICY: {settings.STREAM_DROP_POLICY} (expected one of {DROP_POLICIES})")
 
 
 @router.get(
@@ -44,71 +73,273 @@ def get_models():
     response_model=PredictResponse,
     tags=["Models"],
 )
-def predict(request: PredictRequest):
+async def predict(request: PredictRequest):
+    # Triton 요청은 event loop에서 비동기로 보내고, CPU를 사용하는 이미지 처리는 스레드 풀에서 실행
+    options = await resolve_options(request)
     try:
         # 이미지 URL에서 이미지 다운로드
         try:
-            image = utils.get_image_from_url(request.image_url)
-            if image is None:
-                raise HTTPException(status_code=400, detail="Invalid image format")
-
+            image_bytes = await download_image(request.image_url)
         except requests.RequestException as e:
             raise HTTPException(status_code=400, detail=f"Failed to download image: {str(e)}") from e
 
-        # 이미지 원본 크기 저장
-        original_shape = image.shape[:2]  # (height, width)
+        if result_cache is None:
+            result = await run_prediction(image_bytes, request.model_version, options)
+        else:
+            # 서빙 중인 모델이 바뀌었으면 이전 결과를 사용하지 않도록 캐시 generation 갱신
+            await result_cache.refresh_generation(fetch_model_state)
+            cache_key = result_cache.key(
+                hashlib.sha256(image_bytes).hexdigest(),
+                request.model_version,
+                options,
+            )
+            result, cached = await result_cache.get_or_compute(
+                cache_key, lambda: run_prediction(image_bytes, request.model_version, options)
+            )
+            # 다른 replica가 저장한 결과이거나 결과 이미지가 없으면 캐시된 감지 결과로 다시 그림
+            if cached and not os.path.exists(f"static/{result['result_filename']}"):
+                image = await run_in_threadpool(utils.decode_image, image_bytes)
+                await run_in_threadpool(
+                    save_result_image,
+                    image,
+                    result["boxes"],
+                    result["scores"],
+                    result["class_ids"],
+                    result["result_filename"],
+                    options["conf_threshold"],
+                )
 
-        # 이미지 전처리
-        input_size = (640, 640)  # 기본 YOLO 입력 크기
-        input_data = utils.preprocess_image(image, input_size)
+        # 결과 URL 생성
+        result_url = f"http://{settings.SERVICE_HOST}:{settings.SERVICE_PORT}/static/{result['result_filename']}"
+        return PredictResponse(result_image_url=result_url)
 
-        # Triton 서버 URL 설정 (model_name이 triton 서버 호스트와 포트를 포함할 수 있음)
-        triton_url = settings.ONNX_MODEL_TRITON_URL
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+        ) from e
+    except InferenceServerException as e:
+        raise HTTPException(status_code=500, detail=f"Triton inference error: {str(e)}") from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}") from e
 
-        print(f"triton_url: {triton_url}")
 
-        # Triton 클라이언트 초기화
-        triton_client = httpclient.InferenceServerClient(url=triton_url)
+@functools.lru_cache(maxsize=4)
+def model_probe_input(width, height):
+    """모델 상태 확인용 고정 입력 (항상 같은 값)"""
+    return np.random.default_rng(0).random((1, 3, height, width), dtype=np.float32)
 
-        # 서버 상태 확인
-        if not triton_client.is_server_live():
-            raise HTTPException(status_code=503, detail=f"Triton server {triton_url} is not running")
 
-        # 입력 텐서 생성
-        inputs = [httpclient.InferInput("images", input_data.shape, "FP32")]
-        inputs[0].set_data_from_numpy(input_data)
+async def fetch_model_state():
+    """
+    predict 결과 캐시의 generation을 정하는 서빙 중인 모델 상태 (Triton metadata, 고정 입력에 대한 출력의 해시)
+    onnx-model은 MLFLOW_MODEL_VERSION이 바뀌어도 Triton 버전과 metadata가 같으므로, 고정 입력의 출력으로 모델이 바뀌었는지 확인합니다.
+    """
+    metadata = await triton_transport.get_model_metadata("onnx-model")
+    info = await model_info.get("onnx-model")
+    width, height = info.input_size or (settings.PREDICT_DEFAULT_INPUT_SIZE, settings.PREDICT_DEFAULT_INPUT_SIZE)
+    output = await triton_transport.infer("onnx-model", model_probe_input(width, height))
+    # GPU 연산의 미세한 오차로 generation이 바뀌지 않도록 반올림 (-0.0은 0.0으로 맞춤)
+    probe = hashlib.sha256((np.round(output, 2) + 0.0).tobytes()).hexdigest()
+    return {"metadata": metadata, "probe": probe}
 
-        # 추론 요청
-        response = triton_client.infer(
-            model_name="onnx-model", inputs=inputs, model_version=request.model_version
-        )
 
-        # 출력 결과 가져오기
-        output = response.as_numpy("output0")
+@router.post(
+    "/onnx-model/cache/invalidate",
+    description="predict 결과 캐시 무효화 (모델 배포 후 호출)",
+    tags=["Models"],
+)
+async def invalidate_cache():
+    if result_cache is None:
+        return {"enabled": False, "invalidated": 0}
+    return {"enabled": True, "invalidated": await result_cache.invalidate()}
 
-        # 후처리 및 바운딩 박스 추출
-        boxes, scores, class_ids = utils.postprocess_output(
-            output,
-            original_shape,
-            input_size=input_size,
-            conf_threshold=0.5,
-            iou_threshold=0.5,
+
+@router.websocket("/onnx-model/stream")
+async def stream(websocket: WebSocket):
+    """
+    WebSocket 영상 추론
+    model_version, input_size, conf_threshold, iou_threshold, max_detections, letterbox는 query parameter로 지정하고,
+    인코딩된 frame을 binary 메시지로 보내면 감지 결과를 frame_id와 단계별 시간과 함께 JSON으로 반환합니다.
+    Triton 상태와 모델 정보는 연결할 때 한 번만 확인하고, 세션 동안 같은 Triton 연결을 재사용합니다.
+    """
+    try:
+        request = PredictRequest(**websocket.query_params)
+        options = await resolve_options(request)
+        live = await triton_transport.is_server_live()
+    except ValidationError as e:
+        await websocket.close(code=1008, reason=str(e)[:120])
+        return
+    except HTTPException as e:
+        await websocket.close(code=1008 if e.status_code < 500 else 1011, reason=str(e.detail)[:120])
+        return
+    if not live:
+        await websocket.close(code=1011, reason=f"Triton server {triton_transport} is not running"[:120])
+        return
+
+    await websocket.accept()
+    session = StreamSession(
+        websocket,
+        triton_transport,
+        request.model_version,
+        options,
+        max_inflight=settings.STREAM_MAX_INFLIGHT,
+        max_pending=settings.STREAM_MAX_PENDING_FRAMES,
+        drop_policy=settings.STREAM_DROP_POLICY,
+        admission=admission,
+    )
+    try:
+        await session.send(
+            {
+                "type": "ready",
+                "model_version": request.model_version,
+                "input_size": list(options["input_size"]),
+                "letterbox": options["letterbox"],
+                "max_inflight": session.max_inflight,
+                "drop_policy": settings.STREAM_DROP_POLICY,
+            }
         )
+        await session.run()
+    except WebSocketDisconnect:
+        pass
 
-        # 감지 결과 그리기
-        result_image = utils.draw_detections(image.copy(), boxes, scores, class_ids, 0.5)
 
-        # 결과 이미지 저장
-        os.makedirs("static", exist_ok=True)
-        result_filename = f"{uuid.uuid4()}.jpg"
-        result_path = f"static/{result_filename}"
-        cv2.imwrite(result_path, result_image)
+async def download_image(image_url):
+    if result_cache is None:
+        return await run_in_threadpool(utils.download_image, image_url)
+    return await download_flight.do(image_url, lambda: run_in_threadpool(utils.download_image, image_url))
 
-        # 결과 URL 생성
-        result_url = f"http://{settings.SERVICE_HOST}:{settings.SERVICE_PORT}/static/{result_filename}"
-        return PredictResponse(result_image_url=result_url)
 
+async def resolve_options(request):
+    """
+    요청 파라미터, 서버 기본값, Triton 모델 입력 정보로 전처리/후처리 옵션 결정
+    dynamic shape 모델은 요청한 입력 크기를 사용하고, 고정 shape 모델은 모델 입력 크기만 허용합니다.
+    """
+    try:
+        info = await model_info.get("onnx-model", request.model_version)
     except InferenceServerException as e:
         raise HTTPException(status_code=500, detail=f"Triton inference error: {str(e)}") from e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}") from e
+        raise HTTPException(status_code=503, detail=f"Failed to get model info from {triton_transport}: {e}") from e
+
+    if info.dynamic_shape:
+        size = request.input_size or settings.PREDICT_DEFAULT_INPUT_SIZE
+        input_size = (size, size)
+    else:
+        input_size = info.input_size
+        if request.input_size is not None and (request.input_size, request.input_size) != input_size:
+            raise HTTPException(
+                status_code=400,
+                detail=f"onnx-model version {request.model_version} only supports input size "
+                f"{input_size[0]}x{input_size[1]}",
+            )
+
+    letterbox = settings.PREDICT_LETTERBOX if request.letterbox is None else request.letterbox
+    return {
+        "input_size": input_size,
+        "conf_threshold": settings.PREDICT_CONF_THRESHOLD if request.conf_threshold is None else request.conf_threshold,
+        "iou_threshold": settings.PREDICT_IOU_THRESHOLD if request.iou_threshold is None else request.iou_threshold,
+        "max_detections": request.max_detections or settings.PREDICT_MAX_DETECTIONS,
+        "letterbox": letterbox,
+        # dynamic shape 모델은 정사각형까지 채우지 않고 직사각형 입력으로 추론
+        "rect": letterbox and info.dynamic_shape,
+    }
+
+
+async def run_prediction(image_bytes, model_version, options):
+    """이미지 디코딩부터 결과 이미지 저장까지 실행하고, 캐시에 저장할 감지 결과와 결과 파일 이름을 반환"""
+    # 동시 실행 수를 넘는 요청은 slot이 날 때까지 대기하고, 대기열이 가득 차거나 대기 시간을 넘기면 AdmissionRejected
+    async with admission.slot() if admission is not None else contextlib.nullcontext():
+        image = await run_in_threadpool(utils.decode_image, image_bytes)
+        if image is None:
+            raise HTTPException(status_code=400, detail="Invalid image format")
+
+        # 이미지 원본 크기 저장
+        original_shape = image.shape[:2]  # (height, width)
+
+        # 이미지 전처리
+        letterbox = None
+        if options["letterbox"]:
+            input_data, letterbox = await run_in_threadpool(
+                utils.letterbox_image, image, options["input_size"], options["rect"]
+            )
+        else:
+            input_data = await run_in_threadpool(utils.preprocess_image, image, options["input_size"])
+
+        # 서버 상태 확인
+        if not await triton_transport.is_server_live():
+            raise HTTPException(status_code=503, detail=f"Triton server {triton_transport} is not running")
+
+        # 추론 요청
+        inference_start = time.perf_counter()
+        try:
+            output = await triton_transport.infer("onnx-model", input_data, model_version=model_version)
+        except InferenceServerException:
+            if admission is not None:
+                admission.observe(time.perf_counter() - inference_start, ok=False)
+            raise
+        inference_latency = time.perf_counter() - inference_start
+        INFERENCE_LATENCY.labels(model_name="onnx-model", model_version=model_version, role="primary").observe(
+            inference_latency
+        )
+        # Triton 지연 시간으로 동시 실행 수 limit 조정
+        if admission is not None:
+            admission.observe(inference_latency)
+
+        # 후처리 및 바운딩 박스 추출
+        postprocess_options = {
+            "conf_threshold": options["conf_threshold"],
+            "iou_threshold": options["iou_threshold"],
+            "max_detections": options["max_detections"],
+            "letterbox": letterbox,
+        }
+        boxes, scores, class_ids = await run_in_threadpool(
+            utils.postprocess_output, output, original_shape, input_size=options["input_size"], **postprocess_options
+        )
+
+        # 후보 모델 비교용 shadow 요청 (큐에만 추가하고 응답을 기다리지 않음)
+        if shadow_mirror is not None:
+            shadow_mirror.submit(
+                input_data,
+                original_shape,
+                options["input_size"],
+                model_version,
+                (boxes, scores, class_ids),
+                postprocess_options,
+            )
+
+        # 감지 결과 그리기 및 결과 이미지 저장
+        result_filename = f"{uuid.uuid4()}.jpg"
+        await run_in_threadpool(
+            save_result_image, image, boxes, scores, class_ids, result_filename, options["conf_threshold"]
+        )
+
+        return {
+            "result_filename": result_filename,
+            "boxes": [[int(value) for value in box] for box in boxes],
+            "scores": [float(score) for score in scores],
+            "class_ids": [int(class_id) for class_id in class_ids],
+        }
+
+
+async def warmup():
+    """
+    worker 시작 시 첫 요청이 느려지지 않도록 Triton 연결을 만들고 이미지 디코딩/전처리를 한 번 실행
+    Triton이 아직 준비되지 않았으면 경고만 남기고 계속 시작합니다.
+    """
+    if not settings.WARMUP_ENABLED:
+        return
+    size = settings.PREDICT_DEFAULT_INPUT_SIZE
+    _, encoded = await run_in_threadpool(cv2.imencode, ".jpg", np.zeros((size, size, 3), np.uint8))
+    image = await run_in_threadpool(utils.decode_image, encoded.tobytes())
+    await run_in_threadpool(utils.preprocess_image, image, (size, size))
+    try:
+        await triton_transport.is_server_live()
+        await model_info.get("onnx-model")
+    except Exception as e:  # pylint: disable=W0718
+        logging.warning(f"warm-up: Triton {triton_transport} is not ready: {e}")
+
+
+def save_result_image(image, boxes, scores, class_ids, result_filename, conf_threshold):
+    result_image = utils.draw_detections(image.copy(), boxes, scores, class_ids, conf_threshold)
+    os.makedirs("static", exist_ok=True)
+    cv2.imwrite(f"static/{result_filename}", result_image)
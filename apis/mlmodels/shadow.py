@@ -0,0 +1,203 @@
+import logging
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+import tritonclient.http as httpclient
+from prometheus_client import Counter, Gauge, Histogram
+from tracing import INFERENCE_LATENCY
+
+from . import utils
+
+SHADOW_REQUESTS = Counter(
+    "shadow_requests_total",
+    "Total count of shadow requests by candidate version and result (mirrored, dropped, error).",
+    ["model_version", "result"],
+)
+SHADOW_QUEUE_SIZE = Gauge(
+    "shadow_queue_size", "Number of shadow requests waiting in the queue.", multiprocess_mode="livesum"
+)
+SHADOW_AGREEMENT = Histogram(
+    "shadow_detection_agreement",
+    "Detection agreement between primary and shadow outputs (IoU-matched F1, 1.0 = identical boxes).",
+    ["primary_version", "shadow_version"],
+    buckets=(0.0, 0.25, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0),
+)
+SHADOW_SCORE_DRIFT = Histogram(
+    "shadow_score_drift",
+    "Mean absolute confidence difference of IoU-matched boxes |shadow - primary|.",
+    ["primary_version", "shadow_version"],
+    buckets=(0.0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0),
+)
+SHADOW_DETECTION_COUNT_DELTA = Histogram(
+    "shadow_detection_count_delta",
+    "Difference in number of detections (shadow - primary).",
+    ["primary_version", "shadow_version"],
+    buckets=(-10, -5, -2, -1, 0, 1, 2, 5, 10),
+)
+
+
+def box_iou(box, boxes):
+    """[left, top, width, height] 박스 하나와 여러 박스의 IoU"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    left = np.maximum(box[0], boxes[:, 0])
+    top = np.maximum(box[1], boxes[:, 1])
+    right = np.minimum(box[0] + box[2], boxes[:, 0] + boxes[:, 2])
+    bottom = np.minimum(box[1] + box[3], boxes[:, 1] + boxes[:, 3])
+    intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    union = box[2] * box[3] + boxes[:, 2] * boxes[:, 3] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def compare_detections(primary, shadow, iou_threshold=0.5):
+    """
+    primary/shadow 감지 결과 비교
+    같은 클래스이고 IoU가 iou_threshold 이상인 박스를 score가 높은 순서로 1:1 매칭해
+    agreement(매칭 F1), 매칭된 박스의 평균 score 차이, 감지 개수 차이를 반환합니다.
+    """
+    primary_boxes, primary_scores, primary_classes = primary
+    shadow_boxes, shadow_scores, shadow_classes = shadow
+    if not primary_boxes and not shadow_boxes:
+        return {"agreement": 1.0, "score_drift": None, "count_delta": 0, "matched": 0}
+
+    unmatched = set(range(len(shadow_boxes)))
+    score_diffs = []
+    for idx in np.argsort(primary_scores)[::-1]:
+        candidates = [j for j in unmatched if shadow_classes[j] == primary_classes[idx]]
+        if not candidates:
+            continue
+        ious = box_iou(primary_boxes[idx], [shadow_boxes[j] for j in candidates])
+        best = int(np.argmax(ious))
+        if ious[best] >= iou_threshold:
+            unmatched.discard(candidates[best])
+            score_diffs.append(float(shadow_scores[candidates[best]]) - float(primary_scores[idx]))
+
+    matched = len(score_diffs)
+    return {
+        "agreement": 2 * matched / (len(primary_boxes) + len(shadow_boxes)),
+        "score_drift": float(np.mean(np.abs(score_diffs))) if score_diffs else None,
+        "count_delta": len(shadow_boxes) - len(primary_boxes),
+        "matched": matched,
+    }
+
+
+class ShadowMirror:
+    """
+    shadow 트래픽 미러링
+    primary 추론 결과와 같은 입력을 후보 모델(버전 또는 별도 Triton endpoint)에 비동기로 보내
+    버전별 지연 시간과 감지 결과 일치도를 Prometheus metric으로 기록합니다.
+    요청은 크기가 제한된 큐에 넣고 백그라운드 스레드가 처리하므로 primary 응답 지연에는 영향을 주지 않으며,
+    큐가 가득 차면 shadow 요청을 버립니다.
+    """
+
+    def __init__(
+        self,
+        triton_url,
+        model_name="onnx-model",
+        model_version="",
+        version_label="",
+        sample_rate=0.1,
+        queue_size=100,
+        num_workers=2,
+        iou_threshold=0.5,
+        conf_threshold=0.5,
+    ):
+        self.triton_url = triton_url
+        self.model_name = model_name
+        self.model_version = model_version
+        self._version_label = version_label
+        self.sample_rate = sample_rate
+        self.iou_threshold = iou_threshold
+        self.conf_threshold = conf_threshold
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._workers = [
+            threading.Thread(target=self._run, name=f"shadow-worker-{idx}", daemon=True) for idx in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """설정에서 shadow 미러링이 활성화된 경우에만 ShadowMirror 생성"""
+        if not settings.SHADOW_ENABLED:
+            return None
+        return cls(
+            triton_url=settings.SHADOW_TRITON_URL or settings.ONNX_MODEL_TRITON_URL,
+            model_name=settings.SHADOW_MODEL_NAME,
+            model_version=settings.SHADOW_MODEL_VERSION,
+            version_label=settings.SHADOW_VERSION_LABEL,
+            sample_rate=settings.SHADOW_SAMPLE_RATE,
+            queue_size=settings.SHADOW_QUEUE_SIZE,
+            num_workers=settings.SHADOW_WORKERS,
+            iou_threshold=settings.SHADOW_IOU_THRESHOLD,
+        )
+
+    @property
+    def version_label(self):
+        return self._version_label or self.model_version or "latest"
+
+    def submit(
+        self, input_data, original_shape, input_size, primary_version, primary_detections, postprocess_options=None
+    ):
+        """
+        샘플링된 요청을 shadow 큐에 추가 (블로킹하지 않음)
+        postprocess_options(threshold, letterbox 등)를 지정하면 shadow 출력도 primary와 같은 옵션으로 후처리합니다.
+        큐에 추가했으면 True, 샘플링에서 제외되었거나 큐가 가득 차서 버렸으면 False를 반환합니다.
+        """
+        if random.random() >= self.sample_rate:
+            return False
+        try:
+            self._queue.put_nowait(
+                (input_data, original_shape, input_size, primary_version, primary_detections, postprocess_options)
+            )
+        except queue.Full:
+            SHADOW_REQUESTS.labels(model_version=self.version_label, result="dropped").inc()
+            return False
+        SHADOW_QUEUE_SIZE.set(self._queue.qsize())
+        return True
+
+    def _client(self):
+        # tritonclient.http 클라이언트는 스레드 간에 공유하지 않고 워커 스레드마다 하나씩 재사용
+        if getattr(self._local, "client", None) is None:
+            self._local.client = httpclient.InferenceServerClient(url=self.triton_url)
+        return self._local.client
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            SHADOW_QUEUE_SIZE.set(self._queue.qsize())
+            try:
+                self._mirror(*item)
+            except Exception as e:
+                SHADOW_REQUESTS.labels(model_version=self.version_label, result="error").inc()
+                logging.warning(f"shadow request failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _mirror(self, input_data, original_shape, input_size, primary_version, primary_detections, postprocess_options):
+        inputs = [httpclient.InferInput("images", input_data.shape, "FP32")]
+        inputs[0].set_data_from_numpy(input_data)
+
+        start = time.perf_counter()
+        response = self._client().infer(model_name=self.model_name, inputs=inputs, model_version=self.model_version)
+        INFERENCE_LATENCY.labels(model_name=self.model_name, model_version=self.version_label, role="shadow").observe(
+            time.perf_counter() - start
+        )
+
+        shadow_detections = utils.postprocess_output(
+            response.as_numpy("output0"),
+            original_shape,
+            input_size=input_size,
+            **{"conf_threshold": self.conf_threshold, "iou_threshold": 0.5, **(postprocess_options or {})},
+        )
+        comparison = compare_detections(primary_detections, shadow_detections, self.iou_threshold)
+
+        labels = {"primary_version": primary_version, "shadow_version": self.version_label}
+        SHADOW_AGREEMENT.labels(**labels).observe(comparison["agreement"])
+        SHADOW_DETECTION_COUNT_DELTA.labels(**labels).observe(comparison["count_delta"])
+        if comparison["score_drift"] is not None:
+            SHADOW_SCORE_DRIFT.labels(**labels).observe(comparison["score_drift"])
+        SHADOW_REQUESTS.labels(model_version=self.version_label, result="mirrored").inc()
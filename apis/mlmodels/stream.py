@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.concurrency import run_in_threadpool
+from tracing import INFERENCE_LATENCY
+from tritonclient.utils import InferenceServerException
+
+from . import utils
+from .admission import AdmissionRejected
+
+STREAM_SESSIONS = Gauge("stream_sessions", "Number of open WebSocket stream sessions.", multiprocess_mode="livesum")
+STREAM_FRAMES = Counter(
+    "stream_frames_total", "Total count of stream frames by result (processed, dropped, error).", ["result"]
+)
+STREAM_FRAME_LATENCY = Histogram(
+    "stream_frame_latency_seconds",
+    "Time from receiving a stream frame to sending its detections (in seconds).",
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0),
+)
+
+DROP_POLICIES = ("latest", "oldest", "block")
+
+
+def elapsed_ms(start, end):
+    return round((end - start) * 1000, 3)
+
+
+class FrameBuffer:
+    """
+    추론을 기다리는 frame 버퍼 (최대 max_size개)
+    버퍼가 가득 찼을 때 drop_policy에 따라
+    - latest: 가장 오래 기다린 frame을 버리고 새 frame을 넣음 (latest-wins, 실시간 영상에 적합)
+    - oldest: 새로 들어온 frame을 버림
+    - block: 자리가 날 때까지 기다림 (수신을 멈추므로 클라이언트 전송이 느려지며, 지연 시간이 늘어날 수 있음)
+    """
+
+    def __init__(self, max_size=1, drop_policy="latest"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unsupported drop policy: {drop_policy} (expected one of {DROP_POLICIES})")
+        self.max_size = max(1, max_size)
+        self.drop_policy = drop_policy
+        self._frames = deque()
+        self._changed = asyncio.Condition()
+        self._closed = False
+
+    async def put(self, frame):
+        """frame을 추가하고, 버린 frame이 있으면 반환"""
+        async with self._changed:
+            dropped = None
+            if len(self._frames) >= self.max_size:
+                if self.drop_policy == "oldest":
+                    return frame
+                if self.drop_policy == "latest":
+                    dropped = self._frames.popleft()
+                else:
+                    await self._changed.wait_for(lambda: len(self._frames) < self.max_size or self._closed)
+            self._frames.append(frame)
+            self._changed.notify_all()
+            return dropped
+
+    async def get(self):
+        """다음 frame을 반환 (버퍼가 닫히면 None)"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._frames or self._closed)
+            if not self._frames:
+                return None
+            frame = self._frames.popleft()
+            self._changed.notify_all()
+            return frame
+
+    async def close(self):
+        async with self._changed:
+            self._closed = True
+            self._frames.clear()
+            self._changed.notify_all()
+
+
+class StreamSession:
+    """
+    WebSocket 영상 추론 세션
+    binary 메시지로 받은 인코딩된 frame(JPEG, PNG 등)에 수신 순서대로 frame_id를 붙이고,
+    max_inflight개의 worker가 디코딩, 전처리, Triton 추론, 후처리를 실행해 여러 frame을 동시에 처리합니다.
+    추론이 수신 속도를 따라가지 못하면 FrameBuffer의 drop_policy에 따라 frame을 버리므로
+    대기 중인 frame은 max_pending개를 넘지 않고, 지연 시간이 계속 늘어나지 않습니다.
+    admission을 지정하면 frame 처리도 predict 요청과 같은 AdmissionController의 slot을 받아 실행하므로
+    stream과 predict 트래픽이 하나의 Triton 동시 실행 한도를 나눠 쓰며, slot을 받지 못한 frame은 버립니다.
+
+    클라이언트로 보내는 JSON 메시지
+    - {"type": "detections", "frame_id", "image_shape", "boxes", "scores", "class_ids", "class_names", "timing"}
+    - {"type": "dropped", "frame_id"}: 추론하지 않고 버린 frame (admission control로 거절되면 "reason" 포함)
+    - {"type": "error", "frame_id", "message"}: frame 처리 실패 (세션은 유지)
+    결과는 처리가 끝난 순서대로 보내므로, max_inflight가 1보다 크면 frame_id 순서가 바뀔 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        websocket,
+        transport,
+        model_version,
+        options,
+        max_inflight=2,
+        max_pending=1,
+        drop_policy="latest",
+        admission=None,
+    ):
+        self.websocket = websocket
+        self.transport = transport
+        self.admission = admission
+        self.model_version = model_version
+        self.options = options
+        self.max_inflight = max(1, max_inflight)
+        self._buffer = FrameBuffer(max_pending, drop_policy)
+        # 여러 worker가 같은 WebSocket으로 동시에 보내지 않도록 전송을 직렬화
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message):
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    async def run(self):
+        STREAM_SESSIONS.inc()
+        workers = [asyncio.create_task(self._work()) for _ in range(self.max_inflight)]
+        try:
+            await self._receive()
+        finally:
+            # 연결이 끊겼으면 결과를 보낼 수 없으므로 처리 중인 frame은 취소
+            await self._buffer.close()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            STREAM_SESSIONS.dec()
+
+    async def _receive(self):
+        frame_id = 0
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            data = message.get("bytes")
+            if data is None:
+                await self.send({"type": "error", "frame_id": None, "message": "frames must be binary messages"})
+                continue
+
+            frame = {"frame_id": frame_id, "data": data, "received_at": time.perf_counter()}
+            frame_id += 1
+            dropped = await self._buffer.put(frame)
+            if dropped is not None:
+                STREAM_FRAMES.labels(result="dropped").inc()
+                await self.send({"type": "dropped", "frame_id": dropped["frame_id"]})
+
+    async def _work(self):
+        while True:
+            frame = await self._buffer.get()
+            if frame is None:
+                return
+            try:
+                result = await self._process(frame)
+            except AdmissionRejected as e:
+                STREAM_FRAMES.labels(result="dropped").inc()
+                await self.send({"type": "dropped", "frame_id": frame["frame_id"], "reason": e.reason})
+                continue
+            except Exception as e:  # pylint: disable=W0718
+                STREAM_FRAMES.labels(result="error").inc()
+                logging.warning(f"stream frame {frame['frame_id']} failed: {e}")
+                await self.send({"type": "error", "frame_id": frame["frame_id"], "message": str(e)})
+                continue
+            await self.send(result)
+            STREAM_FRAMES.labels(result="processed").inc()
+            STREAM_FRAME_LATENCY.observe(time.perf_counter() - frame["received_at"])
+
+    def _preprocess(self, image):
+        if self.options["letterbox"]:
+            return utils.letterbox_image(image, self.options["input_size"], self.options["rect"])
+        return utils.preprocess_image(image, self.options["input_size"]), None
+
+    async def _process(self, frame):
+        # predict 요청과 같은 동시 실행 한도 안에서 처리 (대기열이 가득 차거나 대기 시간을 넘기면 AdmissionRejected)
+        async with self.admission.slot() if self.admission is not None else contextlib.nullcontext():
+            return await self._process_frame(frame)
+
+    async def _process_frame(self, frame):
+        start = time.perf_counter()
+        image = await run_in_threadpool(utils.decode_image, frame["data"])
+        if image is None:
+            raise ValueError("Invalid image format")
+        decoded = time.perf_counter()
+
+        input_data, letterbox = await run_in_threadpool(self._preprocess, image)
+        preprocessed = time.perf_counter()
+
+        try:
+            output = await self.transport.infer("onnx-model", input_data, model_version=self.model_version)
+        except InferenceServerException:
+            if self.admission is not None:
+                self.admission.observe(time.perf_counter() - preprocessed, ok=False)
+            raise
+        inferred = time.perf_counter()
+        INFERENCE_LATENCY.labels(model_name="onnx-model", model_version=self.model_version, role="primary").observe(
+            inferred - preprocessed
+        )
+        # Triton 지연 시간으로 동시 실행 수 limit 조정
+        if self.admission is not None:
+            self.admission.observe(inferred - preprocessed)
+
+        boxes, scores, class_ids = await run_in_threadpool(
+            utils.postprocess_output,
+            output,
+            image.shape[:2],
+            input_size=self.options["input_size"],
+            conf_threshold=self.options["conf_threshold"],
+            iou_threshold=self.options["iou_threshold"],
+            max_detections=self.options["max_detections"],
+            letterbox=letterbox,
+        )
+        finished = time.perf_counter()
+
+        return {
+            "type": "detections",
+            "frame_id": frame["frame_id"],
+            "image_shape": list(image.shape[:2]),
+            "boxes": [[int(value) for value in box] for box in boxes],
+            "scores": [float(score) for score in scores],
+            "class_ids": [int(class_id) for class_id in class_ids],
+            "class_names": [
+                utils.CLASS_NAMES[class_id] if class_id < len(utils.CLASS_NAMES) else f"class_{class_id}"
+                for class_id in class_ids
+            ],
+            "timing": {
+                "queue_ms": elapsed_ms(frame["received_at"], start),
+                "decode_ms": elapsed_ms(start, decoded),
+                "preprocess_ms": elapsed_ms(decoded, preprocessed),
+                "inference_ms": elapsed_ms(preprocessed, inferred),
+                "postprocess_ms": elapsed_ms(inferred, finished),
+                "total_ms": elapsed_ms(frame["received_at"], finished),
+            },
+        }
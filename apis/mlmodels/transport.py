@@ -0,0 +1,239 @@
+import asyncio
+import itertools
+import threading
+
+import tritonclient.grpc.aio as grpcclient
+import tritonclient.http as httpclient
+from starlette.concurrency import run_in_threadpool
+from tritonclient.grpc._utils import _get_inference_request, _grpc_compression_type
+from tritonclient.utils import InferenceServerException
+
+INPUT_NAME = "images"
+OUTPUT_NAME = "output0"
+
+
+class HttpTransport:
+    """
+    tritonclient.http 기반 전송
+    동기 클라이언트를 스레드 풀에서 실행하며, 클라이언트는 스레드 간에 공유하지 않고 스레드마다 하나씩 재사용합니다.
+    """
+
+    def __init__(self, url, timeout=None):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __str__(self):
+        return f"http://{self.url}"
+
+    def _client(self):
+        if getattr(self._local, "client", None) is None:
+            kwargs = {"network_timeout": self.timeout, "connection_timeout": self.timeout} if self.timeout else {}
+            self._local.client = httpclient.InferenceServerClient(url=self.url, **kwargs)
+        return self._local.client
+
+    async def is_server_live(self):
+        return await run_in_threadpool(lambda: self._client().is_server_live())
+
+    async def get_model_metadata(self, model_name, model_version=""):
+        return await run_in_threadpool(lambda: self._client().get_model_metadata(model_name, model_version))
+
+    async def get_model_config(self, model_name, model_version=""):
+        return await run_in_threadpool(lambda: self._client().get_model_config(model_name, model_version))
+
+    def _infer(self, model_name, input_data, model_version):
+        inputs = [httpclient.InferInput(INPUT_NAME, input_data.shape, "FP32")]
+        inputs[0].set_data_from_numpy(input_data)
+        outputs = [httpclient.InferRequestedOutput(OUTPUT_NAME)]
+        response = self._client().infer(
+            model_name=model_name, inputs=inputs, outputs=outputs, model_version=model_version
+        )
+        return response.as_numpy(OUTPUT_NAME)
+
+    async def infer(self, model_name, input_data, model_version=""):
+        return await run_in_threadpool(self._infer, model_name, input_data, model_version)
+
+    async def close(self):
+        pass
+
+
+class GrpcTransport:
+    """
+    tritonclient.grpc.aio 기반 전송
+    channels개의 gRPC 채널(클라이언트)을 만들어 요청마다 돌아가며 사용하고, 요청마다 timeout을 deadline으로 지정합니다.
+    aio 채널은 생성한 event loop에 묶이므로 첫 요청 시점에 생성합니다.
+    """
+
+    def __init__(self, url, channels=4, compression="", timeout=None):
+        self.url = url
+        self.num_channels = max(1, channels)
+        # gzip, deflate 또는 압축하지 않음 (이미지 텐서는 압축률이 낮아 CPU 여유가 있을 때만 권장)
+        self.compression = compression or None
+        self.timeout = timeout
+        self._clients = None
+        self._next = None
+
+    def __str__(self):
+        return f"grpc://{self.url} (channels={self.num_channels}, compression={self.compression})"
+
+    def _client(self):
+        if self._clients is None:
+            self._clients = [grpcclient.InferenceServerClient(url=self.url) for _ in range(self.num_channels)]
+            self._next = itertools.cycle(self._clients)
+        return next(self._next)
+
+    async def is_server_live(self):
+        return await self._client().is_server_live(client_timeout=self.timeout)
+
+    async def get_model_metadata(self, model_name, model_version=""):
+        return await self._client().get_model_metadata(
+            model_name, model_version, as_json=True, client_timeout=self.timeout
+        )
+
+    async def get_model_config(self, model_name, model_version=""):
+        response = await self._client().get_model_config(
+            model_name, model_version, as_json=True, client_timeout=self.timeout
+        )
+        return response["config"]
+
+    @staticmethod
+    def _inputs(input_data):
+        inputs = [grpcclient.InferInput(INPUT_NAME, input_data.shape, "FP32")]
+        inputs[0].set_data_from_numpy(input_data)
+        return inputs, [grpcclient.InferRequestedOutput(OUTPUT_NAME)]
+
+    async def infer(self, model_name, input_data, model_version=""):
+        inputs, outputs = self._inputs(input_data)
+        response = await self._client().infer(
+            model_name=model_name,
+            inputs=inputs,
+            outputs=outputs,
+            model_version=model_version,
+            client_timeout=self.timeout,
+            compression_algorithm=self.compression,
+        )
+        return response.as_numpy(OUTPUT_NAME)
+
+    async def close(self):
+        for client in self._clients or []:
+            await client.close()
+        self._clients = None
+
+
+class GrpcStreamTransport(GrpcTransport):
+    """
+    양방향 스트리밍(stream_infer) 기반 전송
+    요청마다 RPC를 새로 열지 않고 하나의 스트림으로 요청을 보내며, 응답은 request id로 대기 중인 요청에 돌려줍니다.
+    스트림이 끊어지면 대기 중인 요청을 모두 실패 처리하고 다음 요청에서 다시 연결합니다.
+    tritonclient의 stream_infer는 오류 응답의 request id를 버리므로, 오류를 해당 요청에 돌려줄 수 있도록 gRPC stub을 직접 호출합니다.
+    이때 tritonclient의 내부 API(_client_stub, grpc._utils)를 사용하므로 apis/requirements.txt에 고정한 tritonclient 버전에 의존합니다.
+    """
+
+    def __init__(self, url, compression="", timeout=None):
+        super().__init__(url, channels=1, compression=compression, timeout=timeout)
+        self._requests = None
+        self._pending = {}
+        self._ids = itertools.count()
+        self._reader = None
+
+    def __str__(self):
+        return f"grpc-stream://{self.url} (compression={self.compression})"
+
+    async def _request_iterator(self, requests):
+        while True:
+            request = await requests.get()
+            if request is None:
+                return
+            yield request
+
+    def _fail_pending(self, error):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def _read_responses(self, requests):
+        try:
+            responses = self._client()._client_stub.ModelStreamInfer(  # pylint: disable=W0212
+                self._request_iterator(requests), compression=_grpc_compression_type(self.compression)
+            )
+            async for response in responses:
+                # Triton은 오류 응답에도 실패한 요청의 id를 채워서 보냄
+                request_id = response.infer_response.id
+                if response.error_message and not request_id:
+                    # 어느 요청의 오류인지 알 수 없으면 다른 요청에 잘못된 결과를 돌려주지 않도록 대기 중인 요청을 모두 실패 처리
+                    # (timeout으로 이미 포기한 요청의 늦은 응답은 id가 있으므로 아래에서 무시됨)
+                    self._fail_pending(InferenceServerException(msg=response.error_message))
+                    continue
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if response.error_message:
+                    future.set_exception(InferenceServerException(msg=response.error_message))
+                else:
+                    future.set_result(grpcclient.InferResult(response.infer_response).as_numpy(OUTPUT_NAME))
+        except Exception as e:  # pylint: disable=W0718
+            self._fail_pending(e if isinstance(e, InferenceServerException) else InferenceServerException(str(e)))
+        finally:
+            # 응답 스트림이 오류 없이 끝나도(서버가 스트림을 닫은 경우 등) 대기 중인 요청이 deadline까지 기다리지 않도록 실패 처리하고,
+            # 다음 요청에서 새 스트림을 열도록 함
+            self._requests = None
+            self._fail_pending(InferenceServerException("stream closed"))
+
+    def _ensure_stream(self):
+        if self._requests is None:
+            self._requests = asyncio.Queue()
+            self._reader = asyncio.create_task(self._read_responses(self._requests))
+        return self._requests
+
+    async def infer(self, model_name, input_data, model_version=""):
+        inputs, outputs = self._inputs(input_data)
+        request_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._ensure_stream().put_nowait(
+            _get_inference_request(
+                model_name=model_name,
+                inputs=inputs,
+                model_version=model_version,
+                request_id=request_id,
+                outputs=outputs,
+                sequence_id=0,
+                sequence_start=False,
+                sequence_end=False,
+                priority=0,
+                timeout=None,
+                parameters=None,
+            )
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError as e:
+            self._pending.pop(request_id, None)
+            raise InferenceServerException(f"Deadline Exceeded ({self.timeout}s) for request {request_id}") from e
+
+    async def close(self):
+        if self._requests is not None:
+            self._requests.put_nowait(None)
+        if self._reader is not None:
+            await self._reader
+        await super().close()
+
+
+def create_transport(settings):
+    """TRITON_PROTOCOL 설정에 따라 Triton 전송 방식 선택 (http, grpc, grpc_stream)"""
+    timeout = settings.TRITON_TIMEOUT_SECONDS or None
+    if settings.TRITON_PROTOCOL == "grpc":
+        return GrpcTransport(
+            settings.ONNX_MODEL_TRITON_GRPC_URL,
+            channels=settings.TRITON_GRPC_CHANNELS,
+            compression=settings.TRITON_GRPC_COMPRESSION,
+            timeout=timeout,
+        )
+    if settings.TRITON_PROTOCOL == "grpc_stream":
+        return GrpcStreamTransport(
+            settings.ONNX_MODEL_TRITON_GRPC_URL, compression=settings.TRITON_GRPC_COMPRESSION, timeout=timeout
+        )
+    if settings.TRITON_PROTOCOL != "http":
+        raise ValueError(f"Unsupported TRITON_PROTOCOL: {settings.TRITON_PROTOCOL}")
+    return HttpTransport(settings.ONNX_MODEL_TRITON_URL, timeout=timeout)
@@ -1,3 +1,5 @@
+import math
+
 import cv2
 import numpy as np
 import requests
@@ -88,24 +90,72 @@ CLASS_NAMES = [
 COLOR_PALETTE = np.random.uniform(0, 255, size=(len(CLASS_NAMES), 3))
 
 
-def get_image_from_url(url: str):
+def download_image(url: str):
     response = requests.get(url, timeout=10)
     response.raise_for_status()
-    image = cv2.imdecode(np.frombuffer(response.content, np.uint8), cv2.IMREAD_COLOR)
-    return image
+    return response.content
 
 
-def preprocess_image(image, input_size=(640, 640)):
-    """이미지 전처리 함수"""
-    resized_image = cv2.resize(image, (input_size[0], input_size[1]))
-    rgb_image = cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB) / 255.0
+def decode_image(data: bytes):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def get_image_from_url(url: str):
+    return decode_image(download_image(url))
+
+
+def image_to_tensor(image):
+    """BGR 이미지를 모델 입력 텐서(1, 3, H, W, RGB, 0~1)로 변환"""
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB) / 255.0
     transposed_image = np.transpose(rgb_image, (2, 0, 1))
-    input_data = np.expand_dims(transposed_image, axis=0).astype(np.float32)
-    return input_data
+    return np.expand_dims(transposed_image, axis=0).astype(np.float32)
 
 
-def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=0.5, iou_threshold=0.5):
-    """모델 출력 후처리 함수"""
+def preprocess_image(image, input_size=(640, 640)):
+    """이미지 전처리 함수"""
+    resized_image = cv2.resize(image, (input_size[0], input_size[1]))
+    return image_to_tensor(resized_image)
+
+
+def letterbox_image(image, input_size=(640, 640), rect=False, stride=32):
+    """
+    letterbox 전처리 함수
+    이미지 비율을 유지한 채 input_size(width, height) 안에 들어가도록 resize하고 남는 영역을 회색(114)으로 채웁니다.
+    rect가 True면 input_size까지 채우지 않고 stride의 배수까지만 채운 직사각형 입력을 만듭니다 (dynamic shape 모델용).
+    (입력 텐서, (resize 비율, (왼쪽 padding, 위쪽 padding)))를 반환합니다.
+    """
+    height, width = image.shape[:2]
+    ratio = min(input_size[0] / width, input_size[1] / height)
+    new_width, new_height = max(1, round(width * ratio)), max(1, round(height * ratio))
+    if rect:
+        target_width = math.ceil(new_width / stride) * stride
+        target_height = math.ceil(new_height / stride) * stride
+    else:
+        target_width, target_height = input_size
+
+    resized_image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    left = (target_width - new_width) // 2
+    top = (target_height - new_height) // 2
+    padded_image = cv2.copyMakeBorder(
+        resized_image,
+        top,
+        target_height - new_height - top,
+        left,
+        target_width - new_width - left,
+        cv2.BORDER_CONSTANT,
+        value=(114, 114, 114),
+    )
+    return image_to_tensor(padded_image), (ratio, (left, top))
+
+
+def postprocess_output(
+    output, img_shape, input_size=(640, 640), conf_threshold=0.5, iou_threshold=0.5, max_detections=None, letterbox=None
+):
+    """
+    모델 출력 후처리 함수
+    letterbox 전처리를 사용했으면 letterbox_image가 반환한 (resize 비율, padding)으로 원본 이미지 좌표로 변환하고,
+    max_detections를 지정하면 score가 높은 순서로 최대 max_detections개만 반환합니다.
+    """
     outputs = np.transpose(np.squeeze(output))
 
     boxes = []
@@ -115,8 +165,13 @@ def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=
     rows = outputs.shape[0]
     img_height, img_width = img_shape
 
-    scale_x = img_width / input_size[0]
-    scale_y = img_height / input_size[1]
+    if letterbox is None:
+        scale_x = img_width / input_size[0]
+        scale_y = img_height / input_size[1]
+        pad_x = pad_y = 0
+    else:
+        ratio, (pad_x, pad_y) = letterbox
+        scale_x = scale_y = 1 / ratio
 
     for i in range(rows):
         classes_scores = outputs[i][4:]
@@ -127,8 +182,8 @@ def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=
 
             x, y, w, h = outputs[i][:4]
 
-            left = int((x - w / 2) * scale_x)
-            top = int((y - h / 2) * scale_y)
+            left = int((x - w / 2 - pad_x) * scale_x)
+            top = int((y - h / 2 - pad_y) * scale_y)
             width = int(w * scale_x)
             height = int(h * scale_y)
 
@@ -163,6 +218,11 @@ def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=
             filtered_scores = scores
             filtered_class_ids = class_ids
 
+    if max_detections:
+        filtered_boxes = filtered_boxes[:max_detections]
+        filtered_scores = filtered_scores[:max_detections]
+        filtered_class_ids = filtered_class_ids[:max_detections]
+
     return filtered_boxes, filtered_scores, filtered_class_ids
 
 
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field
+from typing import Optional
+
+from config import settings
+from pydantic import BaseModel, Field, field_validator
 
 
 class PredictRequest(BaseModel):
@@ -12,6 +15,55 @@ class PredictRequest(BaseModel):
         description="image_url",
         default="https://djl.ai/examples/src/test/resources/dog_bike_car.jpg",
     )
+    input_size: Optional[int] = Field(
+        title="input_size",
+        description="모델 입력 크기 (32의 배수, 작을수록 빠르고 작은 객체 정확도는 낮아짐, 기본값: 모델 입력 크기)",
+        default=None,
+    )
+    conf_threshold: Optional[float] = Field(
+        title="conf_threshold",
+        description="감지 결과로 사용할 최소 confidence",
+        default=None,
+        ge=0.0,
+        le=1.0,
+    )
+    iou_threshold: Optional[float] = Field(
+        title="iou_threshold",
+        description="NMS IoU threshold",
+        default=None,
+        ge=0.0,
+        le=1.0,
+    )
+    max_detections: Optional[int] = Field(
+        title="max_detections",
+        description="반환할 최대 감지 개수",
+        default=None,
+        ge=1,
+    )
+    letterbox: Optional[bool] = Field(
+        title="letterbox",
+        description="비율을 유지하는 letterbox 전처리 사용 여부 (dynamic shape 모델은 직사각형 입력으로 추론)",
+        default=None,
+    )
+
+    @field_validator("input_size")
+    @classmethod
+    def check_input_size(cls, value):
+        if value is None:
+            return value
+        if not settings.PREDICT_MIN_INPUT_SIZE <= value <= settings.PREDICT_MAX_INPUT_SIZE or value % 32:
+            raise ValueError(
+                f"input_size must be a multiple of 32 between "
+                f"{settings.PREDICT_MIN_INPUT_SIZE} and {settings.PREDICT_MAX_INPUT_SIZE}"
+            )
+        return value
+
+    @field_validator("max_detections")
+    @classmethod
+    def check_max_detections(cls, value):
+        if value is not None and value > settings.PREDICT_MAX_DETECTIONS:
+            raise ValueError(f"max_detections must be at most {settings.PREDICT_MAX_DETECTIONS}")
+        return value
 
 
 class PredictResponse(BaseModel):
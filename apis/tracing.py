@@ -1,3 +1,4 @@
+import os
 import time
 from typing import Tuple
 
@@ -9,7 +10,7 @@ from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
 from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST, generate_latest
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
@@ -18,7 +19,7 @@ from starlette.routing import Match
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 from starlette.types import ASGIApp
 
-INFO = Gauge("fastapi_app_info", "FastAPI application information.", ["app_name"])
+INFO = Gauge("fastapi_app_info", "FastAPI application information.", ["app_name"], multiprocess_mode="max")
 REQUESTS = Counter(
     "fastapi_requests_total", "Total count of requests by method and path.", ["method", "path", "app_name"]
 )
@@ -41,6 +42,13 @@ REQUESTS_IN_PROGRESS = Gauge(
     "fastapi_requests_in_progress",
     "Gauge of requests by method and path currently being processed",
     ["method", "path", "app_name"],
+    multiprocess_mode="livesum",
+)
+INFERENCE_LATENCY = Histogram(
+    "model_inference_duration_seconds",
+    "Histogram of Triton inference time by model version and role (primary, shadow) (in seconds)",
+    ["model_name", "model_version", "role"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0),
 )
 
 
@@ -96,7 +104,12 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
 
 
 def metrics(request: Request) -> Response:
-    return Response(generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
+    registry = REGISTRY
+    # gunicorn 등으로 worker 프로세스를 여러 개 실행하면 PROMETHEUS_MULTIPROC_DIR에 기록된 모든 worker의 metric을 합쳐서 반환
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
 
 def setting_otlp(app: ASGIApp, app_name: str, log_correlation: bool = True) -> None:
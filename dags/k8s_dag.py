@@ -1,8 +1,16 @@
+import itertools
+import json
+import math
 import os
+import random
+import re
 from datetime import datetime
 
 from airflow import DAG
+from airflow.decorators import task
+from airflow.exceptions import AirflowException, AirflowSkipException
 from airflow.providers.cncf.kubernetes.operators.pod import KubernetesPodOperator
+from airflow.utils.trigger_rule import TriggerRule
 from kubernetes.client import models as k8s
 
 DAGS_DIR = os.environ.get("DAGS_DIR", "/app/dags")
@@ -15,6 +23,46 @@ GIT_USERNAME = os.environ.get("GIT_USERNAME", "")
 GIT_EMAIL = os.environ.get("GIT_EMAIL", "")
 GIT_TOKEN = os.environ.get("GIT_TOKEN", "")
 K8S_DAG_IMAGE = os.environ.get("K8S_DAG_IMAGE", "")
+# 스테이지 실행 지표(stage_metrics)를 전송할 Prometheus Pushgateway 주소 (빈 값이면 전송 안 함)
+PUSHGATEWAY_URL = os.environ.get("PUSHGATEWAY_URL", "http://pushgateway.mlops-platform.svc.cluster.local:9091")
+# sweep 모드에서 동시에 실행할 학습 pod 수 상한과 successive halving 단계(rung) 수 상한
+SWEEP_MAX_CONCURRENCY = int(os.environ.get("SWEEP_MAX_CONCURRENCY", "4"))
+SWEEP_MAX_RUNGS = int(os.environ.get("SWEEP_MAX_RUNGS", "3"))
+
+
+def sweep_trial_arguments(params, run_id, trial_id, trial_params, rung, model_path):
+    """sweep trial 학습 pod의 train_yolo.py 인자 목록 생성"""
+    trial_params = dict(trial_params)
+    rung_epochs = params["sweep_rung_epochs"]
+    # 이전 rung의 가중치에서 이어서 학습하므로 누적 epoch 차이만큼만 추가로 학습
+    epochs = rung_epochs[rung] - (rung_epochs[rung - 1] if rung > 0 else 0)
+    batch_size = trial_params.pop("batch_size", params["batch_size"])
+    img_size = trial_params.pop("img_size", params["img_size"])
+    output_dir = os.path.join(WORK_DIR, "sweeps", re.sub(r"[^A-Za-z0-9_.-]", "_", run_id), trial_id, f"rung-{rung}")
+    return [
+        f"{params['modules_dir']}/train_yolo.py",
+        "--data_yaml_path",
+        f"{params['splits_path']}/data.yaml",
+        "--epochs",
+        str(epochs),
+        "--batch_size",
+        str(batch_size),
+        "--img_size",
+        str(img_size),
+        "--run_name",
+        params["run_name"],
+        "--model_path",
+        model_path,
+        "--hyperparameters",
+        json.dumps(trial_params),
+        "--trial_id",
+        trial_id,
+        "--output_dir",
+        output_dir,
+        "--shards_path",
+        params["shards_path"] if params["use_shards"] else "",
+    ]
+
 
 with DAG(
     "k8s_dag",
@@ -28,18 +76,61 @@ with DAG(
         "dataset_url": "https://github.com/ultralytics/assets/releases/download/v0.0.0/coco128.zip",
         "dataset_cfg_url": "https://raw.githubusercontent.com/ultralytics/ultralytics/main/ultralytics/cfg/datasets/coco128.yaml",
         "dataset_path": os.path.join(WORK_DIR, "raw"),
+        # 어노테이션 저장소 경로 (라벨을 한 번만 파싱해 검증/분할 스테이지가 공유)
+        "annotation_store_path": os.path.join(WORK_DIR, "annotations"),
+        # 근접 중복 탐지 파라미터 (report: cluster를 같은 split에 유지, remove: cluster마다 하나만 사용)
+        "dedup_path": os.path.join(WORK_DIR, "dedup"),
+        "dedup_hash_type": "phash",
+        "dedup_radius": 4,
+        "dedup_action": "report",
         # 데이터셋 Split에 필요한 파라미터
         "splits_path": os.path.join(WORK_DIR, "splits"),
         "train_ratio": 0.7,
         "val_ratio": 0.2,
         "test_ratio": 0.1,
+        # 학습 이미지 축소 파라미터 (use_resized가 True면 img_size로 미리 축소한 이미지로 학습)
+        "resized_path": os.path.join(WORK_DIR, "resized"),
+        "use_resized": True,
+        "resize_image_format": "jpg",
+        "resize_quality": 95,
+        # 데이터셋 프로파일 저장 경로 (학습 시 MLflow에 통계가 기록됨)
+        "profile_path": os.path.join(WORK_DIR, "profile"),
+        # shard 패킹 파라미터 (use_shards가 True면 학습 pod가 shard를 로컬 디스크에 풀어서 사용)
+        "shards_path": os.path.join(WORK_DIR, "shards"),
+        "shard_size_mb": 256,
+        "use_shards": False,
+        # 스테이지 캐시 파라미터 (입력과 파라미터가 같으면 이전 결과를 재사용)
+        "cache_dir": os.path.join(WORK_DIR, ".stage_cache"),
+        "use_cache": True,
+        # fused_data_prep이 True면 다운로드부터 shard 패킹까지의 데이터 준비 스테이지를 pod 하나에서 순서대로 실행
+        "fused_data_prep": False,
         # YOLO 학습 DAG에 필요한 파라미터
         "epochs": 1,
         "batch_size": 16,
         "img_size": 640,
         "run_name": "yolo11n-onnx",
         "force_register": False,
-        # 모델 버전 등 정보를 업데이트할 git 정보
+        # 모델 등록 기준 (ONNX CPU 벤치마크의 batch 1 p95 지연 시간과 mAP50-95 비교)
+        "max_latency_ms": 0.0,
+        "max_latency_regression": 0.1,
+        "min_map_delta": 0.0,
+        # 최적화된 ONNX variant(static shape, INT8) 생성 및 등록 파라미터
+        # (INT8 calibration, variant별 검증과 추가 registry 버전이 학습마다 생기므로 필요할 때만 True로 설정)
+        "export_variants": False,
+        "static_batch_sizes": "1,8",
+        "int8_mode": "static",
+        "variant_map_budget": 0.01,
+        # 하이퍼파라미터 sweep 파라미터 (sweep_enabled가 True면 단일 학습 대신 sweep 실행)
+        # sweep_space의 조합 중 sweep_num_trials개를 샘플링해 sweep_rung_epochs의 첫 epoch 수만큼 동시에 학습하고,
+        # rung마다 mAP50-95 상위 1/sweep_reduction_factor개의 trial만 다음 rung의 epoch 수까지 이어서 학습
+        "sweep_enabled": False,
+        "sweep_space": {"lr0": [0.01, 0.005, 0.001], "batch_size": [16, 32], "img_size": [640]},
+        "sweep_num_trials": 6,
+        "sweep_rung_epochs": [1, 3, 9],
+        "sweep_reduction_factor": 3,
+        "sweep_seed": 0,
+        # 모델 버전 등 정보를 업데이트할 git 정보 (git_mirror_dir에 bare mirror를 유지해 실행마다 증분 fetch)
+        "git_mirror_dir": os.path.join(WORK_DIR, "git-mirror"),
         "git_branch": GIT_BRANCH,
         # Kubernetes 파라미터
         "work_dir_pvc_name": "data-volume",
@@ -83,7 +174,142 @@ with DAG(
         k8s.V1EnvVar(name="GIT_USERNAME", value=GIT_USERNAME),
         k8s.V1EnvVar(name="GIT_EMAIL", value=GIT_EMAIL),
         k8s.V1EnvVar(name="GIT_TOKEN", value=GIT_TOKEN),
+        k8s.V1EnvVar(name="PUSHGATEWAY_URL", value=PUSHGATEWAY_URL),
     ]
+    # 데이터 준비 pod에는 git/MLflow 정보 없이 지표 전송 주소만 전달
+    metrics_env_vars = [k8s.V1EnvVar(name="PUSHGATEWAY_URL", value=PUSHGATEWAY_URL)]
+
+    # 데이터 준비 스테이지별 인자 (스테이지별 pod와 fused pod에서 공통으로 사용)
+    data_prep_arguments = {
+        "download_dataset": [
+            "--dataset_url",
+            "{{ params.dataset_url }}",
+            "--target_path",
+            "{{ params.dataset_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "build_annotation_store": [
+            "--data_path",
+            "{{ params.dataset_path }}",
+            "--target_path",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "validate_dataset": [
+            "--data_path",
+            "{{ params.dataset_path }}",
+            "--annotation_store",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "dedup_dataset": [
+            "--data_path",
+            "{{ params.dataset_path }}",
+            "--target_path",
+            "{{ params.dedup_path }}",
+            "--hash_type",
+            "{{ params.dedup_hash_type }}",
+            "--radius",
+            "{{ params.dedup_radius }}",
+            "--action",
+            "{{ params.dedup_action }}",
+            "--annotation_store",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "split_dataset": [
+            "--data_path",
+            "{{ params.dataset_path }}",
+            "--target_path",
+            "{{ params.splits_path }}",
+            "--train_ratio",
+            "{{ params.train_ratio }}",
+            "--val_ratio",
+            "{{ params.val_ratio }}",
+            "--test_ratio",
+            "{{ params.test_ratio }}",
+            "--duplicates_path",
+            "{{ params.dedup_path }}/duplicates.json",
+            "--annotation_store",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "resize_images": [
+            "--splits_path",
+            "{{ params.splits_path }}",
+            "--target_path",
+            "{{ params.resized_path }}",
+            "--img_size",
+            "{{ params.img_size }}",
+            "--image_format",
+            "{{ params.resize_image_format }}",
+            "--quality",
+            "{{ params.resize_quality }}",
+            "--annotation_store",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "create_data_yaml": [
+            "--train_path",
+            "{{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}/train",
+            "--val_path",
+            "{{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}/val",
+            "--test_path",
+            "{{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}/test",
+            "--dataset_cfg_url",
+            "{{ params.dataset_cfg_url }}",
+            "--output_path",
+            "{{ params.splits_path }}/data.yaml",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "profile_dataset": [
+            "--splits_path",
+            "{{ params.splits_path }}",
+            "--target_path",
+            "{{ params.profile_path }}",
+            "--annotation_store",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+        "pack_shards": [
+            "--splits_path",
+            "{{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}",
+            "--target_path",
+            "{{ params.shards_path }}",
+            "--shard_size_mb",
+            "{{ params.shard_size_mb }}",
+            "--annotation_store",
+            "{{ params.annotation_store_path }}",
+            "--cache_dir",
+            "{{ params.cache_dir }}",
+            "--use_cache",
+            "{{ params.use_cache }}",
+        ],
+    }
 
     # 데이터 다운로드 태스크
     download_task = KubernetesPodOperator(
@@ -92,15 +318,26 @@ with DAG(
         namespace="{{ params.namespace }}",
         image="{{ params.image }}",
         cmds=["python"],
-        arguments=[
-            "{{ params.modules_dir }}/download_dataset.py",
-            "--dataset_url",
-            "{{ params.dataset_url }}",
-            "--target_path",
-            "{{ params.dataset_path }}",
-        ],
+        arguments=["{{ params.modules_dir }}/download_dataset.py"] + data_prep_arguments["download_dataset"],
         volumes=[work_dir_volume, dags_dir_volume],
         volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # 어노테이션 저장소 생성 태스크
+    build_annotation_store_task = KubernetesPodOperator(
+        task_id="build_annotation_store",
+        name="build-annotation-store",
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=["{{ params.modules_dir }}/build_annotation_store.py"] + data_prep_arguments["build_annotation_store"],
+        volumes=[work_dir_volume, dags_dir_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
         is_delete_operator_pod=True,
         in_cluster=True,
         get_logs=True,
@@ -113,13 +350,26 @@ with DAG(
         namespace="{{ params.namespace }}",
         image="{{ params.image }}",
         cmds=["python"],
-        arguments=[
-            "{{ params.modules_dir }}/validate_dataset.py",
-            "--data_path",
-            "{{ params.dataset_path }}",
-        ],
+        arguments=["{{ params.modules_dir }}/validate_dataset.py"] + data_prep_arguments["validate_dataset"],
+        volumes=[work_dir_volume, dags_dir_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # 근접 중복 이미지 탐지 태스크
+    dedup_task = KubernetesPodOperator(
+        task_id="dedup_dataset",
+        name="dedup-dataset",
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=["{{ params.modules_dir }}/dedup_dataset.py"] + data_prep_arguments["dedup_dataset"],
         volumes=[work_dir_volume, dags_dir_volume],
         volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
         is_delete_operator_pod=True,
         in_cluster=True,
         get_logs=True,
@@ -132,53 +382,149 @@ with DAG(
         namespace="{{ params.namespace }}",
         image="{{ params.image }}",
         cmds=["python"],
-        arguments=[
-            "{{ params.modules_dir }}/split_dataset.py",
-            "--data_path",
-            "{{ params.dataset_path }}",
-            "--target_path",
-            "{{ params.splits_path }}",
-            "--train_ratio",
-            "{{ params.train_ratio }}",
-            "--val_ratio",
-            "{{ params.val_ratio }}",
-            "--test_ratio",
-            "{{ params.test_ratio }}",
-        ],
+        arguments=["{{ params.modules_dir }}/split_dataset.py"] + data_prep_arguments["split_dataset"],
+        volumes=[work_dir_volume, dags_dir_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # 학습 이미지 축소 태스크
+    resize_images_task = KubernetesPodOperator(
+        task_id="resize_images",
+        name="resize-images",
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=["{{ params.modules_dir }}/resize_images.py"] + data_prep_arguments["resize_images"],
         volumes=[work_dir_volume, dags_dir_volume],
         volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
         is_delete_operator_pod=True,
         in_cluster=True,
         get_logs=True,
     )
 
     # 데이터 YAML 생성 태스크
+    # resize_images가 건너뛰어져도 choose_resize 분기가 성공하면 실행
     create_data_yaml_task = KubernetesPodOperator(
         task_id="create_data_yaml",
         name="create-data-yaml",
+        trigger_rule=TriggerRule.NONE_FAILED_MIN_ONE_SUCCESS,
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=["{{ params.modules_dir }}/create_data_yaml.py"] + data_prep_arguments["create_data_yaml"],
+        volumes=[work_dir_volume, dags_dir_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # 데이터셋 통계 프로파일링 태스크
+    profile_task = KubernetesPodOperator(
+        task_id="profile_dataset",
+        name="profile-dataset",
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=["{{ params.modules_dir }}/profile_dataset.py"] + data_prep_arguments["profile_dataset"],
+        volumes=[work_dir_volume, dags_dir_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # 데이터셋 shard 패킹 태스크
+    pack_shards_task = KubernetesPodOperator(
+        task_id="pack_shards",
+        name="pack-shards",
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=["{{ params.modules_dir }}/pack_shards.py"] + data_prep_arguments["pack_shards"],
+        volumes=[work_dir_volume, dags_dir_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # 이미지 축소 분기 태스크: use_resized가 False면 resize_images pod를 띄우지 않고 원본 split으로 data.yaml 생성
+    @task.branch(task_id="choose_resize")
+    def choose_resize(params=None):
+        return "resize_images" if params["use_resized"] else "create_data_yaml"
+
+    choose_resize_task = choose_resize()
+
+    # shard 패킹 분기 태스크: use_shards가 False면 pack_shards pod를 띄우지 않고 학습 방식 분기로 진행
+    @task.branch(task_id="choose_shard_packing")
+    def choose_shard_packing(params=None):
+        return "pack_shards" if params["use_shards"] else "choose_training_mode"
+
+    choose_shard_packing_task = choose_shard_packing()
+
+    # 데이터 준비 방식 분기 태스크: 스테이지별 pod / 하나의 pod에서 전체 스테이지 실행
+    @task.branch(task_id="choose_data_prep_mode")
+    def choose_data_prep_mode(params=None):
+        return "run_data_prep" if params["fused_data_prep"] else "download_dataset"
+
+    choose_data_prep_mode_task = choose_data_prep_mode()
+
+    # 데이터 준비 스테이지를 하나의 pod에서 실행하는 태스크 (스테이지별 결과와 소요 시간을 XCom으로 반환)
+    run_data_prep_task = KubernetesPodOperator(
+        task_id="run_data_prep",
+        name="run-data-prep",
         namespace="{{ params.namespace }}",
         image="{{ params.image }}",
         cmds=["python"],
         arguments=[
-            "{{ params.modules_dir }}/create_data_yaml.py",
-            "--train_path",
-            "{{ params.splits_path }}/train",
-            "--val_path",
-            "{{ params.splits_path }}/val",
-            "--test_path",
-            "{{ params.splits_path }}/test",
-            "--dataset_cfg_url",
-            "{{ params.dataset_cfg_url }}",
-            "--output_path",
-            "{{ params.splits_path }}/data.yaml",
+            "{{ params.modules_dir }}/run_data_prep.py",
+            "--skip_stages",
+            "{{ (([] if params.use_resized else ['resize_images'])"
+            " + ([] if params.use_shards else ['pack_shards'])) | join(',') }}",
+            "--xcom_path",
+            "/airflow/xcom/return.json",
+            # 렌더링된 값이 JSON 안에 들어가지 않도록 스테이지별 인자를 "-- <stage> 인자..." 형태의 개별 인자로 전달
+            *[token for name, argv in data_prep_arguments.items() for token in ["--", name, *argv]],
         ],
         volumes=[work_dir_volume, dags_dir_volume],
         volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount],
+        env_vars=metrics_env_vars,
+        do_xcom_push=True,
         is_delete_operator_pod=True,
         in_cluster=True,
         get_logs=True,
     )
 
+    # 학습 pod 리소스 (단일 학습과 sweep trial에서 공통으로 사용)
+    training_resources = k8s.V1ResourceRequirements(
+        requests={
+            "cpu": "1",
+            "memory": "4Gi",
+            "nvidia.com/gpu": "1",
+        },  # GPU가 있을 경우 nvidia.com/gpu 항목 추가
+        limits={
+            "cpu": "2",
+            "memory": "8Gi",
+            "nvidia.com/gpu": "1",
+        },  # GPU가 있을 경우 nvidia.com/gpu 항목 추가
+    )
+
+    # 단일 학습 / 하이퍼파라미터 sweep 분기 태스크 (데이터 준비 방식 중 실행된 쪽이 성공하면 실행)
+    @task.branch(task_id="choose_training_mode", trigger_rule=TriggerRule.NONE_FAILED_MIN_ONE_SUCCESS)
+    def choose_training_mode(params=None):
+        return "generate_sweep_trials" if params["sweep_enabled"] else "train_yolo"
+
+    choose_training_mode_task = choose_training_mode()
+
     # YOLO 모델 학습 태스크
     train_yolo_task = KubernetesPodOperator(
         task_id="train_yolo",
@@ -200,30 +546,164 @@ with DAG(
             "{{ params.run_name }}",
             "--force_register",
             "{{ params.force_register }}",
+            "--max_latency_ms",
+            "{{ params.max_latency_ms }}",
+            "--max_latency_regression",
+            "{{ params.max_latency_regression }}",
+            "--min_map_delta",
+            "{{ params.min_map_delta }}",
+            "--export_variants",
+            "{{ params.export_variants }}",
+            "--static_batch_sizes",
+            "{{ params.static_batch_sizes }}",
+            "--int8_mode",
+            "{{ params.int8_mode }}",
+            "--variant_map_budget",
+            "{{ params.variant_map_budget }}",
+            "--shards_path",
+            "{{ params.shards_path if params.use_shards else '' }}",
+            "--profile_path",
+            "{{ params.profile_path }}/profile.json",
         ],
         volumes=[work_dir_volume, dags_dir_volume, shm_volume],
         volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount, shm_volume_mount],
         env_vars=env_vars,
-        container_resources=k8s.V1ResourceRequirements(
-            requests={
-                "cpu": "1",
-                "memory": "4Gi",
-                "nvidia.com/gpu": "1",
-            },  # GPU가 있을 경우 nvidia.com/gpu 항목 추가
-            limits={
-                "cpu": "2",
-                "memory": "8Gi",
-                "nvidia.com/gpu": "1",
-            },  # GPU가 있을 경우 nvidia.com/gpu 항목 추가
-        ),
+        container_resources=training_resources,
+        is_delete_operator_pod=True,
+        in_cluster=True,
+        get_logs=True,
+    )
+
+    # sweep trial 생성 태스크: 탐색 공간의 조합 중 sweep_num_trials개를 샘플링
+    @task(task_id="generate_sweep_trials")
+    def generate_sweep_trials(params=None, run_id=None):
+        space = params["sweep_space"]
+        keys = sorted(space)
+        combinations = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+        if len(combinations) > params["sweep_num_trials"]:
+            combinations = random.Random(params["sweep_seed"]).sample(combinations, params["sweep_num_trials"])
+        print(f"sweep trial {len(combinations)}개 생성: {combinations}")
+        return [
+            sweep_trial_arguments(params, run_id, f"trial-{idx:03d}", trial_params, 0, "yolo11n.pt")
+            for idx, trial_params in enumerate(combinations)
+        ]
+
+    # successive halving 태스크: rung 결과 중 상위 trial만 다음 rung 인자로 넘김
+    # 일부 trial pod가 실패해도 나머지 결과로 진행하도록 ALL_DONE으로 실행
+    @task(trigger_rule=TriggerRule.ALL_DONE)
+    def select_sweep_trials(rung, params=None, run_id=None, ti=None):
+        if not params["sweep_enabled"]:
+            raise AirflowSkipException("sweep 모드가 아니므로 건너뜁니다.")
+
+        results = [result for result in ti.xcom_pull(task_ids=f"sweep_rung_{rung}") or [] if result]
+        num_rungs = min(len(params["sweep_rung_epochs"]), SWEEP_MAX_RUNGS)
+        if not results or rung + 1 >= num_rungs:
+            return []
+
+        results.sort(key=lambda result: result["map"], reverse=True)
+        num_survivors = max(1, math.ceil(len(results) / params["sweep_reduction_factor"]))
+        survivors = results[:num_survivors]
+        print(f"rung {rung}: trial {len(results)}개 중 {[result['trial_id'] for result in survivors]} 선택")
+        return [
+            sweep_trial_arguments(params, run_id, result["trial_id"], result["params"], rung + 1, result["weights"])
+            for result in survivors
+        ]
+
+    # 가장 마지막 rung까지 학습된 trial 중 mAP50-95가 가장 높은 trial 선택
+    @task(task_id="pick_best_sweep_trial", trigger_rule=TriggerRule.ALL_DONE)
+    def pick_best_sweep_trial(params=None, ti=None):
+        if not params["sweep_enabled"]:
+            raise AirflowSkipException("sweep 모드가 아니므로 건너뜁니다.")
+
+        for rung in reversed(range(SWEEP_MAX_RUNGS)):
+            results = [result for result in ti.xcom_pull(task_ids=f"sweep_rung_{rung}") or [] if result]
+            if results:
+                best = max(results, key=lambda result: result["map"])
+                print(f"최고 trial: {best['trial_id']} (rung {rung}, mAP50-95: {best['map']:.4f}, {best['params']})")
+                return best
+        raise AirflowException("완료된 sweep trial이 없습니다.")
+
+    # sweep trial 학습 태스크: rung마다 trial 수만큼 학습 pod를 동적으로 생성 (동시 실행 수는 SWEEP_MAX_CONCURRENCY로 제한)
+    sweep_trial_arguments_list = generate_sweep_trials()
+    choose_training_mode_task >> sweep_trial_arguments_list
+    for rung in range(SWEEP_MAX_RUNGS):
+        sweep_rung_task = KubernetesPodOperator.partial(
+            task_id=f"sweep_rung_{rung}",
+            name=f"sweep-rung-{rung}",
+            namespace="{{ params.namespace }}",
+            image="{{ params.image }}",
+            cmds=["python"],
+            volumes=[work_dir_volume, dags_dir_volume, shm_volume],
+            volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount, shm_volume_mount],
+            env_vars=env_vars,
+            container_resources=training_resources,
+            do_xcom_push=True,
+            max_active_tis_per_dagrun=SWEEP_MAX_CONCURRENCY,
+            is_delete_operator_pod=True,
+            in_cluster=True,
+            get_logs=True,
+        ).expand(arguments=sweep_trial_arguments_list)
+        sweep_trial_arguments_list = select_sweep_trials.override(task_id=f"select_sweep_rung_{rung}")(rung)
+        sweep_rung_task >> sweep_trial_arguments_list
+
+    pick_best_sweep_trial_task = pick_best_sweep_trial()
+    sweep_trial_arguments_list >> pick_best_sweep_trial_task
+
+    # sweep 최고 trial의 가중치를 검증 후 등록 기준에 따라 등록하는 태스크
+    register_best_task = KubernetesPodOperator(
+        task_id="register_best_sweep_trial",
+        name="register-best-sweep-trial",
+        namespace="{{ params.namespace }}",
+        image="{{ params.image }}",
+        cmds=["python"],
+        arguments=[
+            "{{ params.modules_dir }}/train_yolo.py",
+            "--data_yaml_path",
+            "{{ params.splits_path }}/data.yaml",
+            "--register_only",
+            "True",
+            "--model_path",
+            "{{ ti.xcom_pull(task_ids='pick_best_sweep_trial')['weights'] }}",
+            "--img_size",
+            "{{ ti.xcom_pull(task_ids='pick_best_sweep_trial')['params']['img_size'] }}",
+            "--run_name",
+            "{{ params.run_name }}",
+            "--force_register",
+            "{{ params.force_register }}",
+            "--max_latency_ms",
+            "{{ params.max_latency_ms }}",
+            "--max_latency_regression",
+            "{{ params.max_latency_regression }}",
+            "--min_map_delta",
+            "{{ params.min_map_delta }}",
+            "--export_variants",
+            "{{ params.export_variants }}",
+            "--static_batch_sizes",
+            "{{ params.static_batch_sizes }}",
+            "--int8_mode",
+            "{{ params.int8_mode }}",
+            "--variant_map_budget",
+            "{{ params.variant_map_budget }}",
+            "--shards_path",
+            "{{ params.shards_path if params.use_shards else '' }}",
+            "--profile_path",
+            "{{ params.profile_path }}/profile.json",
+        ],
+        volumes=[work_dir_volume, dags_dir_volume, shm_volume],
+        volume_mounts=[work_dir_volume_mount, dags_dir_volume_mount, shm_volume_mount],
+        env_vars=env_vars,
+        container_resources=training_resources,
         is_delete_operator_pod=True,
         in_cluster=True,
         get_logs=True,
     )
+    pick_best_sweep_trial_task >> register_best_task
 
+    # 단일 학습과 sweep 중 실행된 쪽이 성공하면 실행
     update_triton_config_task = KubernetesPodOperator(
         task_id="update_triton_config",
         name="update-triton-config",
+        trigger_rule=TriggerRule.NONE_FAILED_MIN_ONE_SUCCESS,
         namespace="{{ params.namespace }}",
         image="{{ params.image }}",
         cmds=["python"],
@@ -233,6 +713,8 @@ with DAG(
             "{{ params.run_name }}",
             "--branch",
             "{{ params.git_branch }}",
+            "--mirror_dir",
+            "{{ params.git_mirror_dir }}",
             "--configure_git",
         ],
         volumes=[work_dir_volume, dags_dir_volume],
@@ -244,13 +726,26 @@ with DAG(
     )
 
     (
-        download_task
+        choose_data_prep_mode_task
+        >> download_task
+        >> build_annotation_store_task
         >> validate_task
+        >> dedup_task
         >> split_task
+        >> choose_resize_task
+        >> resize_images_task
         >> create_data_yaml_task
+        >> profile_task
+        >> choose_shard_packing_task
+        >> pack_shards_task
+        >> choose_training_mode_task
         >> train_yolo_task
         >> update_triton_config_task
     )
+    choose_data_prep_mode_task >> run_data_prep_task >> choose_training_mode_task
+    choose_resize_task >> create_data_yaml_task
+    choose_shard_packing_task >> choose_training_mode_task
+    register_best_task >> update_triton_config_task
 
 if __name__ == "__main__":
     dag.test()
@@ -19,18 +19,50 @@ with DAG(
         "dataset_url": "https://github.com/ultralytics/assets/releases/download/v0.0.0/coco128.zip",
         "dataset_cfg_url": "https://raw.githubusercontent.com/ultralytics/ultralytics/main/ultralytics/cfg/datasets/coco128.yaml",
         "dataset_path": os.path.join(WORK_DIR, "raw"),
+        # 어노테이션 저장소 경로 (라벨을 한 번만 파싱해 검증/분할 스테이지가 공유)
+        "annotation_store_path": os.path.join(WORK_DIR, "annotations"),
+        # 근접 중복 탐지 파라미터 (report: cluster를 같은 split에 유지, remove: cluster마다 하나만 사용)
+        "dedup_path": os.path.join(WORK_DIR, "dedup"),
+        "dedup_hash_type": "phash",
+        "dedup_radius": 4,
+        "dedup_action": "report",
         # 데이터셋 Split에 필요한 파라미터
         "splits_path": os.path.join(WORK_DIR, "splits"),
         "train_ratio": 0.7,
         "val_ratio": 0.2,
         "test_ratio": 0.1,
+        # 학습 이미지 축소 파라미터 (use_resized가 True면 img_size로 미리 축소한 이미지로 학습)
+        "resized_path": os.path.join(WORK_DIR, "resized"),
+        "use_resized": True,
+        "resize_image_format": "jpg",
+        "resize_quality": 95,
+        # 데이터셋 프로파일 저장 경로 (학습 시 MLflow에 통계가 기록됨)
+        "profile_path": os.path.join(WORK_DIR, "profile"),
+        # shard 패킹 파라미터 (use_shards가 True면 학습 시 shard를 로컬 디스크에 풀어서 사용)
+        "shards_path": os.path.join(WORK_DIR, "shards"),
+        "shard_size_mb": 256,
+        "use_shards": False,
+        # 스테이지 캐시 파라미터 (입력과 파라미터가 같으면 이전 결과를 재사용)
+        "cache_dir": os.path.join(WORK_DIR, ".stage_cache"),
+        "use_cache": True,
         # YOLO 학습 DAG에 필요한 파라미터
         "epochs": 1,
         "batch_size": 16,
         "img_size": 640,
         "run_name": "yolo11n-onnx",
         "force_register": False,
-        # 모델 버전 등 정보를 업데이트할 git 정보
+        # 모델 등록 기준 (ONNX CPU 벤치마크의 batch 1 p95 지연 시간과 mAP50-95 비교)
+        "max_latency_ms": 0.0,
+        "max_latency_regression": 0.1,
+        "min_map_delta": 0.0,
+        # 최적화된 ONNX variant(static shape, INT8) 생성 및 등록 파라미터
+        # (INT8 calibration, variant별 검증과 추가 registry 버전이 학습마다 생기므로 필요할 때만 True로 설정)
+        "export_variants": False,
+        "static_batch_sizes": "1,8",
+        "int8_mode": "static",
+        "variant_map_budget": 0.01,
+        # 모델 버전 등 정보를 업데이트할 git 정보 (git_mirror_dir에 bare mirror를 유지해 실행마다 증분 fetch)
+        "git_mirror_dir": os.path.join(WORK_DIR, "git-mirror"),
         "git_branch": "main",
         # modules 디렉토리 경로
         "modules_dir": MODULES_DIR,
@@ -41,13 +73,40 @@ with DAG(
         task_id="download_dataset",
         bash_command="python {{ params.modules_dir }}/download_dataset.py \
             --dataset_url {{ params.dataset_url }} \
-            --target_path {{ params.dataset_path }}",
+            --target_path {{ params.dataset_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
+    )
+
+    build_annotation_store_task = BashOperator(
+        task_id="build_annotation_store",
+        bash_command="python {{ params.modules_dir }}/build_annotation_store.py \
+            --data_path {{ params.dataset_path }} \
+            --target_path {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
     )
 
     validate_task = BashOperator(
         task_id="validate_dataset",
         bash_command="python {{ params.modules_dir }}/validate_dataset.py \
-            --data_path {{ params.dataset_path }}",
+            --data_path {{ params.dataset_path }} \
+            --annotation_store {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
+    )
+
+    dedup_task = BashOperator(
+        task_id="dedup_dataset",
+        bash_command="python {{ params.modules_dir }}/dedup_dataset.py \
+            --data_path {{ params.dataset_path }} \
+            --target_path {{ params.dedup_path }} \
+            --hash_type {{ params.dedup_hash_type }} \
+            --radius {{ params.dedup_radius }} \
+            --action {{ params.dedup_action }} \
+            --annotation_store {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
     )
 
     split_task = BashOperator(
@@ -57,17 +116,57 @@ with DAG(
             --target_path {{ params.splits_path }} \
             --train_ratio {{ params.train_ratio }} \
             --val_ratio {{ params.val_ratio }} \
-            --test_ratio {{ params.test_ratio }}",
+            --test_ratio {{ params.test_ratio }} \
+            --duplicates_path {{ params.dedup_path }}/duplicates.json \
+            --annotation_store {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
+    )
+
+    resize_images_task = BashOperator(
+        task_id="resize_images",
+        bash_command="{% if params.use_resized %}python {{ params.modules_dir }}/resize_images.py \
+            --splits_path {{ params.splits_path }} \
+            --target_path {{ params.resized_path }} \
+            --img_size {{ params.img_size }} \
+            --image_format {{ params.resize_image_format }} \
+            --quality {{ params.resize_quality }} \
+            --annotation_store {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}{% else %}echo 'use_resized=False: 이미지 축소를 건너뜁니다.'{% endif %}",
     )
 
     create_data_yaml_task = BashOperator(
         task_id="create_data_yaml",
         bash_command="python {{ params.modules_dir }}/create_data_yaml.py \
-            --train_path {{ params.splits_path }}/train \
-            --val_path {{ params.splits_path }}/val \
-            --test_path {{ params.splits_path }}/test \
+            --train_path {{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}/train \
+            --val_path {{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}/val \
+            --test_path {{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }}/test \
             --dataset_cfg_url {{ params.dataset_cfg_url }} \
-            --output_path {{ params.splits_path }}/data.yaml",
+            --output_path {{ params.splits_path }}/data.yaml \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
+    )
+
+    profile_task = BashOperator(
+        task_id="profile_dataset",
+        bash_command="python {{ params.modules_dir }}/profile_dataset.py \
+            --splits_path {{ params.splits_path }} \
+            --target_path {{ params.profile_path }} \
+            --annotation_store {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}",
+    )
+
+    pack_shards_task = BashOperator(
+        task_id="pack_shards",
+        bash_command="{% if params.use_shards %}python {{ params.modules_dir }}/pack_shards.py \
+            --splits_path {{ params.resized_path ~ '/' ~ params.img_size if params.use_resized else params.splits_path }} \
+            --target_path {{ params.shards_path }} \
+            --shard_size_mb {{ params.shard_size_mb }} \
+            --annotation_store {{ params.annotation_store_path }} \
+            --cache_dir {{ params.cache_dir }} \
+            --use_cache {{ params.use_cache }}{% else %}echo 'use_shards=False: shard 패킹을 건너뜁니다.'{% endif %}",
     )
 
     train_yolo_task = BashOperator(
@@ -78,21 +177,36 @@ with DAG(
             --batch_size {{ params.batch_size }} \
             --img_size {{ params.img_size }} \
             --run_name {{ params.run_name }} \
-            --force_register {{ params.force_register }}",
+            --force_register {{ params.force_register }} \
+            --max_latency_ms {{ params.max_latency_ms }} \
+            --max_latency_regression {{ params.max_latency_regression }} \
+            --min_map_delta {{ params.min_map_delta }} \
+            --export_variants {{ params.export_variants }} \
+            --static_batch_sizes {{ params.static_batch_sizes }} \
+            --int8_mode {{ params.int8_mode }} \
+            --variant_map_budget {{ params.variant_map_budget }} \
+            --profile_path {{ params.profile_path }}/profile.json \
+            {% if params.use_shards %}--shards_path {{ params.shards_path }}{% endif %}",
     )
 
     update_triton_config_task = BashOperator(
         task_id="update_triton_config",
         bash_command="python {{ params.modules_dir }}/update_triton_config.py \
             --model_name {{ params.run_name }} \
-            --branch {{ params.git_branch }}",
+            --branch {{ params.git_branch }} \
+            --mirror_dir {{ params.git_mirror_dir }}",
     )
 
     (
         download_task
+        >> build_annotation_store_task
         >> validate_task
+        >> dedup_task
         >> split_task
+        >> resize_images_task
         >> create_data_yaml_task
+        >> profile_task
+        >> pack_shards_task
         >> train_yolo_task
         >> update_triton_config_task
     )
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import time
+
+import numpy as np
+import onnxruntime as ort
+
+DEFAULT_BATCH_SIZES = [1, 4, 8]
+PERCENTILES = [50, 95, 99]
+
+
+def create_session(onnx_path, num_threads=None):
+    """CPU 실행 provider로 onnxruntime 세션을 생성합니다."""
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    return ort.InferenceSession(str(onnx_path), sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def _input_shape(session_input, batch_size, img_size):
+    """dynamic 축(문자열 또는 None)은 batch_size/img_size로 채워서 실제 입력 shape를 만듭니다."""
+    shape = []
+    for axis, dim in enumerate(session_input.shape):
+        if isinstance(dim, int):
+            shape.append(dim)
+        elif axis == 0:
+            shape.append(batch_size)
+        else:
+            shape.append(img_size)
+    return shape
+
+
+def benchmark_batch(session, batch_size, img_size=640, warmup=10, iterations=50):
+    """하나의 배치 크기에 대해 warm-up 후 지연 시간 분포와 처리량을 측정합니다."""
+    session_input = session.get_inputs()[0]
+    shape = _input_shape(session_input, batch_size, img_size)
+    if shape[0] != batch_size:
+        raise ValueError(f"모델 입력의 배치 크기가 고정되어 있습니다: {session_input.shape}")
+    inputs = {session_input.name: np.random.rand(*shape).astype(np.float32)}
+
+    # 첫 몇 번의 실행은 메모리 할당과 커널 선택 비용이 포함되므로 측정에서 제외
+    for _ in range(warmup):
+        session.run(None, inputs)
+
+    latencies = np.empty(iterations, dtype=np.float64)
+    for idx in range(iterations):
+        start = time.perf_counter()
+        session.run(None, inputs)
+        latencies[idx] = time.perf_counter() - start
+
+    latencies_ms = latencies * 1000
+    result = {f"p{q}_ms": float(np.percentile(latencies_ms, q)) for q in PERCENTILES}
+    result["mean_ms"] = float(latencies_ms.mean())
+    result["throughput"] = float(batch_size * iterations / latencies.sum())
+    return result
+
+
+def benchmark_onnx(onnx_path, img_size=640, batch_sizes=None, warmup=10, iterations=50, num_threads=None):
+    """
+    ONNX 모델 CPU 추론 벤치마크
+    onnxruntime으로 모델을 불러와 배치 크기별로 p50/p95/p99 지연 시간(ms)과 처리량(이미지/초)을 측정합니다.
+    """
+    batch_sizes = batch_sizes or DEFAULT_BATCH_SIZES
+    print(f"ONNX 추론 벤치마크 중: {onnx_path} (배치 크기: {batch_sizes}, 반복: {iterations}회)")
+
+    session = create_session(onnx_path, num_threads)
+    results = {}
+    for batch_size in batch_sizes:
+        results[batch_size] = benchmark_batch(session, batch_size, img_size, warmup, iterations)
+        print(
+            f"batch {batch_size}: p50 {results[batch_size]['p50_ms']:.2f}ms, "
+            f"p95 {results[batch_size]['p95_ms']:.2f}ms, p99 {results[batch_size]['p99_ms']:.2f}ms, "
+            f"처리량 {results[batch_size]['throughput']:.1f} img/s"
+        )
+    return results
+
+
+def summarize_benchmark(results):
+    """벤치마크 결과를 MLflow metric 이름(latency_b{배치}_p95_ms 등)으로 평탄화합니다."""
+    metrics = {}
+    for batch_size, result in results.items():
+        for name, value in result.items():
+            if name == "throughput":
+                metrics[f"throughput_b{batch_size}"] = value
+            else:
+                metrics[f"latency_b{batch_size}_{name}"] = value
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX 모델 CPU 추론 벤치마크")
+    parser.add_argument("--onnx_path", type=str, required=True, help="ONNX 모델 경로")
+    parser.add_argument("--img_size", type=int, default=640, help="입력 이미지 크기")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES, help="측정할 배치 크기")
+    parser.add_argument("--warmup", type=int, default=10, help="warm-up 실행 횟수")
+    parser.add_argument("--iterations", type=int, default=50, help="측정 실행 횟수")
+    parser.add_argument("--num_threads", type=int, default=None, help="onnxruntime intra-op 스레드 수")
+
+    args = parser.parse_args()
+
+    results = benchmark_onnx(
+        args.onnx_path, args.img_size, args.batch_sizes, args.warmup, args.iterations, args.num_threads
+    )
+    print(json.dumps(summarize_benchmark(results), indent=2))
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from stage_cache import (
+    add_cache_arguments,
+    build_manifest,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "build_annotation_store"
+STORE_VERSION = 2
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+IGNORED_LABEL_FILES = ["README.txt", "LICENSE"]
+META_FILENAME = "meta.json"
+# split 결과 디렉토리에 기록하는 split별 저장소 image_id 목록
+SPLIT_INDEX_FILENAME = "annotation_index.json"
+
+# 이미지 manifest 컬럼 (이미지 한 장당 한 행)
+IMAGE_COLUMNS = {
+    "path": None,  # data_path 기준 상대 경로 (문자열)
+    "label_path": None,  # data_path 기준 상대 경로, 라벨이 없으면 빈 문자열
+    "file_size": np.int64,
+    "mtime_ns": np.int64,
+    "label_size": np.int64,
+    "label_mtime_ns": np.int64,
+    "width": np.int32,
+    "height": np.int32,
+    "sha1": None,  # 40자리 hex 문자열
+    "label_start": np.int64,  # labels 컬럼에서 이 이미지의 첫 행 위치
+    "label_count": np.int32,
+    "invalid_label_lines": np.int32,  # 파싱할 수 없어 제외한 라벨 행 수
+}
+# 라벨 컬럼 (박스 하나당 한 행, image_id 순서로 정렬)
+LABEL_COLUMNS = {
+    "image_id": np.int32,
+    "class_id": np.int32,
+    "cx": np.float32,
+    "cy": np.float32,
+    "w": np.float32,
+    "h": np.float32,
+}
+
+
+def scan_files(data_path):
+    """data_path를 한 번만 순회하며 이미지 목록과 stem -> 라벨 경로 매핑을 만듭니다."""
+    images = []
+    labels = {}
+    stack = [str(data_path)]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                stem, suffix = os.path.splitext(entry.name)
+                stat = entry.stat()
+                if suffix.lower() in IMAGE_EXTENSIONS:
+                    images.append((os.path.relpath(entry.path, data_path), stat.st_size, stat.st_mtime_ns))
+                elif suffix == ".txt" and entry.name not in IGNORED_LABEL_FILES:
+                    # 동일한 stem의 라벨이 여러 개면 처음 발견된 라벨 사용 (validate_dataset과 동일한 규칙)
+                    labels.setdefault(stem, (os.path.relpath(entry.path, data_path), stat.st_size, stat.st_mtime_ns))
+    images.sort()
+    return images, labels
+
+
+def parse_label_file(label_path):
+    """
+    YOLO 라벨 파일을 (class_id, cx, cy, w, h) 행 목록으로 파싱합니다. segmentation polygon은 외접 사각형으로 변환.
+    (행 목록, 파싱할 수 없는 행 수)를 반환합니다.
+    """
+    rows = []
+    invalid = 0
+    with open(label_path, "r", encoding="utf-8") as f:
+        for line in f:
+            values = line.split()
+            if not values:
+                continue
+            try:
+                class_id = int(values[0])
+                coords = [float(v) for v in values[1:]]
+            except ValueError:
+                invalid += 1
+                continue
+            if len(coords) == 4:
+                rows.append((class_id, *coords))
+            elif len(coords) >= 6 and len(coords) % 2 == 0:
+                xs, ys = coords[0::2], coords[1::2]
+                rows.append(
+                    (class_id, (max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2, max(xs) - min(xs), max(ys) - min(ys))
+                )
+            else:
+                invalid += 1
+    return rows, invalid
+
+
+def process_image(args):
+    """이미지 하나의 크기, 해시, 라벨을 계산합니다 (프로세스 풀에서 실행)."""
+    data_path, image_rel_path, label_rel_path = args
+    image_path = os.path.join(data_path, image_rel_path)
+
+    sha1 = hashlib.sha1()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(chunk)
+
+    # PIL은 헤더만 읽어서 크기를 알려주므로 전체 디코딩 비용이 들지 않음
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+    except OSError:
+        width, height = -1, -1
+
+    rows, invalid = parse_label_file(os.path.join(data_path, label_rel_path)) if label_rel_path else ([], 0)
+    return width, height, sha1.hexdigest(), rows, invalid
+
+
+class AnnotationStore:
+    """
+    컬럼 단위로 저장된 어노테이션 저장소
+    컬럼마다 .npy 파일 하나로 저장하므로 np.load(mmap_mode="r")로 필요한 컬럼만 메모리 매핑해서 읽을 수 있습니다.
+    """
+
+    def __init__(self, store_path, mmap=True):
+        self.path = Path(store_path)
+        with open(self.path / META_FILENAME, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        self.images = {
+            name: np.load(self.path / "images" / f"{name}.npy", mmap_mode=mmap_mode) for name in IMAGE_COLUMNS
+        }
+        self.labels = {
+            name: np.load(self.path / "labels" / f"{name}.npy", mmap_mode=mmap_mode) for name in LABEL_COLUMNS
+        }
+
+    @property
+    def data_path(self):
+        return Path(self.meta["data_path"])
+
+    def __len__(self):
+        return len(self.images["path"])
+
+    def image_path(self, image_id):
+        return self.data_path / str(self.images["path"][image_id])
+
+    def label_path(self, image_id):
+        label_path = str(self.images["label_path"][image_id])
+        return self.data_path / label_path if label_path else None
+
+    def labels_for(self, image_id):
+        """이미지 하나의 라벨 행을 (N, 5) 배열 [class_id, cx, cy, w, h]로 반환합니다."""
+        start = int(self.images["label_start"][image_id])
+        end = start + int(self.images["label_count"][image_id])
+        return np.stack(
+            [self.labels["class_id"][start:end].astype(np.float32)]
+            + [self.labels[name][start:end] for name in ["cx", "cy", "w", "h"]],
+            axis=1,
+        )
+
+
+def load_annotation_store(store_path, mmap=True):
+    """build_annotation_store 스테이지가 만든 저장소를 엽니다."""
+    return AnnotationStore(store_path, mmap=mmap)
+
+
+def save_split_index(splits_path, store, splits):
+    """
+    split 결과 디렉토리에 split별 샘플 목록을 기록합니다.
+    splits는 split 이름 -> [{"image_id", "image": split images 디렉토리의 파일 이름, "size": 파일 크기(선택)}] 딕셔너리이며,
+    size가 없으면 저장소의 원본 파일 크기를 사용합니다. (이미지를 다시 인코딩한 경우에만 기록)
+    """
+    index = {"data_path": store.meta["data_path"], "num_images": len(store), "splits": splits}
+    with open(Path(splits_path) / SPLIT_INDEX_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+
+def split_cache_inputs(splits_path, annotation_store, splits):
+    """
+    split 결과를 읽는 스테이지의 캐시 입력 경로와 처리할 샘플 수
+    저장소 index가 있으면 split 결과는 저장소와 index로 결정되므로 split 디렉토리를 순회하지 않고 두 경로만 사용합니다.
+    (index가 없으면 split 디렉토리 목록과 None을 반환)
+    """
+    index_path = Path(splits_path) / SPLIT_INDEX_FILENAME
+    if not annotation_store or not index_path.exists():
+        return [Path(splits_path) / split for split in splits], None
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return [Path(annotation_store), index_path], sum(len(entries) for entries in index["splits"].values())
+
+
+def load_split_index(splits_path, store):
+    """
+    save_split_index로 기록한 split별 샘플 목록을 저장소의 크기, 해시, 라벨 정보와 합쳐서 반환합니다.
+    profile, resize, pack 스테이지는 이 목록을 사용해 split 디렉토리를 다시 순회하지 않습니다.
+    index가 없거나 저장소와 맞지 않으면(저장소가 다시 만들어진 경우 등) None을 반환합니다.
+    """
+    index_path = Path(splits_path) / SPLIT_INDEX_FILENAME
+    if not index_path.exists():
+        return None
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("data_path") != store.meta["data_path"] or index.get("num_images") != len(store):
+        return None
+
+    samples = {}
+    for split, entries in index["splits"].items():
+        labels_path = Path(splits_path) / split / "labels"
+        split_samples = []
+        for entry in entries:
+            image_id = entry["image_id"]
+            key = Path(entry["image"]).stem
+            if Path(str(store.images["path"][image_id])).stem != key:
+                return None
+            has_label = bool(str(store.images["label_path"][image_id]))
+            split_samples.append(
+                {
+                    "image_id": image_id,
+                    "key": key,
+                    "image_path": str(Path(splits_path) / split / "images" / entry["image"]),
+                    "label_path": str(labels_path / f"{key}.txt") if has_label else None,
+                    "image_size": entry.get("size", int(store.images["file_size"][image_id])),
+                    "label_size": int(store.images["label_size"][image_id]) if has_label else 0,
+                    # 다시 인코딩된 이미지는 원본과 내용이 다르므로 해시를 사용하지 않음
+                    "sha1": str(store.images["sha1"][image_id]) if "size" not in entry else None,
+                }
+            )
+        samples[split] = split_samples
+    return samples
+
+
+def _load_previous(store_path, data_path):
+    """증분 업데이트를 위해 기존 저장소를 상대 경로 -> (이미지 행, 라벨 행) 매핑으로 읽습니다."""
+    if not (Path(store_path) / META_FILENAME).exists():
+        return {}
+    try:
+        store = load_annotation_store(store_path, mmap=False)
+    except (OSError, ValueError, KeyError):
+        return {}
+    if store.meta.get("version") != STORE_VERSION or store.meta.get("data_path") != str(data_path):
+        return {}
+
+    previous = {}
+    for image_id in range(len(store)):
+        row = {name: store.images[name][image_id] for name in IMAGE_COLUMNS}
+        previous[str(row["path"])] = (row, store.labels_for(image_id))
+    return previous
+
+
+def build_annotation_store(data_path, target_path, num_workers=None, incremental=True):
+    """
+    어노테이션 저장소 생성
+    모든 YOLO 라벨을 한 번만 파싱해 컬럼 파일로 저장하고, 이미지 크기와 해시를 담은 manifest를 함께 만듭니다.
+    incremental이면 크기와 수정 시각이 바뀌지 않은 이미지/라벨은 기존 저장소의 값을 재사용합니다.
+    """
+    data_path = Path(data_path).absolute()
+    target_path = Path(target_path)
+    print(f"어노테이션 저장소 생성 중: {data_path} -> {target_path}")
+
+    images, labels = scan_files(data_path)
+    previous = _load_previous(target_path, data_path) if incremental else {}
+
+    entries = []
+    to_process = []
+    for image_rel_path, file_size, mtime_ns in images:
+        stem = Path(image_rel_path).stem
+        label_rel_path, label_size, label_mtime_ns = labels.get(stem, ("", 0, 0))
+        entry = {
+            "path": image_rel_path,
+            "label_path": label_rel_path,
+            "file_size": file_size,
+            "mtime_ns": mtime_ns,
+            "label_size": label_size,
+            "label_mtime_ns": label_mtime_ns,
+        }
+        cached = previous.get(image_rel_path)
+        if cached is not None:
+            row, label_rows = cached
+            unchanged = all(
+                row[name] == entry[name]
+                for name in ["label_path", "file_size", "mtime_ns", "label_size", "label_mtime_ns"]
+            )
+            if unchanged:
+                entry.update(
+                    width=int(row["width"]),
+                    height=int(row["height"]),
+                    sha1=str(row["sha1"]),
+                    invalid_label_lines=int(row["invalid_label_lines"]),
+                )
+                entry["rows"] = [tuple(r) for r in label_rows.tolist()]
+                entries.append(entry)
+                continue
+        to_process.append(len(entries))
+        entries.append(entry)
+
+    print(f"이미지 {len(entries)}개 (재사용: {len(entries) - len(to_process)}개, 새로 처리: {len(to_process)}개)")
+    if to_process:
+        tasks = [(str(data_path), entries[idx]["path"], entries[idx]["label_path"]) for idx in to_process]
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            for idx, (width, height, sha1, rows, invalid) in zip(
+                to_process, executor.map(process_image, tasks, chunksize=256)
+            ):
+                entries[idx].update(width=width, height=height, sha1=sha1, rows=rows, invalid_label_lines=invalid)
+
+    # 컬럼 배열 구성
+    label_counts = np.array([len(entry["rows"]) for entry in entries], dtype=np.int32)
+    label_starts = np.concatenate([[0], np.cumsum(label_counts, dtype=np.int64)[:-1]]) if entries else np.zeros(0)
+    image_columns = {
+        "path": np.array([entry["path"] for entry in entries], dtype=str),
+        "label_path": np.array([entry["label_path"] for entry in entries], dtype=str),
+        "sha1": np.array([entry["sha1"] for entry in entries], dtype="<U40"),
+        "label_start": label_starts.astype(np.int64),
+        "label_count": label_counts,
+    }
+    for name in ["file_size", "mtime_ns", "label_size", "label_mtime_ns", "width", "height", "invalid_label_lines"]:
+        image_columns[name] = np.array([entry[name] for entry in entries], dtype=IMAGE_COLUMNS[name])
+
+    all_rows = [row for entry in entries for row in entry["rows"]]
+    rows_array = np.array(all_rows, dtype=np.float64).reshape(-1, 5)
+    label_columns = {
+        "image_id": np.repeat(np.arange(len(entries), dtype=np.int32), label_counts),
+        "class_id": rows_array[:, 0].astype(np.int32),
+        "cx": rows_array[:, 1].astype(np.float32),
+        "cy": rows_array[:, 2].astype(np.float32),
+        "w": rows_array[:, 3].astype(np.float32),
+        "h": rows_array[:, 4].astype(np.float32),
+    }
+
+    # 임시 디렉토리에 모두 쓴 뒤 교체해서 읽는 쪽이 반쯤 쓰인 저장소를 보지 않도록 함
+    tmp_path = target_path.with_name(target_path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    (tmp_path / "images").mkdir(parents=True)
+    (tmp_path / "labels").mkdir(parents=True)
+    for name, column in image_columns.items():
+        np.save(tmp_path / "images" / f"{name}.npy", column)
+    for name, column in label_columns.items():
+        np.save(tmp_path / "labels" / f"{name}.npy", column)
+
+    meta = {
+        "version": STORE_VERSION,
+        "data_path": str(data_path),
+        "num_images": len(entries),
+        "num_labeled_images": int((image_columns["label_path"] != "").sum()) if entries else 0,
+        "num_instances": len(all_rows),
+    }
+    with open(tmp_path / META_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(target_path, ignore_errors=True)
+    os.replace(tmp_path, target_path)
+
+    print(f"어노테이션 저장소 생성 완료: 이미지 {meta['num_images']}개, 객체 {meta['num_instances']}개")
+    return str(target_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="YOLO 라벨을 컬럼 단위 어노테이션 저장소로 변환")
+    parser.add_argument("--data_path", type=str, help="원본 데이터셋 경로", default="./data/raw")
+    parser.add_argument("--target_path", type=str, help="어노테이션 저장소 경로", default="./data/annotations")
+    parser.add_argument("--num_workers", type=int, default=None, help="병렬 워커 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument("--full_rebuild", action="store_true", help="기존 저장소를 재사용하지 않고 전체 재생성")
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(args):
+    """어노테이션 저장소를 생성하고 저장소 경로를 반환 (라벨이 바뀌지 않았으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        input_manifest = build_manifest([args.data_path])
+        fingerprint = compute_fingerprint(STAGE_NAME, {"target_path": args.target_path}, input_manifest=input_manifest)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 기존 어노테이션 저장소를 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    with metrics.step("build", items=input_manifest["num_files"]):
+        store_path = build_annotation_store(
+            args.data_path, args.target_path, args.num_workers, incremental=not args.full_rebuild
+        )
+    with metrics.step("cache_save"):
+        save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, store_path, [store_path])
+    metrics.emit(cache_hit=False)
+    return store_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
+    except Exception as e:
+        print(f"어노테이션 저장소 생성 실패: {e}")
+        sys.exit(1)
@@ -5,6 +5,17 @@ from pathlib import Path
 
 import requests
 import yaml
+from download_dataset import get_remote_version
+from stage_cache import (
+    add_cache_arguments,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "create_data_yaml"
 
 
 def create_data_yaml(train_path, val_path, test_path, dataset_cfg_url, output_path):
@@ -50,21 +61,62 @@ def create_data_yaml(train_path, val_path, test_path, dataset_cfg_url, output_pa
     return str(output_path)
 
 
-if __name__ == "__main__":
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="YOLO 학습용 data.yaml 파일 생성")
     parser.add_argument("--train_path", type=str, required=True, help="학습 데이터 경로")
     parser.add_argument("--val_path", type=str, required=True, help="검증 데이터 경로")
     parser.add_argument("--test_path", type=str, required=True, help="테스트 데이터 경로")
     parser.add_argument("--dataset_cfg_url", type=str, required=True, help="데이터셋 설정 URL")
     parser.add_argument("--output_path", type=str, required=True, help="출력 YAML 파일 경로")
+    add_cache_arguments(parser)
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
 
-    try:
+
+def main(args):
+    """data.yaml을 생성하고 파일 경로를 반환 (경로와 원격 설정 파일의 버전이 같으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        # data.yaml에는 경로만 기록되므로 split 디렉토리의 내용이 아닌 경로와 원격 설정 파일의 버전으로 fingerprint 계산
+        remote_version = get_remote_version(args.dataset_cfg_url)
+        params = {
+            "train_path": args.train_path,
+            "val_path": args.val_path,
+            "test_path": args.test_path,
+            "dataset_cfg_url": args.dataset_cfg_url,
+            "output_path": args.output_path,
+            "remote_version": remote_version,
+        }
+        fingerprint = compute_fingerprint(STAGE_NAME, params)
+        # 버전 정보(ETag, Last-Modified)를 알 수 없으면 설정 변경(클래스 이름 등)을 감지할 수 없으므로 캐시를 사용하지 않음
+        versioned = bool(remote_version.get("ETag") or remote_version.get("Last-Modified"))
+        if is_cache_enabled(args) and not versioned:
+            print("원격 설정 파일의 버전을 알 수 없어 캐시를 사용하지 않습니다.")
+        cached = (
+            load_cached_result(args.cache_dir, STAGE_NAME, fingerprint)
+            if is_cache_enabled(args) and versioned
+            else None
+        )
+    if cached is not None:
+        print(f"캐시 적중: 기존 YAML 파일을 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    with metrics.step("create_yaml"):
         yaml_path = create_data_yaml(
             args.train_path, args.val_path, args.test_path, args.dataset_cfg_url, args.output_path
         )
-        print(f"XCOM_RETURN:{yaml_path}")
+    with metrics.step("cache_save"):
+        save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, yaml_path, [yaml_path])
+    metrics.emit(cache_hit=False)
+    return yaml_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
     except Exception as e:
         print(f"YAML 생성 실패: {e}")
         sys.exit(1)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+import argparse
+import itertools
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from build_annotation_store import load_annotation_store
+from stage_cache import (
+    add_cache_arguments,
+    build_manifest,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "dedup_dataset"
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+HASH_BITS = 64
+DUPLICATES_FILENAME = "duplicates.json"
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), "big")
+
+
+def dhash(gray):
+    """difference hash: 9x8로 축소한 뒤 가로로 인접한 픽셀의 밝기 비교"""
+    resized = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(resized[:, 1:] > resized[:, :-1])
+
+
+def phash(gray):
+    """perceptual hash: 32x32 DCT의 저주파 8x8 계수를 중앙값과 비교"""
+    resized = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low_freq = cv2.dct(resized)[:8, :8].flatten()
+    # DC 성분은 전체 밝기라서 중앙값 계산에서 제외
+    median = np.median(low_freq[1:])
+    return _bits_to_int(low_freq > median)
+
+
+HASH_FUNCTIONS = {"dhash": dhash, "phash": phash}
+
+
+def compute_hash(args):
+    """이미지 하나의 perceptual hash 계산 (프로세스 풀에서 실행)"""
+    image_path, hash_type = args
+    # 해시는 저해상도에서 계산하므로 디코딩 단계에서부터 1/4로 축소해 읽음
+    gray = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return image_path, None
+    return image_path, HASH_FUNCTIONS[hash_type](gray)
+
+
+class MultiIndexHash:
+    """
+    multi-index hashing 기반 Hamming 거리 검색
+    64비트 해시를 m개의 구간으로 나누면, 거리가 radius 이하인 두 해시는 비둘기집 원리에 의해
+    최소 한 구간의 거리가 radius // m 이하입니다. 구간별 해시 테이블에서 그 거리 안의 key만 조회해 후보를 모으고
+    전체 거리를 확인하므로 모든 쌍을 비교하지 않고도 근접 중복을 찾을 수 있습니다.
+    구간 폭은 log2(num_items)비트로 맞춰 구간별 bucket에 평균 1개 정도의 항목만 들어가도록 합니다.
+    (구간을 radius + 1개로 고정하면 이미지 수가 많을 때 bucket이 커져 후보 확인이 거의 모든 쌍 비교가 됨)
+    """
+
+    def __init__(self, radius, num_items):
+        self.radius = radius
+        chunk_bits = max(1, math.ceil(math.log2(max(num_items, 2))))
+        num_chunks = max(1, HASH_BITS // chunk_bits)
+        # 구간별로 조회할 최대 거리
+        self.sub_radius = radius // num_chunks
+        base, extra = divmod(HASH_BITS, num_chunks)
+        self.chunks = []
+        shift = 0
+        for idx in range(num_chunks):
+            width = base + (1 if idx < extra else 0)
+            self.chunks.append((shift, width))
+            shift += width
+        self.tables = [{} for _ in self.chunks]
+        self.hashes = []
+
+    def _keys(self, value):
+        return [(value >> shift) & ((1 << width) - 1) for shift, width in self.chunks]
+
+    def _neighbors(self, key, width):
+        """key와 거리가 sub_radius 이하인 구간 key 목록"""
+        neighbors = [key]
+        for distance in range(1, self.sub_radius + 1):
+            for bits in itertools.combinations(range(width), distance):
+                flipped = key
+                for bit in bits:
+                    flipped ^= 1 << bit
+                neighbors.append(flipped)
+        return neighbors
+
+    def query(self, value):
+        """value와 Hamming 거리가 radius 이하인 기존 항목의 id 목록"""
+        candidates = set()
+        for table, key, (_, width) in zip(self.tables, self._keys(value), self.chunks):
+            for neighbor in self._neighbors(key, width):
+                candidates.update(table.get(neighbor, ()))
+        return [idx for idx in candidates if (self.hashes[idx] ^ value).bit_count() <= self.radius]
+
+    def add(self, value):
+        idx = len(self.hashes)
+        self.hashes.append(value)
+        for table, key in zip(self.tables, self._keys(value)):
+            table.setdefault(key, []).append(idx)
+        return idx
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, idx):
+        while self.parent[idx] != idx:
+            self.parent[idx] = self.parent[self.parent[idx]]
+            idx = self.parent[idx]
+        return idx
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def compute_hashes(image_paths, hash_type, num_workers=None, sha1s=None):
+    """
+    이미지별 perceptual hash를 병렬로 계산해 (이미지 경로, hash 또는 None) 목록으로 반환합니다.
+    sha1s(이미지별 파일 해시)를 지정하면 내용이 같은 파일은 한 번만 디코딩합니다.
+    """
+    if sha1s is None:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            return list(executor.map(compute_hash, [(p, hash_type) for p in image_paths], chunksize=256))
+
+    representatives = {}
+    for image_path, sha1 in zip(image_paths, sha1s):
+        representatives.setdefault(sha1, image_path)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        results = executor.map(compute_hash, [(p, hash_type) for p in representatives.values()], chunksize=256)
+        hashes = {sha1: value for sha1, (_, value) in zip(representatives, results)}
+    return [(image_path, hashes[sha1]) for image_path, sha1 in zip(image_paths, sha1s)]
+
+
+def find_duplicates(
+    data_path, target_path, hash_type="phash", radius=4, action="report", num_workers=None, annotation_store=None
+):
+    """
+    근접 중복 이미지 탐지
+    모든 이미지의 perceptual hash를 병렬로 계산하고, Hamming 거리가 radius 이하인 이미지를 같은 cluster로 묶습니다.
+    action이 remove면 cluster마다 대표 이미지 하나만 남기고 나머지를 제외 목록에 기록합니다.
+    (원본 파일은 삭제하지 않으며, split_dataset이 제외 목록과 cluster 정보를 사용합니다)
+    annotation_store를 지정하면 저장소의 이미지 목록과 파일 해시를 사용해 데이터셋을 다시 순회하지 않고,
+    내용이 같은 파일은 한 번만 디코딩합니다.
+    """
+    data_path = Path(data_path)
+    target_path = Path(target_path)
+    target_path.mkdir(parents=True, exist_ok=True)
+    print(f"근접 중복 이미지 탐지 중: {data_path} (hash: {hash_type}, radius: {radius})")
+
+    if annotation_store:
+        # 저장소의 이미지는 상대 경로 순으로 정렬되어 있음
+        store = load_annotation_store(annotation_store)
+        image_paths = [str(store.image_path(idx)) for idx in range(len(store))]
+        sha1s = [str(sha1) for sha1 in store.images["sha1"]]
+    else:
+        image_paths = sorted(str(p) for p in data_path.rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)
+        sha1s = None
+    results = compute_hashes(image_paths, hash_type, num_workers, sha1s)
+
+    stems = [Path(image_path).stem for image_path, value in results if value is not None]
+    unreadable = [image_path for image_path, value in results if value is None]
+
+    # 이미 추가된 해시들에 대해서만 질의한 뒤 추가하므로 각 쌍은 한 번씩만 확인됨
+    hashes = [value for _, value in results if value is not None]
+    index = MultiIndexHash(radius, len(hashes))
+    union_find = UnionFind(len(stems))
+    for idx, value in enumerate(hashes):
+        for other in index.query(value):
+            union_find.union(idx, other)
+        index.add(value)
+
+    clusters = {}
+    for idx, stem in enumerate(stems):
+        clusters.setdefault(union_find.find(idx), []).append(stem)
+    duplicate_clusters = [sorted(set(members)) for members in clusters.values() if len(set(members)) > 1]
+    duplicate_clusters.sort(key=lambda members: members[0])
+
+    excluded = []
+    if action == "remove":
+        for members in duplicate_clusters:
+            excluded.extend(members[1:])
+
+    num_duplicates = sum(len(members) - 1 for members in duplicate_clusters)
+    # union-find는 거리 조건을 이어 붙이므로 cluster가 연쇄적으로 커지면 radius를 줄여야 함
+    largest_cluster_size = max((len(members) for members in duplicate_clusters), default=0)
+    print(
+        f"이미지 {len(stems)}개 중 근접 중복 cluster {len(duplicate_clusters)}개 "
+        f"(중복 이미지 {num_duplicates}개, 가장 큰 cluster {largest_cluster_size}개)"
+    )
+    if unreadable:
+        print(f"읽을 수 없는 이미지 {len(unreadable)}개는 중복 탐지에서 제외했습니다.")
+
+    report = {
+        "hash_type": hash_type,
+        "radius": radius,
+        "action": action,
+        "num_images": len(stems),
+        "largest_cluster_size": largest_cluster_size,
+        "clusters": duplicate_clusters,
+        "excluded": excluded,
+        "unreadable": unreadable,
+    }
+    output_path = target_path / DUPLICATES_FILENAME
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"중복 탐지 결과 저장 완료: {output_path}")
+    return str(output_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="근접 중복 이미지 탐지 및 split 누수 방지")
+    parser.add_argument("--data_path", type=str, help="원본 데이터셋 경로", default="./data/raw")
+    parser.add_argument("--target_path", type=str, help="중복 탐지 결과 저장 경로", default="./data/dedup")
+    parser.add_argument("--hash_type", type=str, default="phash", choices=list(HASH_FUNCTIONS), help="해시 종류")
+    parser.add_argument("--radius", type=int, default=4, help="중복으로 판단할 최대 Hamming 거리")
+    parser.add_argument(
+        "--action",
+        type=str,
+        default="report",
+        choices=["report", "remove"],
+        help="report: cluster만 기록, remove: cluster마다 하나만 남기고 제외",
+    )
+    parser.add_argument("--num_workers", type=int, default=None, help="병렬 워커 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument(
+        "--annotation_store",
+        type=str,
+        default="",
+        help="build_annotation_store 결과 경로 (지정하면 데이터셋을 다시 순회하지 않음)",
+    )
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(args):
+    """근접 중복 이미지를 탐지하고 결과 경로를 반환 (설정과 데이터셋이 같으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        params = {
+            "target_path": args.target_path,
+            "hash_type": args.hash_type,
+            "radius": args.radius,
+            "action": args.action,
+        }
+        # 저장소에는 이미지별 파일 해시가 기록되어 있으므로 저장소가 바뀌지 않으면 이미지 내용도 같음
+        input_manifest = build_manifest([args.annotation_store or args.data_path])
+        fingerprint = compute_fingerprint(STAGE_NAME, params, input_manifest=input_manifest)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 기존 중복 탐지 결과를 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    # 저장소를 사용하면 입력 파일 수가 아닌 저장소의 이미지 수를 처리 항목 수로 기록
+    num_items = (
+        len(load_annotation_store(args.annotation_store)) if args.annotation_store else input_manifest["num_files"]
+    )
+    with metrics.step("find_duplicates", items=num_items):
+        result_path = find_duplicates(
+            args.data_path,
+            args.target_path,
+            args.hash_type,
+            args.radius,
+            args.action,
+            args.num_workers,
+            args.annotation_store or None,
+        )
+    with metrics.step("cache_save"):
+        save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, result_path, [result_path])
+    metrics.emit(cache_hit=False)
+    return result_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
+    except Exception as e:
+        print(f"중복 탐지 실패: {e}")
+        sys.exit(1)
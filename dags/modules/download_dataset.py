@@ -5,6 +5,16 @@ import zipfile
 from pathlib import Path
 
 import requests
+from stage_cache import (
+    add_cache_arguments,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "download_dataset"
 
 
 def download_dataset(dataset_url):
@@ -26,6 +36,18 @@ def download_dataset(dataset_url):
     return str(file_path)
 
 
+def get_remote_version(dataset_url):
+    """원격 파일의 버전 정보(ETag, Last-Modified, Content-Length)를 HEAD 요청으로 가져옵니다."""
+    try:
+        response = requests.head(dataset_url, allow_redirects=True, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"원격 파일 버전 확인 실패, URL만으로 캐시 키를 계산합니다: {e}")
+        return {}
+
+    return {key: response.headers.get(key) for key in ["ETag", "Last-Modified", "Content-Length"]}
+
+
 def extract_dataset(source_path, target_path):
     """압축 파일을 해제합니다."""
     extract_path = Path(target_path)
@@ -39,7 +61,7 @@ def extract_dataset(source_path, target_path):
     return str(extract_path)
 
 
-if __name__ == "__main__":
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="YOLO 데이터셋 다운로드")
     parser.add_argument(
         "--dataset_url",
@@ -48,13 +70,43 @@ if __name__ == "__main__":
         help="데이터셋 다운로드 URL",
     )
     parser.add_argument("--target_path", type=str, default="./data/raw", help="데이터셋 저장 경로")
+    add_cache_arguments(parser)
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
 
-    try:
+
+def main(args):
+    """데이터셋을 다운로드해 압축을 풀고 저장 경로를 반환 (원격 버전이 같으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        params = {
+            "dataset_url": args.dataset_url,
+            "target_path": args.target_path,
+            "remote_version": get_remote_version(args.dataset_url),
+        }
+        fingerprint = compute_fingerprint(STAGE_NAME, params)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 동일한 데이터셋이 이미 준비되어 있습니다 ({args.target_path})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    with metrics.step("download"):
         file_path = download_dataset(args.dataset_url)
+    with metrics.step("extract") as extract_step:
         extract_dataset(file_path, args.target_path)
-        print(f"XCOM_RETURN:{args.target_path}")
+    with metrics.step("cache_save"):
+        record = save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, args.target_path, [args.target_path])
+    extract_step["items"] = record["output_manifest"]["num_files"]
+    metrics.emit(cache_hit=False)
+    return args.target_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
     except Exception as e:
         print(f"다운로드 실패: {e}")
         sys.exit(1)
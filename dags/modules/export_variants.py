@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import random
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+import onnx
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+PRIMARY_VARIANT = "fp32_dynamic"
+
+
+def letterbox(image, img_size=640, pad_value=114):
+    """ultralytics 전처리와 같이 비율을 유지하며 리사이즈하고 남는 영역을 회색으로 채웁니다."""
+    height, width = image.shape[:2]
+    scale = min(img_size / height, img_size / width)
+    new_height, new_width = round(height * scale), round(width * scale)
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    top = (img_size - new_height) // 2
+    left = (img_size - new_width) // 2
+    padded = np.full((img_size, img_size, 3), pad_value, dtype=np.uint8)
+    padded[top : top + new_height, left : left + new_width] = resized
+    return padded
+
+
+def preprocess(image_path, img_size=640):
+    """이미지를 모델 입력 형식(1x3xHxW, RGB, 0~1 float32)으로 변환합니다."""
+    image = cv2.imread(str(image_path))
+    if image is None:
+        return None
+    image = letterbox(image, img_size)[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(image, dtype=np.float32)[None] / 255.0
+
+
+class ValCalibrationReader(CalibrationDataReader):
+    """검증 split에서 샘플링한 이미지를 INT8 calibration 입력으로 제공합니다."""
+
+    def __init__(self, input_name, val_path, img_size=640, num_samples=64, seed=0):
+        image_paths = sorted(p for p in Path(val_path).rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not image_paths:
+            raise ValueError(f"calibration에 사용할 이미지가 없습니다: {val_path}")
+        random.Random(seed).shuffle(image_paths)
+        self.input_name = input_name
+        self.img_size = img_size
+        self.image_paths = iter(image_paths[:num_samples])
+
+    def get_next(self):
+        for image_path in self.image_paths:
+            tensor = preprocess(image_path, self.img_size)
+            if tensor is not None:
+                return {self.input_name: tensor}
+        return None
+
+
+def copy_metadata(source_path, target_path):
+    """ultralytics가 ONNX에 기록한 메타데이터(stride, names, imgsz 등)를 양자화된 모델에도 복사합니다."""
+    source = onnx.load(str(source_path), load_external_data=False)
+    target = onnx.load(str(target_path))
+    existing = {prop.key for prop in target.metadata_props}
+    for prop in source.metadata_props:
+        if prop.key not in existing:
+            target.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(target, str(target_path))
+
+
+def quantize_int8(fp32_path, output_path, val_path, img_size=640, mode="static", num_samples=64):
+    """
+    FP32 ONNX 모델을 INT8로 양자화
+    static 모드는 검증 이미지로 activation 범위를 calibration한 QDQ 모델을, dynamic 모드는 가중치만 미리 양자화한 모델을 만듭니다.
+    """
+    fp32_path = Path(fp32_path)
+    output_path = Path(output_path)
+    print(f"INT8 양자화 중 ({mode}): {fp32_path} -> {output_path}")
+
+    if mode == "dynamic":
+        quantize_dynamic(str(fp32_path), str(output_path), weight_type=QuantType.QUInt8)
+    else:
+        # shape inference와 그래프 최적화를 먼저 적용해야 양자화 가능한 노드가 정확히 식별됨
+        prepared_path = output_path.with_name(f"{output_path.stem}.prep.onnx")
+        quant_pre_process(str(fp32_path), str(prepared_path), skip_symbolic_shape=True)
+        input_name = onnx.load(str(prepared_path), load_external_data=False).graph.input[0].name
+        quantize_static(
+            str(prepared_path),
+            str(output_path),
+            ValCalibrationReader(input_name, val_path, img_size, num_samples),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+        prepared_path.unlink(missing_ok=True)
+
+    copy_metadata(fp32_path, output_path)
+    return str(output_path)
+
+
+def _export(model, output_dir, name, **kwargs):
+    """ultralytics export는 항상 같은 파일명으로 저장하므로 variant 이름으로 복사해 둡니다."""
+    exported_path = model.export(format="onnx", **kwargs)
+    variant_path = Path(output_dir) / f"{name}.onnx"
+    shutil.copy2(exported_path, variant_path)
+    return str(variant_path)
+
+
+def export_variants(
+    model, output_dir, val_path, img_size=640, static_batch_sizes=None, int8_mode="static", calibration_size=64
+):
+    """
+    최적화된 ONNX variant 생성
+    - fp32_dynamic: 기존과 같은 dynamic shape FP32 모델 (기본 서빙 모델)
+    - fp32_static_b{N}: 배치 크기 N으로 고정한 모델 (shape 계산이 사라져 CPU에서 더 빠름)
+    - int8_{mode}: 기본 모델을 INT8로 양자화한 모델 (int8_mode가 none이면 생략)
+    ultralytics export는 기본으로 onnxslim(상수 접기, 연산자 fusion)을 적용하므로 기본 모델이 이미 simplified 그래프이며,
+    별도의 simplified variant는 만들지 않습니다.
+    variant 이름 -> {"path", "batch_size"(dynamic이면 None)} 딕셔너리를 반환합니다.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"ONNX variant 생성 중: {output_dir}")
+
+    variants = {
+        PRIMARY_VARIANT: {
+            "path": _export(model, output_dir, PRIMARY_VARIANT, dynamic=True, simplify=True),
+            "batch_size": None,
+        },
+    }
+    for batch_size in static_batch_sizes or []:
+        name = f"fp32_static_b{batch_size}"
+        variants[name] = {
+            "path": _export(model, output_dir, name, dynamic=False, simplify=True, batch=batch_size),
+            "batch_size": batch_size,
+        }
+
+    if int8_mode != "none":
+        name = f"int8_{int8_mode}"
+        int8_path = quantize_int8(
+            variants[PRIMARY_VARIANT]["path"],
+            output_dir / f"{name}.onnx",
+            val_path,
+            img_size,
+            int8_mode,
+            calibration_size,
+        )
+        variants[name] = {"path": int8_path, "batch_size": None}
+
+    print(f"ONNX variant {len(variants)}개 생성 완료: {', '.join(variants)}")
+    return variants
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+# MLflow log_batch 요청 하나에 담을 수 있는 최대 개수
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+MAX_ENTITIES_PER_BATCH = 1000
+
+
+def with_retry(func, max_retries=3, retry_backoff=1.0, description="MLflow 요청"):
+    """일시적인 네트워크 오류에 대비해 지수 backoff로 재시도"""
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            wait_seconds = retry_backoff * (2**attempt)
+            print(
+                f"[경고] {description} 실패 ({e}), {wait_seconds:.1f}초 후 재시도합니다. ({attempt + 1}/{max_retries})"
+            )
+            time.sleep(wait_seconds)
+
+
+class MlflowBatchLogger:
+    """
+    MLflow 로깅 버퍼
+    param, metric, tag는 메모리에 모아두었다가 flush할 때 log_batch로 한 번에 전송하고,
+    artifact 업로드는 백그라운드 스레드에서 재시도와 함께 수행합니다.
+    프로세스 종료 시 남은 로그를 전송하고 업로드가 끝날 때까지 기다립니다.
+    """
+
+    def __init__(self, run_id, client=None, max_retries=3, retry_backoff=1.0, num_upload_workers=2):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._lock = threading.Lock()
+        self._params = {}
+        self._metrics = []
+        self._tags = {}
+        self._uploads = []
+        self._executor = ThreadPoolExecutor(max_workers=num_upload_workers, thread_name_prefix="mlflow-upload")
+        self._closed = False
+        atexit.register(self.close)
+
+    def log_param(self, key, value):
+        with self._lock:
+            self._params[key] = str(value)
+
+    def log_params(self, params):
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_metric(self, key, value, step=0):
+        with self._lock:
+            self._metrics.append(Metric(key, float(value), int(time.time() * 1000), step))
+
+    def log_metrics(self, metrics, step=0):
+        for key, value in metrics.items():
+            self.log_metric(key, value, step)
+
+    def set_tag(self, key, value):
+        with self._lock:
+            self._tags[key] = str(value)
+
+    def flush(self):
+        """버퍼에 모인 param, metric, tag를 log_batch 요청 한도에 맞게 나눠서 전송"""
+        with self._lock:
+            params = [Param(key, value) for key, value in self._params.items()]
+            tags = [RunTag(key, value) for key, value in self._tags.items()]
+            metrics = self._metrics
+            self._params, self._tags, self._metrics = {}, {}, []
+
+        while params or tags or metrics:
+            batch_params, params = params[:MAX_PARAMS_PER_BATCH], params[MAX_PARAMS_PER_BATCH:]
+            batch_tags, tags = tags[:MAX_TAGS_PER_BATCH], tags[MAX_TAGS_PER_BATCH:]
+            num_metrics = MAX_ENTITIES_PER_BATCH - len(batch_params) - len(batch_tags)
+            batch_metrics, metrics = metrics[:num_metrics], metrics[num_metrics:]
+            with_retry(
+                lambda: self.client.log_batch(self.run_id, metrics=batch_metrics, params=batch_params, tags=batch_tags),
+                self.max_retries,
+                self.retry_backoff,
+                "MLflow log_batch",
+            )
+
+    def log_artifact(self, local_path, artifact_path=None):
+        """artifact 업로드를 백그라운드 스레드에 맡기고 future를 반환"""
+        future = self._executor.submit(
+            with_retry,
+            lambda: self.client.log_artifact(self.run_id, local_path, artifact_path),
+            self.max_retries,
+            self.retry_backoff,
+            f"artifact 업로드({local_path})",
+        )
+        with self._lock:
+            self._uploads.append(future)
+        return future
+
+    def wait(self):
+        """
+        flush 후 진행 중인 artifact 업로드가 모두 끝날 때까지 대기 (모델 등록처럼 업로드 완료가 필요한 작업 전에 호출)
+        재시도 후에도 실패한 업로드가 있으면 예외를 발생시킵니다.
+        """
+        self.flush()
+        with self._lock:
+            uploads, self._uploads = self._uploads, []
+        errors = [future.exception() for future in uploads if future.exception() is not None]
+        if errors:
+            raise RuntimeError(f"artifact 업로드 {len(errors)}건 실패: {errors[0]}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+            atexit.unregister(self.close)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import json
+import os
+import sys
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from build_annotation_store import load_annotation_store, load_split_index, split_cache_inputs
+from stage_cache import (
+    add_cache_arguments,
+    build_manifest,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "pack_shards"
+SPLITS = ["train", "val", "test"]
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+INDEX_FILENAME = "index.jsonl"
+SUMMARY_FILENAME = "shards.json"
+
+
+def collect_samples(split_path, store_samples=None):
+    """
+    split 디렉토리에서 (key, 이미지 경로, 라벨 경로 또는 None, 크기) 목록을 수집합니다.
+    store_samples(저장소 split index의 샘플 목록)를 지정하면 디렉토리를 순회하지 않고 index의 파일 목록과 크기, 해시를 사용합니다.
+    """
+    if store_samples is not None:
+        samples = [
+            {
+                "key": sample["key"],
+                "image_path": sample["image_path"],
+                "label_path": sample["label_path"],
+                "size": sample["image_size"] + sample["label_size"],
+                "sha1": sample["sha1"],
+            }
+            for sample in store_samples
+        ]
+        samples.sort(key=lambda sample: sample["key"])
+        return samples
+
+    images_path = Path(split_path) / "images"
+    labels_path = Path(split_path) / "labels"
+    samples = []
+    with os.scandir(images_path) as entries:
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            if not entry.is_file() or suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            label_path = labels_path / f"{stem}.txt"
+            label_size = label_path.stat().st_size if label_path.exists() else 0
+            samples.append(
+                {
+                    "key": stem,
+                    "image_path": entry.path,
+                    "label_path": str(label_path) if label_path.exists() else None,
+                    "size": entry.stat().st_size + label_size,
+                }
+            )
+
+    # shard 구성이 실행마다 달라지지 않도록 key 기준으로 정렬
+    samples.sort(key=lambda sample: sample["key"])
+    return samples
+
+
+def plan_shards(samples, shard_size_bytes):
+    """샘플을 누적 크기가 shard_size_bytes를 넘지 않도록 shard 단위로 묶습니다."""
+    shards = []
+    current = []
+    current_size = 0
+    for sample in samples:
+        if current and current_size + sample["size"] > shard_size_bytes:
+            shards.append(current)
+            current = []
+            current_size = 0
+        current.append(sample)
+        current_size += sample["size"]
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _add_member(tar, name, data):
+    """재현 가능한 메타데이터로 tar 멤버를 추가하고 데이터 offset을 반환합니다."""
+    info = tarfile.TarInfo(name=name)
+    info.size = len(data)
+    info.mtime = 0
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+    # addfile은 TarInfo 복사본에 offset을 기록하므로, 쓰기 후 위치에서 512바이트 블록 단위로 패딩된 데이터 크기를 빼서 계산
+    padded_size = -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+    return tar.offset - padded_size
+
+
+def write_shard(shard_path, samples):
+    """
+    하나의 shard 파일 작성 (프로세스 풀에서 실행)
+    tar 멤버의 데이터 offset을 기록해 두어 index만으로 임의 접근이 가능하도록 합니다.
+    """
+    tmp_path = f"{shard_path}.tmp"
+    index_entries = []
+    with tarfile.open(tmp_path, "w", format=tarfile.GNU_FORMAT) as tar:
+        for sample in samples:
+            with open(sample["image_path"], "rb") as f:
+                image_bytes = f.read()
+            image_name = sample["key"] + Path(sample["image_path"]).suffix.lower()
+            entry = {
+                "key": sample["key"],
+                "shard": os.path.basename(shard_path),
+                "image_name": image_name,
+                "image_offset": _add_member(tar, image_name, image_bytes),
+                "image_size": len(image_bytes),
+                "label_offset": None,
+                "label_size": 0,
+            }
+            if sample.get("sha1"):
+                entry["sha1"] = sample["sha1"]
+
+            if sample["label_path"]:
+                with open(sample["label_path"], "rb") as f:
+                    label_bytes = f.read()
+                entry["label_offset"] = _add_member(tar, f"{sample['key']}.txt", label_bytes)
+                entry["label_size"] = len(label_bytes)
+
+            index_entries.append(entry)
+
+    os.replace(tmp_path, shard_path)
+    return index_entries
+
+
+def pack_split(split_path, output_path, shard_size_mb=256, num_workers=None, store_samples=None):
+    """하나의 split을 shard로 패킹하고 index 파일을 작성합니다."""
+    split_path = Path(split_path)
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # 이전 실행에서 남은 shard 제거
+    for old_shard in output_path.glob("shard-*.tar*"):
+        old_shard.unlink()
+
+    samples = collect_samples(split_path, store_samples)
+    shards = plan_shards(samples, shard_size_mb * 1024 * 1024)
+    shard_paths = [str(output_path / f"shard-{idx:05d}.tar") for idx in range(len(shards))]
+    print(f"{split_path.name}: 샘플 {len(samples)}개 -> shard {len(shards)}개")
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        results = list(executor.map(write_shard, shard_paths, shards))
+
+    # shard 순서대로 index 작성 (순차 읽기 순서와 동일)
+    with open(output_path / INDEX_FILENAME, "w", encoding="utf-8") as f:
+        for index_entries in results:
+            for entry in index_entries:
+                f.write(json.dumps(entry) + "\n")
+
+    return {
+        "num_samples": len(samples),
+        "shards": [
+            {"name": os.path.basename(path), "num_samples": len(shard), "bytes": os.path.getsize(path)}
+            for path, shard in zip(shard_paths, shards)
+        ],
+    }
+
+
+def pack_shards(splits_path, target_path, shard_size_mb=256, num_workers=None, annotation_store=None):
+    """
+    train/val/test split을 각각 shard로 패킹합니다.
+    annotation_store를 지정하고 split 결과에 저장소 index가 있으면 split 디렉토리를 순회하지 않고 index의 파일 목록을 사용합니다.
+    """
+    splits_path = Path(splits_path)
+    target_path = Path(target_path)
+    print(f"데이터셋 shard 패킹 중: {splits_path} -> {target_path} (shard 크기: {shard_size_mb}MB)")
+
+    store = load_annotation_store(annotation_store) if annotation_store else None
+    split_samples = load_split_index(splits_path, store) if store is not None else None
+    if store is not None and split_samples is None:
+        print("split 결과에 저장소 index가 없거나 저장소와 맞지 않아 split 디렉토리를 순회합니다.")
+
+    summary = {"shard_size_mb": shard_size_mb, "splits": {}}
+    for split in SPLITS:
+        if split_samples is None and not (splits_path / split / "images").exists():
+            raise ValueError(f"split 경로가 존재하지 않습니다: {splits_path / split}")
+        store_samples = split_samples.get(split, []) if split_samples is not None else None
+        summary["splits"][split] = pack_split(
+            splits_path / split, target_path / split, shard_size_mb, num_workers, store_samples
+        )
+
+    with open(target_path / SUMMARY_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print("데이터셋 shard 패킹 완료")
+    return str(target_path)
+
+
+class ShardReader:
+    """
+    shard로 패킹된 split 읽기
+    순차 읽기(iteration)는 shard 파일을 처음부터 끝까지 스트리밍하고,
+    임의 접근(reader[i], reader.get(key))은 index의 offset으로 바로 seek합니다.
+    """
+
+    def __init__(self, split_shard_path):
+        self.path = Path(split_shard_path)
+        with open(self.path / INDEX_FILENAME, "r", encoding="utf-8") as f:
+            self.entries = [json.loads(line) for line in f]
+        self.key_to_idx = {entry["key"]: idx for idx, entry in enumerate(self.entries)}
+        self.shard_names = sorted({entry["shard"] for entry in self.entries})
+        self._handles = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        """shard를 순서대로 스트리밍하며 (key, image_name, image_bytes, label_bytes)를 반환합니다."""
+        for shard_name in self.shard_names:
+            current_key = None
+            sample = {}
+            with tarfile.open(self.path / shard_name, "r|") as tar:
+                for member in tar:
+                    key, suffix = os.path.splitext(member.name)
+                    if current_key is not None and key != current_key:
+                        yield current_key, sample.get("image_name"), sample.get("image"), sample.get("label", b"")
+                        sample = {}
+                    current_key = key
+                    data = tar.extractfile(member).read()
+                    if suffix == ".txt":
+                        sample["label"] = data
+                    else:
+                        sample["image_name"] = member.name
+                        sample["image"] = data
+                if current_key is not None:
+                    yield current_key, sample.get("image_name"), sample.get("image"), sample.get("label", b"")
+
+    def _read(self, shard_name, offset, size):
+        handle = self._handles.get(shard_name)
+        if handle is None:
+            handle = open(self.path / shard_name, "rb")
+            self._handles[shard_name] = handle
+        handle.seek(offset)
+        return handle.read(size)
+
+    def __getitem__(self, idx):
+        entry = self.entries[idx]
+        image = self._read(entry["shard"], entry["image_offset"], entry["image_size"])
+        label = b""
+        if entry["label_offset"] is not None:
+            label = self._read(entry["shard"], entry["label_offset"], entry["label_size"])
+        return entry["key"], entry["image_name"], image, label
+
+    def get(self, key):
+        return self[self.key_to_idx[key]]
+
+    def close(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+
+def unpack_shards(shards_path, target_path):
+    """
+    shard를 순차적으로 읽어 YOLO 디렉토리 구조(images/, labels/)로 풀어냅니다.
+    학습 pod의 로컬 디스크로 한 번에 옮겨서 ultralytics 데이터 로더가 로컬 파일을 읽도록 할 때 사용합니다.
+    """
+    shards_path = Path(shards_path)
+    target_path = Path(target_path)
+    print(f"shard 압축 해제 중: {shards_path} -> {target_path}")
+
+    for split in SPLITS:
+        images_path = target_path / split / "images"
+        labels_path = target_path / split / "labels"
+        images_path.mkdir(parents=True, exist_ok=True)
+        labels_path.mkdir(parents=True, exist_ok=True)
+
+        count = 0
+        for key, image_name, image, label in ShardReader(shards_path / split):
+            with open(images_path / image_name, "wb") as f:
+                f.write(image)
+            if label:
+                with open(labels_path / f"{key}.txt", "wb") as f:
+                    f.write(label)
+            count += 1
+        print(f"{split}: {count}개 샘플 복원")
+
+    return str(target_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="분할된 데이터셋을 tar shard로 패킹")
+    parser.add_argument("--splits_path", type=str, help="분할된 데이터셋 경로", default="./data/splits")
+    parser.add_argument("--target_path", type=str, help="shard 저장 경로", default="./data/shards")
+    parser.add_argument("--shard_size_mb", type=int, default=256, help="shard 하나의 최대 크기 (MB)")
+    parser.add_argument("--num_workers", type=int, default=None, help="병렬 패킹 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument(
+        "--annotation_store",
+        type=str,
+        default="",
+        help="build_annotation_store 결과 경로 (지정하면 split 디렉토리를 다시 순회하지 않음)",
+    )
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(args):
+    """split을 shard로 패킹하고 결과 경로를 반환 (split이 바뀌지 않았으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        params = {"target_path": args.target_path, "shard_size_mb": args.shard_size_mb}
+        input_paths, num_samples = split_cache_inputs(args.splits_path, args.annotation_store, SPLITS)
+        input_manifest = build_manifest(input_paths)
+        fingerprint = compute_fingerprint(STAGE_NAME, params, input_manifest=input_manifest)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 기존 shard를 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    num_items = num_samples if num_samples is not None else input_manifest["num_files"]
+    with metrics.step("pack", items=num_items):
+        result_path = pack_shards(
+            args.splits_path, args.target_path, args.shard_size_mb, args.num_workers, args.annotation_store or None
+        )
+    with metrics.step("cache_save"):
+        save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, result_path, [args.target_path])
+    metrics.emit(cache_hit=False)
+    return result_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
+    except Exception as e:
+        print(f"shard 패킹 실패: {e}")
+        sys.exit(1)
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from build_annotation_store import load_annotation_store, load_split_index, split_cache_inputs
+from PIL import Image
+from stage_cache import (
+    add_cache_arguments,
+    build_manifest,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "profile_dataset"
+SPLITS = ["train", "val", "test"]
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+PROFILE_FILENAME = "profile.json"
+
+# 고정 구간 히스토그램 설정 (데이터셋 크기와 무관하게 메모리 사용량이 일정하도록)
+BOXES_PER_IMAGE_BINS = 64  # 마지막 구간은 64개 이상
+BOX_SIZE_BINS = 20  # sqrt(w * h), 정규화 좌표 0~1
+ASPECT_RATIO_BINS = 16  # log2(w / h), -4~4
+RESOLUTION_BIN_PX = 64
+RESOLUTION_MAX_PX = 8192
+FILE_SIZE_BINS = 32  # log2(bytes)
+
+
+class RunningStats:
+    """count, sum, 제곱합, min, max만 유지하는 스트리밍 통계"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        if self.count == 0:
+            return {"count": 0}
+        mean = self.total / self.count
+        variance = max(self.total_sq / self.count - mean * mean, 0.0)
+        return {"count": self.count, "mean": mean, "std": math.sqrt(variance), "min": self.min, "max": self.max}
+
+
+class DatasetProfile:
+    """split 하나에 대한 누적 통계. 워커별로 부분 결과를 만든 뒤 merge로 합칩니다."""
+
+    def __init__(self):
+        self.num_images = 0
+        self.num_instances = 0
+        self.images_without_labels = 0
+        self.invalid_label_lines = 0
+        self.unreadable_images = 0
+        self.class_counts = Counter()
+        self.boxes_per_image = [0] * (BOXES_PER_IMAGE_BINS + 1)
+        self.box_size = [0] * BOX_SIZE_BINS
+        self.aspect_ratio = [0] * ASPECT_RATIO_BINS
+        self.width = [0] * (RESOLUTION_MAX_PX // RESOLUTION_BIN_PX + 1)
+        self.height = [0] * (RESOLUTION_MAX_PX // RESOLUTION_BIN_PX + 1)
+        self.file_size = [0] * FILE_SIZE_BINS
+        self.width_stats = RunningStats()
+        self.height_stats = RunningStats()
+        self.file_size_stats = RunningStats()
+        self.boxes_per_image_stats = RunningStats()
+
+    def add_image(self, image_path, label_path):
+        file_size = os.path.getsize(image_path)
+
+        # PIL은 헤더만 읽어서 크기를 알려주므로 전체 디코딩 비용이 들지 않음
+        try:
+            with Image.open(image_path) as image:
+                image_size = image.size
+        except OSError:
+            image_size = None
+
+        if not os.path.exists(label_path):
+            self.add_record(file_size, image_size, None)
+            return
+
+        boxes = []
+        invalid_label_lines = 0
+        with open(label_path, "r", encoding="utf-8") as f:
+            for line in f:
+                values = line.split()
+                if not values:
+                    continue
+                try:
+                    class_id = int(values[0])
+                    coords = [float(v) for v in values[1:]]
+                except ValueError:
+                    invalid_label_lines += 1
+                    continue
+
+                if len(coords) == 4:
+                    _, _, w, h = coords
+                elif len(coords) >= 6 and len(coords) % 2 == 0:
+                    # segmentation polygon은 외접 사각형으로 변환
+                    w = max(coords[0::2]) - min(coords[0::2])
+                    h = max(coords[1::2]) - min(coords[1::2])
+                else:
+                    invalid_label_lines += 1
+                    continue
+                boxes.append((class_id, w, h))
+
+        self.add_record(file_size, image_size, boxes, invalid_label_lines)
+
+    def add_record(self, file_size, image_size, boxes, invalid_label_lines=0):
+        """
+        이미지 하나의 통계 추가
+        image_size는 (width, height) 또는 읽을 수 없는 이미지면 None,
+        boxes는 (class_id, w, h) 목록 또는 라벨 파일이 없으면 None입니다.
+        """
+        self.num_images += 1
+        self.file_size_stats.add(file_size)
+        self.file_size[min(int(math.log2(max(file_size, 1))), FILE_SIZE_BINS - 1)] += 1
+
+        if image_size is None:
+            self.unreadable_images += 1
+        else:
+            width, height = image_size
+            self.width_stats.add(width)
+            self.height_stats.add(height)
+            self.width[min(width, RESOLUTION_MAX_PX) // RESOLUTION_BIN_PX] += 1
+            self.height[min(height, RESOLUTION_MAX_PX) // RESOLUTION_BIN_PX] += 1
+
+        if boxes is None:
+            self.images_without_labels += 1
+            self.boxes_per_image[0] += 1
+            self.boxes_per_image_stats.add(0)
+            return
+
+        self.invalid_label_lines += invalid_label_lines
+        for class_id, w, h in boxes:
+            self.class_counts[class_id] += 1
+            size = math.sqrt(max(w, 0.0) * max(h, 0.0))
+            self.box_size[min(int(size * BOX_SIZE_BINS), BOX_SIZE_BINS - 1)] += 1
+            if w > 0 and h > 0:
+                ratio_bin = int((math.log2(w / h) + 4) / 8 * ASPECT_RATIO_BINS)
+                self.aspect_ratio[min(max(ratio_bin, 0), ASPECT_RATIO_BINS - 1)] += 1
+
+        self.num_instances += len(boxes)
+        self.boxes_per_image[min(len(boxes), BOXES_PER_IMAGE_BINS)] += 1
+        self.boxes_per_image_stats.add(len(boxes))
+
+    def merge(self, other):
+        self.num_images += other.num_images
+        self.num_instances += other.num_instances
+        self.images_without_labels += other.images_without_labels
+        self.invalid_label_lines += other.invalid_label_lines
+        self.unreadable_images += other.unreadable_images
+        self.class_counts.update(other.class_counts)
+        for name in ["boxes_per_image", "box_size", "aspect_ratio", "width", "height", "file_size"]:
+            merged = [a + b for a, b in zip(getattr(self, name), getattr(other, name))]
+            setattr(self, name, merged)
+        for name in ["width_stats", "height_stats", "file_size_stats", "boxes_per_image_stats"]:
+            getattr(self, name).merge(getattr(other, name))
+
+    def to_dict(self):
+        return {
+            "num_images": self.num_images,
+            "num_instances": self.num_instances,
+            "images_without_labels": self.images_without_labels,
+            "invalid_label_lines": self.invalid_label_lines,
+            "unreadable_images": self.unreadable_images,
+            "class_counts": {str(k): v for k, v in sorted(self.class_counts.items())},
+            "boxes_per_image": {
+                "stats": self.boxes_per_image_stats.to_dict(),
+                "histogram": _trim(self.boxes_per_image),
+            },
+            "box_size": {"bin_width": 1 / BOX_SIZE_BINS, "histogram": self.box_size},
+            "aspect_ratio_log2": {"range": [-4, 4], "histogram": self.aspect_ratio},
+            "image_width": {
+                "stats": self.width_stats.to_dict(),
+                "bin_px": RESOLUTION_BIN_PX,
+                "histogram": _trim(self.width),
+            },
+            "image_height": {
+                "stats": self.height_stats.to_dict(),
+                "bin_px": RESOLUTION_BIN_PX,
+                "histogram": _trim(self.height),
+            },
+            "file_size_bytes": {"stats": self.file_size_stats.to_dict(), "log2_histogram": _trim(self.file_size)},
+        }
+
+
+def _trim(histogram):
+    """뒤쪽의 0인 구간을 잘라 artifact 크기를 줄입니다."""
+    last = max((idx for idx, value in enumerate(histogram) if value), default=-1)
+    return histogram[: last + 1]
+
+
+def profile_chunk(items):
+    """(이미지 경로, 라벨 경로) 묶음을 처리하는 워커 함수"""
+    profile = DatasetProfile()
+    for image_path, label_path in items:
+        profile.add_image(image_path, label_path)
+    return profile
+
+
+def iter_chunks(split_path, chunk_size):
+    """이미지 디렉토리를 스트리밍하며 (이미지 경로, 라벨 경로) 묶음을 생성합니다."""
+    images_path = Path(split_path) / "images"
+    labels_path = Path(split_path) / "labels"
+
+    chunk = []
+    with os.scandir(images_path) as entries:
+        for entry in entries:
+            stem, suffix = os.path.splitext(entry.name)
+            if not entry.is_file() or suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            chunk.append((entry.path, str(labels_path / f"{stem}.txt")))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def profile_split(split_path, executor, max_in_flight, chunk_size=512):
+    """
+    split 하나를 한 번만 순회하며 통계 계산
+    동시에 제출하는 작업 수를 max_in_flight로 제한해 파일 목록 전체를 메모리에 올리지 않습니다.
+    """
+    result = DatasetProfile()
+    pending = set()
+    for chunk in iter_chunks(split_path, chunk_size):
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result.merge(future.result())
+        pending.add(executor.submit(profile_chunk, chunk))
+
+    for future in pending:
+        result.merge(future.result())
+    return result
+
+
+def profile_split_from_store(store, samples):
+    """저장소에 기록된 파일 크기, 이미지 크기, 파싱된 라벨로 split 하나의 통계 계산 (파일을 열지 않음)"""
+    profile = DatasetProfile()
+    for sample in samples:
+        image_id = sample["image_id"]
+        width, height = int(store.images["width"][image_id]), int(store.images["height"][image_id])
+        boxes = None
+        if sample["label_path"]:
+            labels = store.labels_for(image_id)
+            boxes = [(int(class_id), float(w), float(h)) for class_id, _, _, w, h in labels.tolist()]
+        profile.add_record(
+            sample["image_size"],
+            (width, height) if width >= 0 else None,
+            boxes,
+            int(store.images["invalid_label_lines"][image_id]),
+        )
+    return profile
+
+
+def profile_dataset(splits_path, target_path, num_workers=None, annotation_store=None):
+    """
+    train/val/test split의 통계를 계산하고 profile.json으로 저장합니다.
+    annotation_store를 지정하고 split 결과에 저장소 index가 있으면 split 디렉토리를 순회하거나 파일을 열지 않고 저장소 값을 사용합니다.
+    """
+    splits_path = Path(splits_path)
+    target_path = Path(target_path)
+    target_path.mkdir(parents=True, exist_ok=True)
+    print(f"데이터셋 프로파일링 중: {splits_path}")
+
+    store = load_annotation_store(annotation_store) if annotation_store else None
+    split_samples = load_split_index(splits_path, store) if store is not None else None
+    if store is not None and split_samples is None:
+        print("split 결과에 저장소 index가 없거나 저장소와 맞지 않아 split 디렉토리를 순회합니다.")
+
+    num_workers = num_workers or os.cpu_count() or 1
+    report = {"splits": {}}
+    total = DatasetProfile()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for split in SPLITS:
+            if split_samples is not None:
+                profile = profile_split_from_store(store, split_samples.get(split, []))
+            elif not (splits_path / split / "images").exists():
+                raise ValueError(f"split 경로가 존재하지 않습니다: {splits_path / split}")
+            else:
+                profile = profile_split(splits_path / split, executor, max_in_flight=num_workers * 2)
+            total.merge(profile)
+            report["splits"][split] = profile.to_dict()
+            print(f"{split}: 이미지 {profile.num_images}개, 객체 {profile.num_instances}개")
+    report["total"] = total.to_dict()
+
+    output_path = target_path / PROFILE_FILENAME
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, separators=(",", ":"))
+
+    print(f"데이터셋 프로파일 저장 완료: {output_path}")
+    return str(output_path)
+
+
+def summarize_profile(report):
+    """profile.json에서 MLflow metric으로 기록할 요약 값을 추출합니다."""
+    metrics = {}
+    for split, profile in [*report["splits"].items(), ("total", report["total"])]:
+        prefix = f"dataset_{split}"
+        metrics[f"{prefix}_num_images"] = profile["num_images"]
+        metrics[f"{prefix}_num_instances"] = profile["num_instances"]
+        metrics[f"{prefix}_num_classes_present"] = len(profile["class_counts"])
+        metrics[f"{prefix}_images_without_labels"] = profile["images_without_labels"]
+        metrics[f"{prefix}_invalid_label_lines"] = profile["invalid_label_lines"]
+        for name, key in [
+            ("boxes_per_image", "boxes_per_image"),
+            ("image_width", "image_width"),
+            ("image_height", "image_height"),
+            ("file_size_bytes", "file_size_bytes"),
+        ]:
+            stats = profile[key]["stats"]
+            if stats["count"]:
+                metrics[f"{prefix}_{name}_mean"] = stats["mean"]
+                metrics[f"{prefix}_{name}_max"] = stats["max"]
+    return metrics
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="데이터셋 통계 프로파일링")
+    parser.add_argument("--splits_path", type=str, help="분할된 데이터셋 경로", default="./data/splits")
+    parser.add_argument("--target_path", type=str, help="프로파일 결과 저장 경로", default="./data/profile")
+    parser.add_argument("--num_workers", type=int, default=None, help="병렬 워커 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument(
+        "--annotation_store",
+        type=str,
+        default="",
+        help="build_annotation_store 결과 경로 (지정하면 split 디렉토리를 다시 순회하지 않음)",
+    )
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(args):
+    """데이터셋을 프로파일링하고 결과 경로를 반환 (split이 바뀌지 않았으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        input_paths, num_samples = split_cache_inputs(args.splits_path, args.annotation_store, SPLITS)
+        input_manifest = build_manifest(input_paths)
+        fingerprint = compute_fingerprint(STAGE_NAME, {"target_path": args.target_path}, input_manifest=input_manifest)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 기존 프로파일을 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    num_items = num_samples if num_samples is not None else input_manifest["num_files"]
+    with metrics.step("profile", items=num_items):
+        profile_path = profile_dataset(
+            args.splits_path, args.target_path, args.num_workers, args.annotation_store or None
+        )
+    with metrics.step("cache_save"):
+        save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, profile_path, [profile_path])
+    metrics.emit(cache_hit=False)
+    return profile_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
+    except Exception as e:
+        print(f"프로파일링 실패: {e}")
+        sys.exit(1)
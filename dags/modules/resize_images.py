@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+from build_annotation_store import (
+    SPLIT_INDEX_FILENAME,
+    load_annotation_store,
+    load_split_index,
+    save_split_index,
+    split_cache_inputs,
+)
+from PIL import Image
+from stage_cache import (
+    add_cache_arguments,
+    build_manifest,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "resize_images"
+SPLITS = ["train", "val", "test"]
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+# JPEG는 디코딩 단계에서 1/2, 1/4, 1/8로 축소해 읽을 수 있어 전체 해상도 디코딩을 피할 수 있음
+REDUCED_READ_FLAGS = [(8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2)]
+
+
+def read_image(image_path, img_size):
+    """긴 변이 img_size 이상으로 남는 범위에서 가장 작게 축소해 이미지를 읽습니다."""
+    with Image.open(image_path) as image:
+        max_side = max(image.size)
+    for factor, flag in REDUCED_READ_FLAGS:
+        if max_side // factor >= img_size:
+            return cv2.imread(str(image_path), flag)
+    return cv2.imread(str(image_path))
+
+
+def resize_image(args):
+    """
+    이미지 하나를 긴 변이 img_size가 되도록 축소해 저장합니다 (프로세스 풀에서 실행).
+    이미 img_size보다 작은 이미지는 확대하지 않고 그대로 다시 저장합니다.
+    """
+    image_path, output_path, img_size, image_format, quality = args
+    image = read_image(image_path, img_size)
+    if image is None:
+        return image_path, None
+
+    height, width = image.shape[:2]
+    scale = img_size / max(height, width)
+    if scale < 1:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    output_path = Path(output_path)
+    if output_path.suffix == ".png":
+        cv2.imwrite(str(output_path), image)
+    else:
+        cv2.imwrite(str(output_path), image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if image_format == "npy":
+        # ultralytics는 이미지 옆에 같은 이름의 .npy가 있으면 디코딩 대신 배열을 그대로 읽음
+        np.save(output_path.with_suffix(".npy"), image)
+    return image_path, os.path.getsize(output_path)
+
+
+def output_name(image_name):
+    """png는 무손실 포맷을 유지하고, 나머지는 jpg로 다시 인코딩"""
+    stem, suffix = os.path.splitext(image_name)
+    return f"{stem}.png" if suffix.lower() == ".png" else f"{stem}.jpg"
+
+
+def resize_split(split_path, output_path, img_size, image_format="jpg", quality=95, num_workers=None, samples=None):
+    """
+    하나의 split 이미지를 병렬로 축소하고, 정규화 좌표인 라벨은 그대로 복사합니다.
+    samples(저장소 split index의 샘플 목록)를 지정하면 split 디렉토리를 순회하지 않고 목록의 파일만 처리하며,
+    축소된 split의 index 항목 목록을 반환합니다. (samples가 없으면 축소한 이미지 수를 반환)
+    """
+    split_path = Path(split_path)
+    output_path = Path(output_path)
+    images_path = output_path / "images"
+    labels_path = output_path / "labels"
+    # 이전 실행의 결과가 남아있지 않도록 split 디렉토리를 새로 생성
+    shutil.rmtree(output_path, ignore_errors=True)
+    images_path.mkdir(parents=True)
+    labels_path.mkdir(parents=True)
+
+    tasks = []
+    if samples is not None:
+        for sample in samples:
+            image_name = output_name(os.path.basename(sample["image_path"]))
+            tasks.append((sample["image_path"], str(images_path / image_name), img_size, image_format, quality))
+            if sample["label_path"]:
+                shutil.copy2(sample["label_path"], labels_path / os.path.basename(sample["label_path"]))
+    else:
+        with os.scandir(split_path / "images") as entries:
+            for entry in entries:
+                _, suffix = os.path.splitext(entry.name)
+                if not entry.is_file() or suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                tasks.append((entry.path, str(images_path / output_name(entry.name)), img_size, image_format, quality))
+        if (split_path / "labels").exists():
+            for label_path in (split_path / "labels").glob("*.txt"):
+                shutil.copy2(label_path, labels_path / label_path.name)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        results = list(executor.map(resize_image, tasks, chunksize=64))
+    failed = [image_path for image_path, size in results if size is None]
+
+    print(f"{split_path.name}: 이미지 {len(results) - len(failed)}개 축소 완료")
+    if failed:
+        print(f"읽을 수 없는 이미지 {len(failed)}개는 제외했습니다: {failed[:10]}")
+    if samples is None:
+        return len(results) - len(failed)
+    # 다시 인코딩해 파일 크기가 바뀌었으므로 축소된 파일 크기를 index에 기록
+    return [
+        {"image_id": sample["image_id"], "image": os.path.basename(task[1]), "size": size}
+        for sample, task, (_, size) in zip(samples, tasks, results)
+        if size is not None
+    ]
+
+
+def resize_images(
+    splits_path, target_path, img_size=640, image_format="jpg", quality=95, num_workers=None, annotation_store=None
+):
+    """
+    학습용 축소 이미지 캐시 생성
+    split마다 이미지를 긴 변 기준 img_size로 한 번만 축소해 target_path/img_size 아래에 저장합니다.
+    학습 시 epoch마다 원본 해상도 이미지를 디코딩하고 축소하는 비용을 없애기 위해 사용합니다.
+    annotation_store를 지정하고 split 결과에 저장소 index가 있으면 index의 파일 목록을 사용하고,
+    축소된 결과에도 index를 기록해 pack_shards가 디렉토리를 순회하지 않도록 합니다.
+    """
+    splits_path = Path(splits_path)
+    output_path = Path(target_path) / str(img_size)
+    print(f"학습 이미지 축소 중: {splits_path} -> {output_path} (img_size: {img_size}, 포맷: {image_format})")
+
+    store = load_annotation_store(annotation_store) if annotation_store else None
+    split_samples = load_split_index(splits_path, store) if store is not None else None
+    if store is not None and split_samples is None:
+        print("split 결과에 저장소 index가 없거나 저장소와 맞지 않아 split 디렉토리를 순회합니다.")
+
+    resized_index = {}
+    for split in SPLITS:
+        if split_samples is None and not (splits_path / split / "images").exists():
+            raise ValueError(f"split 경로가 존재하지 않습니다: {splits_path / split}")
+        samples = split_samples.get(split, []) if split_samples is not None else None
+        resized_index[split] = resize_split(
+            splits_path / split, output_path / split, img_size, image_format, quality, num_workers, samples
+        )
+
+    if split_samples is not None:
+        save_split_index(output_path, store, resized_index)
+    else:
+        (output_path / SPLIT_INDEX_FILENAME).unlink(missing_ok=True)
+
+    print("학습 이미지 축소 완료")
+    return str(output_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="학습 이미지를 img_size로 미리 축소")
+    parser.add_argument("--splits_path", type=str, help="분할된 데이터셋 경로", default="./data/splits")
+    parser.add_argument("--target_path", type=str, help="축소된 데이터셋 저장 경로", default="./data/resized")
+    parser.add_argument("--img_size", type=int, default=640, help="축소 후 긴 변의 길이")
+    parser.add_argument(
+        "--image_format",
+        type=str,
+        default="jpg",
+        choices=["jpg", "npy"],
+        help="jpg: 다시 인코딩만 수행, npy: 디코딩된 배열도 함께 저장 (디스크를 더 쓰는 대신 디코딩 생략)",
+    )
+    parser.add_argument("--quality", type=int, default=95, help="JPEG 인코딩 품질")
+    parser.add_argument("--num_workers", type=int, default=None, help="병렬 워커 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument(
+        "--annotation_store",
+        type=str,
+        default="",
+        help="build_annotation_store 결과 경로 (지정하면 split 디렉토리를 다시 순회하지 않음)",
+    )
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(args):
+    """split 이미지를 축소하고 결과 경로를 반환 (img_size별 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        params = {
+            "target_path": args.target_path,
+            "img_size": args.img_size,
+            "image_format": args.image_format,
+            "quality": args.quality,
+        }
+        input_paths, num_samples = split_cache_inputs(args.splits_path, args.annotation_store, SPLITS)
+        input_manifest = build_manifest(input_paths)
+        fingerprint = compute_fingerprint(STAGE_NAME, params, input_manifest=input_manifest)
+        # img_size별로 저장 경로가 다르므로 캐시 기록도 img_size별로 유지
+        cache_name = f"{STAGE_NAME}_{args.img_size}"
+        cached = load_cached_result(args.cache_dir, cache_name, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 기존 축소 이미지를 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    num_items = num_samples if num_samples is not None else input_manifest["num_files"]
+    with metrics.step("resize", items=num_items):
+        result_path = resize_images(
+            args.splits_path,
+            args.target_path,
+            args.img_size,
+            args.image_format,
+            args.quality,
+            args.num_workers,
+            args.annotation_store or None,
+        )
+    with metrics.step("cache_save"):
+        save_cached_result(args.cache_dir, cache_name, fingerprint, result_path, [result_path])
+    metrics.emit(cache_hit=False)
+    return result_path
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    try:
+        print(f"XCOM_RETURN:{main(args)}")
+    except Exception as e:
+        print(f"이미지 축소 실패: {e}")
+        sys.exit(1)
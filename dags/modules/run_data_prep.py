@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+데이터 준비 스테이지를 하나의 프로세스에서 순서대로 실행
+스테이지마다 pod를 띄우는 대신 하나의 pod에서 각 모듈의 main()을 직접 호출해
+pod 스케줄링, 이미지 pull, 인터프리터와 라이브러리 import 비용을 한 번만 지불합니다.
+각 스테이지의 인자는 개별 스크립트의 CLI 인자와 동일하며, 스테이지별 결과와 소요 시간을 XCom으로 남깁니다.
+
+사용 예: run_data_prep.py --skip_stages pack_shards -- download_dataset --dataset_url ... -- validate_dataset ...
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import build_annotation_store
+import create_data_yaml
+import dedup_dataset
+import download_dataset
+import pack_shards
+import profile_dataset
+import resize_images
+import split_dataset
+import validate_dataset
+
+KPO_XCOM_PATH = "/airflow/xcom/return.json"
+STAGE_SEPARATOR = "--"
+STAGES = {
+    module.STAGE_NAME: module
+    for module in [
+        download_dataset,
+        build_annotation_store,
+        validate_dataset,
+        dedup_dataset,
+        split_dataset,
+        resize_images,
+        create_data_yaml,
+        profile_dataset,
+        pack_shards,
+    ]
+}
+
+
+def run_data_prep(stage_arguments, skip_stages=()):
+    """
+    stage_arguments에 지정된 순서대로 스테이지 실행 (skip_stages에 포함된 스테이지는 건너뜀)
+    stage_arguments는 스테이지 이름 -> CLI 인자 목록 딕셔너리이며,
+    스테이지 이름 -> {"result", "seconds"} 딕셔너리를 반환합니다. 실패한 스테이지가 있으면 이후 스테이지는 실행하지 않습니다.
+    """
+    unknown = [name for name in [*stage_arguments, *skip_stages] if name not in STAGES]
+    if unknown:
+        raise ValueError(f"알 수 없는 스테이지: {unknown} (사용 가능: {list(STAGES)})")
+
+    results = {}
+    for name, argv in stage_arguments.items():
+        if name in skip_stages:
+            print(f"===== [{name}] 건너뜀 =====")
+            continue
+        module = STAGES[name]
+        print(f"===== [{name}] 시작 =====")
+        start = time.perf_counter()
+        try:
+            result = module.main(module.parse_args([str(arg) for arg in argv]))
+        except Exception as e:
+            raise RuntimeError(f"{name} 스테이지 실패: {e}") from e
+        seconds = time.perf_counter() - start
+        results[name] = {"result": result, "seconds": round(seconds, 3)}
+        print(f"===== [{name}] 완료 ({seconds:.1f}초) =====")
+        print(f"XCOM_RETURN:{name}:{result}")
+
+    print("데이터 준비 스테이지 소요 시간:")
+    for name, stage_result in results.items():
+        print(f"- {name}: {stage_result['seconds']:.1f}초")
+    print(f"- 합계: {sum(stage_result['seconds'] for stage_result in results.values()):.1f}초")
+    return results
+
+
+def split_stage_arguments(argv):
+    """
+    STAGE_SEPARATOR로 구분된 "스테이지 이름 인자..." 묶음을 스테이지 이름 -> 인자 목록 딕셔너리로 변환
+    인자를 JSON 문자열 하나로 직렬화하지 않으므로 Airflow 템플릿으로 렌더링된 값에 따옴표나 역슬래시가 있어도 그대로 전달됩니다.
+    """
+    stage_arguments = {}
+    group = []
+    for token in [*argv, STAGE_SEPARATOR]:
+        if token != STAGE_SEPARATOR:
+            group.append(token)
+            continue
+        if group:
+            name, *stage_argv = group
+            if name in stage_arguments:
+                raise ValueError(f"스테이지가 중복 지정됨: {name}")
+            stage_arguments[name] = stage_argv
+        group = []
+    return stage_arguments
+
+
+def write_xcom_result(result, xcom_path=KPO_XCOM_PATH):
+    """KubernetesPodOperator의 xcom sidecar가 읽을 수 있도록 결과를 JSON 파일로 기록"""
+    Path(xcom_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(xcom_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="데이터 준비 스테이지를 하나의 프로세스에서 실행",
+        usage="%(prog)s [options] -- <stage> [stage args ...] [-- <stage> [stage args ...] ...]",
+    )
+    parser.add_argument(
+        "--skip_stages", type=str, default="", help="건너뛸 스테이지 이름 (쉼표로 구분, 예: resize_images,pack_shards)"
+    )
+    parser.add_argument("--xcom_path", type=str, default="", help="스테이지별 결과를 기록할 XCom 파일 경로")
+
+    # 첫 구분자 앞은 run_data_prep 옵션, 뒤는 스테이지별 인자
+    argv = sys.argv[1:]
+    separator_index = argv.index(STAGE_SEPARATOR) if STAGE_SEPARATOR in argv else len(argv)
+    args = parser.parse_args(argv[:separator_index])
+
+    try:
+        stage_arguments = split_stage_arguments(argv[separator_index:])
+        if not stage_arguments:
+            raise ValueError(f"실행할 스테이지가 없습니다. '{STAGE_SEPARATOR} <stage> [args ...]' 형식으로 지정하세요.")
+        skip_stages = [name.strip() for name in args.skip_stages.split(",") if name.strip()]
+        results = run_data_prep(stage_arguments, skip_stages)
+        if args.xcom_path:
+            write_xcom_result(results, args.xcom_path)
+        print(f"XCOM_RETURN:{json.dumps(results, default=str)}")
+    except Exception as e:
+        print(f"데이터 준비 실패: {e}")
+        sys.exit(1)
@@ -1,93 +1,160 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import shutil
 import sys
 from pathlib import Path
 
+from build_annotation_store import SPLIT_INDEX_FILENAME, load_annotation_store, save_split_index
 from sklearn.model_selection import train_test_split
-
-
-def split_dataset(data_path, target_path, train_ratio=0.7, val_ratio=0.2, test_ratio=0.1):
-    """데이터셋을 학습/검증/테스트 세트로 분할"""
+from stage_cache import (
+    add_cache_arguments,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "split_dataset"
+SPLITS = ["train", "val", "test"]
+
+
+def load_duplicate_groups(duplicates_path, image_names):
+    """
+    dedup_dataset 스테이지 결과로 분할 단위(group)를 만듭니다.
+    제외 목록의 이미지는 빼고, 같은 근접 중복 cluster의 이미지는 하나의 group으로 묶습니다.
+    """
+    with open(duplicates_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+
+    excluded = set(report.get("excluded", []))
+    groups = {name: [name] for name in image_names if name not in excluded}
+    for members in report.get("clusters", []):
+        members = [name for name in members if name in groups]
+        if len(members) < 2:
+            continue
+        for name in members[1:]:
+            del groups[name]
+        groups[members[0]] = members
+
+    print(f"중복 제외: {len(excluded)}개, 분할 group: {len(groups)}개")
+    return groups
+
+
+def split_dataset(
+    data_path,
+    target_path,
+    train_ratio=0.7,
+    val_ratio=0.2,
+    test_ratio=0.1,
+    duplicates_path=None,
+    annotation_store=None,
+):
+    """
+    데이터셋을 학습/검증/테스트 세트로 분할
+    annotation_store를 지정하면 저장소의 이미지별 이미지/라벨 경로를 사용해 데이터셋을 다시 순회하지 않고,
+    split별 저장소 image_id 목록(annotation_index.json)을 함께 기록해 이후 스테이지도 split 디렉토리를 순회하지 않도록 합니다.
+    """
     data_path = Path(data_path)
     target_path = Path(target_path)
     print(f"데이터셋 분할 중: {data_path} -> {target_path}")
 
-    # 이미지와 라벨 디렉토리 찾기
-    images_path = None
-    labels_path = None
-
-    # 여러 이미지 포맷 찾기
-    image_files = []
-    for ext in ["*.jpg", "*.jpeg", "*.png"]:
-        found_files = list(data_path.rglob(ext))
-        if found_files:
-            image_files.extend(found_files)
-            # 첫 번째 발견된 이미지 파일의 디렉토리를 이미지 경로로 설정
-            if images_path is None:
-                images_path = found_files[0].parent
-
-    # 라벨 파일이 있는 디렉토리 찾기
-    for label_path in data_path.rglob("*.txt"):
-        # README.txt와 LICENSE 파일 제외
-        if label_path.name in ["README.txt", "LICENSE"]:
-            continue
-        labels_path = label_path.parent
-        break
-
-    # 경로 존재 확인
-    if not images_path or not images_path.exists():
-        raise ValueError(f"이미지 경로가 존재하지 않습니다: {images_path}")
-    if not labels_path or not labels_path.exists():
-        raise ValueError(f"라벨 경로가 존재하지 않습니다: {labels_path}")
+    # 파일명(stem) -> 원본 이미지/라벨 경로 (같은 파일명, 다른 확장자면 첫 번째 발견된 파일 사용)
+    image_sources = {}
+    label_sources = {}
+    image_ids = {}
+
+    if annotation_store:
+        # 저장소에 기록된 이미지별 라벨 경로를 사용하므로 데이터셋을 다시 순회하지 않음
+        store = load_annotation_store(annotation_store)
+        num_images = len(store)
+        for idx in range(num_images):
+            image_path = store.image_path(idx)
+            if image_path.stem not in image_sources:
+                image_sources[image_path.stem] = image_path
+                label_sources[image_path.stem] = store.label_path(idx)
+                image_ids[image_path.stem] = idx
+    else:
+        # 이미지와 라벨 디렉토리 찾기
+        images_path = None
+        labels_path = None
+
+        # 여러 이미지 포맷 찾기
+        image_files = []
+        for ext in ["*.jpg", "*.jpeg", "*.png"]:
+            found_files = list(data_path.rglob(ext))
+            if found_files:
+                image_files.extend(found_files)
+                # 첫 번째 발견된 이미지 파일의 디렉토리를 이미지 경로로 설정
+                if images_path is None:
+                    images_path = found_files[0].parent
+
+        # 라벨 파일이 있는 디렉토리 찾기
+        for label_path in data_path.rglob("*.txt"):
+            # README.txt와 LICENSE 파일 제외
+            if label_path.name in ["README.txt", "LICENSE"]:
+                continue
+            labels_path = label_path.parent
+            break
+
+        # 경로 존재 확인
+        if not images_path or not images_path.exists():
+            raise ValueError(f"이미지 경로가 존재하지 않습니다: {images_path}")
+        if not labels_path or not labels_path.exists():
+            raise ValueError(f"라벨 경로가 존재하지 않습니다: {labels_path}")
+
+        num_images = len(image_files)
+        for f in image_files:
+            if f.stem not in image_sources:
+                image_sources[f.stem] = images_path / f"{f.stem}{f.suffix}"
+                label_sources[f.stem] = labels_path / f"{f.stem}.txt"
+
+    # 이미지 파일 목록 확인
+    if not image_sources:
+        raise ValueError("이미지 파일이 없습니다")
 
-    # 디렉토리 생성
-    for split in ["train", "val", "test"]:
+    # 디렉토리 생성 (이전 분할 결과가 새 분할과 섞이지 않도록 기존 split 디렉토리는 비움)
+    for split in SPLITS:
+        shutil.rmtree(target_path / split, ignore_errors=True)
         for subdir in ["images", "labels"]:
             (target_path / split / subdir).mkdir(parents=True, exist_ok=True)
 
-    # 이미지 파일 목록 및 해당 확장자 저장
-    if not image_files:
-        raise ValueError("이미지 파일이 없습니다")
-
-    # 파일 이름과 확장자 추출
-    image_infos = [(f.stem, f.suffix) for f in image_files]
-
-    # 중복 제거 (같은 파일명, 다른 확장자)
-    unique_names = {}
-    for stem, suffix in image_infos:
-        # 동일 파일명에서는 첫 번째 발견된 파일 사용
-        if stem not in unique_names:
-            unique_names[stem] = suffix
-
     # 고유한 파일 이름 목록
-    image_names = list(unique_names.keys())
-    print(f"총 이미지 파일: {len(image_files)}개, 고유 파일명: {len(image_names)}개")
+    image_names = list(image_sources.keys())
+    print(f"총 이미지 파일: {num_images}개, 고유 파일명: {len(image_names)}개")
 
     # train/val/test 분할
     if train_ratio + val_ratio + test_ratio >= 1.0:
         raise ValueError("train_ratio + val_ratio + test_ratio 합은 1.0 미만이어야 합니다.")
 
-    train_val, test_names = train_test_split(image_names, test_size=test_ratio)
-    train_names, val_names = train_test_split(train_val, test_size=val_ratio / (train_ratio + val_ratio))
+    # 근접 중복 cluster 단위로 분할해 같은 cluster가 여러 split에 나뉘어 들어가지 않도록 함
+    if duplicates_path:
+        groups = load_duplicate_groups(duplicates_path, image_names)
+    else:
+        groups = {name: [name] for name in image_names}
+
+    train_val, test_groups = train_test_split(list(groups), test_size=test_ratio)
+    train_groups, val_groups = train_test_split(train_val, test_size=val_ratio / (train_ratio + val_ratio))
+
+    train_names = [name for group in train_groups for name in groups[group]]
+    val_names = [name for group in val_groups for name in groups[group]]
+    test_names = [name for group in test_groups for name in groups[group]]
 
     print(f"학습: {len(train_names)}개, 검증: {len(val_names)}개, 테스트: {len(test_names)}개")
 
     # 파일 복사 함수
     def copy_files(names, split_name):
         for name in names:
-            # 파일 확장자 가져오기
-            suffix = unique_names[name]
-
             # 이미지 복사
-            src_img = images_path / f"{name}{suffix}"
+            src_img = image_sources[name]
             # 저장시에는 원본 확장자 유지
-            dst_img = target_path / split_name / "images" / f"{name}{suffix}"
+            dst_img = target_path / split_name / "images" / f"{name}{src_img.suffix}"
             shutil.copy2(src_img, dst_img)
 
             # 라벨 복사 (있는 경우)
-            src_label = labels_path / f"{name}.txt"
-            if src_label.exists():
+            src_label = label_sources[name]
+            if src_label and src_label.exists():
                 dst_label = target_path / split_name / "labels" / f"{name}.txt"
                 shutil.copy2(src_label, dst_label)
 
@@ -96,23 +163,93 @@ def split_dataset(data_path, target_path, train_ratio=0.7, val_ratio=0.2, test_r
     copy_files(val_names, "val")
     copy_files(test_names, "test")
 
+    if annotation_store:
+        splits = {
+            split_name: [
+                {"image_id": image_ids[name], "image": f"{name}{image_sources[name].suffix}"} for name in names
+            ]
+            for split_name, names in [("train", train_names), ("val", val_names), ("test", test_names)]
+        }
+        save_split_index(target_path, store, splits)
+    else:
+        # 저장소 없이 분할한 경우 이전 실행의 index가 남아있지 않도록 제거
+        (target_path / SPLIT_INDEX_FILENAME).unlink(missing_ok=True)
+
     print("데이터셋 분할 완료")
     return str(target_path)
 
 
-if __name__ == "__main__":
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="데이터셋 학습/검증/테스트 분할")
     parser.add_argument("--data_path", type=str, help="원본 데이터셋 경로", default="./data/raw")
     parser.add_argument("--target_path", type=str, help="분할된 데이터셋 저장 경로", default="./data/splits")
     parser.add_argument("--train_ratio", type=float, default=0.7, help="학습 데이터 비율 (기본값: 0.7)")
     parser.add_argument("--val_ratio", type=float, default=0.2, help="검증 데이터 비율 (기본값: 0.2)")
     parser.add_argument("--test_ratio", type=float, default=0.1, help="테스트 데이터 비율 (기본값: 0.1)")
+    parser.add_argument(
+        "--duplicates_path",
+        type=str,
+        default="",
+        help="dedup_dataset 결과(duplicates.json) 경로 (지정하면 cluster 단위 분할)",
+    )
+    parser.add_argument(
+        "--annotation_store",
+        type=str,
+        default="",
+        help="build_annotation_store 결과 경로 (지정하면 데이터셋을 다시 순회하지 않음)",
+    )
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(args):
+    """데이터셋을 분할하고 분할 경로를 반환 (설정과 입력이 같으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        params = {
+            "target_path": args.target_path,
+            "train_ratio": args.train_ratio,
+            "val_ratio": args.val_ratio,
+            "test_ratio": args.test_ratio,
+        }
+        input_paths = [args.annotation_store or args.data_path] + (
+            [args.duplicates_path] if args.duplicates_path else []
+        )
+        fingerprint = compute_fingerprint(STAGE_NAME, params, input_paths)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 동일한 설정으로 분할된 데이터셋을 재사용합니다 ({cached})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    with metrics.step("split") as split_step:
+        result_path = split_dataset(
+            args.data_path,
+            args.target_path,
+            args.train_ratio,
+            args.val_ratio,
+            args.test_ratio,
+            args.duplicates_path or None,
+            args.annotation_store or None,
+        )
+    with metrics.step("cache_save"):
+        # data.yaml 등 다른 스테이지가 target_path에 쓰는 파일은 제외하고 split 디렉토리만 출력으로 기록
+        output_paths = [Path(args.target_path) / split for split in SPLITS]
+        if args.annotation_store:
+            output_paths.append(Path(args.target_path) / SPLIT_INDEX_FILENAME)
+        record = save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, result_path, output_paths)
+    # 분할 결과로 복사된 이미지/라벨 파일 수를 처리 항목 수로 기록
+    split_step["items"] = record["output_manifest"]["num_files"]
+    metrics.emit(cache_hit=False)
+    return result_path
 
-    args = parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
 
     try:
-        result_path = split_dataset(args.data_path, args.target_path, args.train_ratio, args.val_ratio, args.test_ratio)
-        print(f"XCOM_RETURN:{result_path}")
+        print(f"XCOM_RETURN:{main(args)}")
     except Exception as e:
         print(f"분할 실패: {e}")
         sys.exit(1)
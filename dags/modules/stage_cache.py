@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+DAG 스테이지 결과 캐시
+입력 파라미터와 입력 파일 manifest로 fingerprint를 계산하고, 같은 fingerprint로 완료된 실행이 있으면
+스테이지를 다시 실행하지 않고 캐시된 결과를 재사용합니다.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_DIR = os.environ.get("STAGE_CACHE_DIR", "./data/.stage_cache")
+CACHE_VERSION = 1
+# manifest 계산 시 제외할 디렉토리 (캐시 메타데이터 자체가 입력에 섞이지 않도록)
+IGNORED_DIRS = {".stage_cache", "__pycache__"}
+
+
+def _walk_files(root):
+    """root 아래의 모든 파일을 (상대 경로, os.stat_result) 형태로 반환합니다."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    yield os.path.relpath(entry.path, root), entry.stat()
+
+
+def build_manifest(paths):
+    """
+    입력 경로들의 manifest 해시 계산
+    파일 내용을 읽지 않고 (상대 경로, 크기, 수정 시각)만 사용하므로 대용량 데이터셋에서도 stat 호출 비용만 듭니다.
+    """
+    digest = hashlib.sha256()
+    num_files = 0
+    total_bytes = 0
+
+    for path in paths:
+        path = Path(path)
+        digest.update(f"path:{path.absolute()}\n".encode())
+        if not path.exists():
+            digest.update(b"missing\n")
+            continue
+        if path.is_file():
+            files = [(path.name, path.stat())]
+        else:
+            files = sorted(_walk_files(str(path)), key=lambda item: item[0])
+
+        for rel_path, stat in files:
+            digest.update(f"{rel_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+            num_files += 1
+            total_bytes += stat.st_size
+
+    return {"hash": digest.hexdigest(), "num_files": num_files, "total_bytes": total_bytes}
+
+
+def compute_fingerprint(stage_name, params, input_paths=(), input_manifest=None):
+    """
+    스테이지 이름, 파라미터, 입력 manifest로 fingerprint를 계산합니다.
+    파일 수 등 manifest 정보를 함께 사용하려면 build_manifest 결과를 input_manifest로 전달해 다시 계산하지 않도록 합니다.
+    """
+    input_manifest = input_manifest or build_manifest(input_paths)
+    payload = {
+        "version": CACHE_VERSION,
+        "stage": stage_name,
+        "params": params,
+        "inputs": input_manifest["hash"],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _record_path(cache_dir, stage_name):
+    return Path(cache_dir) / f"{stage_name}.json"
+
+
+def load_cached_result(cache_dir, stage_name, fingerprint):
+    """
+    캐시된 결과 조회
+    fingerprint가 일치하고, 기록된 출력 manifest가 현재 출력 파일과 동일할 때만 결과를 반환합니다.
+    출력이 삭제되었거나 변경되었으면 None을 반환해 스테이지를 다시 실행하게 합니다.
+    """
+    record_path = _record_path(cache_dir, stage_name)
+    if not record_path.exists():
+        return None
+
+    try:
+        with open(record_path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if record.get("fingerprint") != fingerprint:
+        return None
+
+    output_paths = record.get("output_paths", [])
+    if build_manifest(output_paths)["hash"] != record.get("output_manifest", {}).get("hash"):
+        print(f"[{stage_name}] 캐시된 출력이 변경되어 캐시를 무시합니다.")
+        return None
+
+    return record.get("result")
+
+
+def save_cached_result(cache_dir, stage_name, fingerprint, result, output_paths=()):
+    """완료된 스테이지의 fingerprint, 결과, 출력 manifest를 기록하고 기록한 내용을 반환합니다."""
+    record_path = _record_path(cache_dir, stage_name)
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+
+    record = {
+        "stage": stage_name,
+        "fingerprint": fingerprint,
+        "result": result,
+        "output_paths": [str(Path(p).absolute()) for p in output_paths],
+        "output_manifest": build_manifest(output_paths),
+    }
+
+    # 중간에 중단되더라도 깨진 기록이 남지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = record_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, record_path)
+    return record
+
+
+def add_cache_arguments(parser):
+    """모든 스테이지에서 공통으로 사용하는 캐시 관련 CLI 인자를 추가합니다."""
+    parser.add_argument("--cache_dir", type=str, default=CACHE_DIR, help="스테이지 캐시 기록 저장 경로")
+    parser.add_argument("--use_cache", type=str, default="True", help="캐시 사용 여부 (False면 스테이지를 다시 실행)")
+    return parser
+
+
+def is_cache_enabled(args):
+    """CLI 인자로 전달된 캐시 사용 여부를 bool로 변환합니다."""
+    return str(args.use_cache).lower() == "true"
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+스테이지 실행 지표 수집
+스테이지의 세부 단계마다 wall/CPU 시간, 최대 메모리(RSS), 디스크 I/O, 처리 항목 수와 처리량을 측정하고
+`STAGE_METRICS:` JSON 한 줄로 출력합니다. MLflow run이 활성화되어 있으면 metric으로 기록하고,
+PUSHGATEWAY_URL 환경변수가 설정되어 있으면 Prometheus Pushgateway에도 전송합니다.
+CPU 시간, 메모리, I/O에는 종료된 자식 프로세스(ProcessPoolExecutor 워커 등)의 사용량이 포함됩니다.
+"""
+
+import json
+import os
+import re
+import resource
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+
+PUSHGATEWAY_URL = os.environ.get("PUSHGATEWAY_URL", "")
+PUSHGATEWAY_JOB = os.environ.get("PUSHGATEWAY_JOB", "yolo_pipeline")
+# rusage의 ru_inblock/ru_oublock 단위 (512바이트 블록)
+BLOCK_SIZE = 512
+
+
+def _snapshot():
+    """현재 프로세스와 종료된 자식 프로세스의 누적 자원 사용량"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "wall": time.perf_counter(),
+        "cpu_user": own.ru_utime + children.ru_utime,
+        "cpu_system": own.ru_stime + children.ru_stime,
+        "in_blocks": own.ru_inblock + children.ru_inblock,
+        "out_blocks": own.ru_oublock + children.ru_oublock,
+        # 리눅스에서 ru_maxrss는 KB 단위이며 프로세스 생애 전체의 최대값
+        "max_rss_kb": max(own.ru_maxrss, children.ru_maxrss),
+    }
+
+
+def _usage_delta(start, end):
+    wall_seconds = end["wall"] - start["wall"]
+    cpu_seconds = (end["cpu_user"] - start["cpu_user"]) + (end["cpu_system"] - start["cpu_system"])
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_user_seconds": round(end["cpu_user"] - start["cpu_user"], 4),
+        "cpu_system_seconds": round(end["cpu_system"] - start["cpu_system"], 4),
+        # 병렬 워커를 사용하면 1보다 커짐 (사용한 코어 수에 해당)
+        "cpu_utilization": round(cpu_seconds / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+        "read_bytes": (end["in_blocks"] - start["in_blocks"]) * BLOCK_SIZE,
+        "write_bytes": (end["out_blocks"] - start["out_blocks"]) * BLOCK_SIZE,
+        "max_rss_mb": round(end["max_rss_kb"] / 1024, 1),
+    }
+
+
+def _numeric_items(record):
+    return {
+        key: value for key, value in record.items() if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+class StageMetrics:
+    """
+    스테이지 지표 수집기
+    step() 컨텍스트로 세부 단계를 측정하고, emit()으로 결과를 출력/기록합니다.
+    step()이 반환하는 딕셔너리의 "items"에 처리 항목 수를 지정하면 처리량(items_per_second)이 함께 계산됩니다.
+    """
+
+    def __init__(self, stage_name):
+        self.stage_name = stage_name
+        self.steps = []
+        self._start = _snapshot()
+
+    @contextmanager
+    def step(self, name, items=None):
+        record = {"step": name, "items": items}
+        start = _snapshot()
+        try:
+            yield record
+        finally:
+            record.update(_usage_delta(start, _snapshot()))
+            self.steps.append(record)
+
+    def summary(self, **extra):
+        """전체 구간과 단계별 지표 딕셔너리 (extra는 cache_hit 등 스테이지 정보)"""
+        steps = []
+        for record in self.steps:
+            record = dict(record)
+            if record["items"] is not None and record["wall_seconds"] > 0:
+                record["items_per_second"] = round(record["items"] / record["wall_seconds"], 2)
+            steps.append(record)
+        return {
+            "stage": self.stage_name,
+            **extra,
+            "total": _usage_delta(self._start, _snapshot()),
+            "steps": steps,
+        }
+
+    def emit(self, logger=None, **extra):
+        """
+        지표를 STAGE_METRICS JSON 한 줄로 출력하고 MLflow와 Pushgateway에 기록
+        기록 실패는 스테이지 결과에 영향을 주지 않도록 경고만 출력합니다.
+        """
+        summary = self.summary(**extra)
+        print(f"STAGE_METRICS:{json.dumps(summary, default=str)}")
+        try:
+            log_to_mlflow(summary, logger)
+        except Exception as e:
+            print(f"[경고] 스테이지 지표 MLflow 기록 실패: {e}")
+        if PUSHGATEWAY_URL:
+            try:
+                push_to_gateway(summary, PUSHGATEWAY_URL)
+            except Exception as e:
+                print(f"[경고] 스테이지 지표 Pushgateway 전송 실패: {e}")
+        return summary
+
+
+def flatten_metrics(summary):
+    """summary를 "stage/<stage>/<step>/<지표>" 형태의 MLflow metric 딕셔너리로 변환"""
+    prefix = f"stage/{summary['stage']}"
+    metrics = {f"{prefix}/total/{key}": value for key, value in _numeric_items(summary["total"]).items()}
+    for record in summary["steps"]:
+        for key, value in _numeric_items(record).items():
+            metrics[f"{prefix}/{record['step']}/{key}"] = value
+    return metrics
+
+
+def log_to_mlflow(summary, logger=None):
+    """
+    logger(MlflowBatchLogger)가 주어지면 logger로, 아니면 활성화된 MLflow run이 있을 때만 기록
+    mlflow import 비용이 크므로 데이터 준비 스테이지처럼 mlflow를 사용하지 않는 프로세스에서는 import하지 않습니다.
+    """
+    metrics = flatten_metrics(summary)
+    if logger is not None:
+        logger.log_metrics(metrics)
+        return
+    mlflow = sys.modules.get("mlflow")
+    if mlflow is not None and mlflow.active_run() is not None:
+        mlflow.log_metrics(metrics)
+
+
+def push_to_gateway(summary, url, job=PUSHGATEWAY_JOB, timeout=5):
+    """
+    Prometheus text 포맷으로 Pushgateway에 전송
+    grouping key는 job과 stage이며, PUT 요청이므로 같은 스테이지의 이전 지표는 교체됩니다.
+    """
+    stage = re.sub(r"[^A-Za-z0-9_]", "_", summary["stage"])
+    rows = [("total", summary["total"])] + [(record["step"], record) for record in summary["steps"]]
+    families = {}
+    for step, record in rows:
+        for key, value in _numeric_items(record).items():
+            families.setdefault(f"pipeline_stage_{key}", []).append(f'{{step="{step}"}} {value}')
+
+    lines = []
+    for name, samples in families.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f"{name}{sample}" for sample in samples)
+    body = ("\n".join(lines) + "\n").encode()
+
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/metrics/job/{job}/stage/{stage}",
+        data=body,
+        method="PUT",
+        headers={"Content-Type": "text/plain; version=0.0.4"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
@@ -9,10 +9,20 @@ from urllib.parse import urljoin
 import mlflow
 import requests
 import yaml
+from benchmark_onnx import benchmark_onnx, summarize_benchmark
+from export_variants import PRIMARY_VARIANT, export_variants
+from mlflow_logger import MlflowBatchLogger
+from pack_shards import unpack_shards
+from profile_dataset import summarize_profile
+from stage_metrics import StageMetrics
 from ultralytics import YOLO, settings
 
 MLFLOW_TRACKING_URI = os.environ.get("MLFLOW_TRACKING_URI", "http://localhost:5000")
 os.environ["MLFLOW_KEEP_RUN_ACTIVE"] = "true"
+# KubernetesPodOperator(do_xcom_push=True)의 sidecar가 읽어가는 결과 파일 경로
+KPO_XCOM_PATH = "/airflow/xcom/return.json"
+# 등록 기준으로 사용하는 지연 시간 metric (서빙 요청 단위인 batch 1의 p95)
+GATE_LATENCY_METRIC = "latency_b1_p95_ms"
 
 
 class YOLOModel:
@@ -22,7 +32,9 @@ class YOLOModel:
         self.run_name = run_name
         self.experiment_name = experiment_name
         self.model_path = model_path
+        self.data_yaml_path = None
         self.mlflow_enabled = True
+        self.logger = None
 
         # MLflow 서버가 살아있는지 health check
         try:
@@ -33,6 +45,8 @@ class YOLOModel:
                 print(f"mlflow artifact uri: {mlflow.get_artifact_uri()}")
                 mlflow.set_experiment(experiment_name)
                 mlflow.start_run(run_name=self.run_name, nested=True)
+                # param/metric은 모아서 log_batch로 전송하고 artifact는 백그라운드에서 업로드
+                self.logger = MlflowBatchLogger(mlflow.active_run().info.run_id)
                 settings.update({"mlflow": True})
             else:
                 raise ConnectionError(f"MLflow 서버 응답 오류: {response.status_code}")
@@ -42,10 +56,11 @@ class YOLOModel:
             self.mlflow_enabled = False
             settings.update({"mlflow": False})
 
-    def log_dataset_info(self, data_yaml_path):
+    def log_dataset_info(self, data_yaml_path, profile_path=None):
         """
         데이터셋 정보 로깅
         앞서 생성한 data.yaml 파일을 읽어서 데이터셋 정보를 MLflow에 기록
+        profile_path가 주어지면 profile_dataset 스테이지의 통계 요약을 metric으로, 원본을 artifact로 기록
         """
         if not self.mlflow_enabled:
             print("MLflow 기능이 비활성화되어 데이터셋 정보를 로깅할 수 없습니다.")
@@ -63,20 +78,47 @@ class YOLOModel:
             "class_names": list(data_config.get("names", {}).values()),
         }
 
-        mlflow.log_param("dataset_path", dataset_info["dataset_path"])
-        mlflow.log_param("train_path", dataset_info["train_path"])
-        mlflow.log_param("val_path", dataset_info["val_path"])
-        mlflow.log_param("test_path", dataset_info["test_path"])
-        mlflow.log_param("num_classes", dataset_info["num_classes"])
-        mlflow.log_param("class_names", json.dumps(dataset_info["class_names"]))
+        self.logger.log_params(
+            {
+                "dataset_path": dataset_info["dataset_path"],
+                "train_path": dataset_info["train_path"],
+                "val_path": dataset_info["val_path"],
+                "test_path": dataset_info["test_path"],
+                "num_classes": dataset_info["num_classes"],
+                "class_names": json.dumps(dataset_info["class_names"]),
+            }
+        )
+
+        if profile_path and Path(profile_path).exists():
+            with open(profile_path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+            self.logger.log_metrics(summarize_profile(profile))
+            self.logger.log_artifact(local_path=profile_path, artifact_path="dataset_profile")
+        # 학습이 시작되기 전에 데이터셋 정보를 한 번에 전송
+        self.logger.flush()
 
-    def train(self, data_yaml_path, epochs=10, batch_size=16, img_size=640):
+    def train(
+        self,
+        data_yaml_path,
+        epochs=10,
+        batch_size=16,
+        img_size=640,
+        profile_path=None,
+        hyperparameters=None,
+        output_dir=None,
+    ):
+        """
+        모델 학습
+        hyperparameters는 ultralytics train 인자(lr0, momentum 등)로 그대로 전달되며,
+        output_dir을 지정하면 학습 결과(weights 등)를 experiment 이름 대신 해당 경로에 저장
+        """
         print(f"학습 시작 (Epochs: {epochs}, Batch Size: {batch_size}, Img Size: {img_size})...")
 
         if not Path(data_yaml_path).exists():
             raise ValueError(f"YAML 파일이 존재하지 않습니다: {data_yaml_path}")
 
-        self.log_dataset_info(data_yaml_path)
+        self.data_yaml_path = data_yaml_path
+        self.log_dataset_info(data_yaml_path, profile_path)
 
         train_results = self.model.train(
             data=data_yaml_path,
@@ -84,8 +126,9 @@ class YOLOModel:
             batch=batch_size,
             imgsz=img_size,
             exist_ok=True,
-            project=self.experiment_name,
+            project=output_dir or self.experiment_name,
             name=self.run_name,
+            **(hyperparameters or {}),
         )
         return train_results
 
@@ -94,26 +137,51 @@ class YOLOModel:
             print("MLflow 기능이 비활성화되어 모델 검증을 건너뜁니다.")
             return
 
-        valid_results = self.model.val(exist_ok=True, name=self.run_name)
+        # 학습 없이 등록만 하는 경우에도 같은 데이터셋으로 검증하도록 data.yaml 경로를 명시
+        data_kwargs = {"data": self.data_yaml_path} if self.data_yaml_path else {}
+        valid_results = self.model.val(exist_ok=True, name=self.run_name, **data_kwargs)
 
         # 모델 성능 메트릭 로깅
-        mlflow.log_metric("mAP50-95", valid_results.box.map)
-        mlflow.log_metric("inference_speed", valid_results.speed["inference"])
+        self.logger.log_metrics(
+            {"mAP50-95": valid_results.box.map, "inference_speed": valid_results.speed["inference"]}
+        )
 
         return valid_results
 
-    def register_model(self, valid_results, force_register):
+    def benchmark(self, onnx_path, img_size=640):
+        """내보낸 ONNX 모델의 CPU 추론 지연 시간과 처리량을 측정해 MLflow에 기록"""
+        metrics = summarize_benchmark(benchmark_onnx(onnx_path, img_size=img_size))
+        self.logger.log_metrics(metrics)
+        return metrics
+
+    def register_model(
+        self,
+        valid_results,
+        force_register,
+        img_size=640,
+        max_latency_ms=0.0,
+        max_latency_regression=0.1,
+        min_map_delta=0.0,
+        variant_options=None,
+    ):
         """
         모델 등록
-        MLflow에 등록된 모델 중 최신 모델을 가져오고, 이전 모델의 성능을 비교하여 성능이 향상된 경우 모델을 등록
+        ONNX로 내보낸 모델을 onnxruntime(CPU)으로 벤치마크한 뒤, MLflow에 등록된 최신 모델과 비교하여 아래 기준을 모두 통과한 경우 모델을 등록
+        - mAP50-95 향상폭이 min_map_delta보다 커야 함 (음수로 설정하면 그만큼의 정확도 하락을 허용)
+        - batch 1 p95 지연 시간이 max_latency_ms 이하여야 함 (0이면 검사하지 않음)
+        - batch 1 p95 지연 시간이 이전 모델 대비 max_latency_regression 비율을 넘게 늘어나지 않아야 함
+        variant_options가 주어지면 최적화된 ONNX variant도 함께 등록하며, 기본 모델은 항상 마지막 버전으로 등록
         """
         if not self.mlflow_enabled:
             print("MLflow 기능이 비활성화되어 모델 등록을 건너뜁니다.")
             return False
 
+        # ONNX 형식으로 모델 내보내기 (서빙과 같은 조건으로 지연 시간을 측정하기 위해 등록 판단 전에 내보냄)
+        onnx_path = self.model.export(format="onnx", dynamic=True)
+
         # 현재 모델의 성능 메트릭 가져오기
         current_map = valid_results.box.map
-        current_inference_speed = valid_results.speed["inference"]
+        current_latency = self.benchmark(onnx_path, img_size)[GATE_LATENCY_METRIC]
 
         client = mlflow.tracking.MlflowClient()
 
@@ -121,36 +189,196 @@ class YOLOModel:
             registered_model = client.get_registered_model(self.run_name)
             latest_run = client.get_run(registered_model.latest_versions[0].run_id)
             previous_map = latest_run.data.metrics.get("mAP50-95", 0)
-            previous_inference_speed = latest_run.data.metrics.get("inference_speed", 0)
+            # 벤치마크 도입 이전에 등록된 모델은 지연 시간 metric이 없으므로 비교하지 않음
+            previous_latency = latest_run.data.metrics.get(GATE_LATENCY_METRIC)
         except mlflow.exceptions.RestException:
             # 모델이 레지스트리에 없는 경우
             previous_map = 0
-            previous_inference_speed = 0
+            previous_latency = None
 
+        previous_latency_text = f"{previous_latency:.2f}" if previous_latency is not None else "없음"
         print(
             f"모델 성능 비교 - mAP50-95: {previous_map:.3f} -> {current_map:.3f}, "
-            f"추론 속도 비교 - inference_speed: {previous_inference_speed:.3f} -> {current_inference_speed:.3f}"
+            f"추론 지연 시간 비교 - {GATE_LATENCY_METRIC}: {previous_latency_text} -> {current_latency:.2f}"
         )
 
-        # 성능이 향상된 경우에만 모델 등록
+        failures = []
+        if current_map - previous_map <= min_map_delta:
+            failures.append(f"mAP50-95 향상폭 {current_map - previous_map:.3f}이 기준 {min_map_delta}보다 크지 않음")
+        if max_latency_ms > 0 and current_latency > max_latency_ms:
+            failures.append(f"p95 지연 시간 {current_latency:.2f}ms가 최대 허용값 {max_latency_ms}ms를 초과")
+        if previous_latency and current_latency > previous_latency * (1 + max_latency_regression):
+            failures.append(
+                f"p95 지연 시간이 이전 모델 대비 {current_latency / previous_latency - 1:.1%} 증가 "
+                f"(허용: {max_latency_regression:.1%})"
+            )
+        self.logger.log_metric("registration_gate_passed", int(not failures))
+
+        # 기준을 모두 통과한 경우에만 모델 등록
         if force_register.lower() == "true":
             print("force_register 옵션이 활성화되어 모델을 강제 등록합니다.")
-        elif current_map > previous_map and current_inference_speed > previous_inference_speed:
-            print("현재 모델의 성능이 이전 모델보다 향상되어 등록을 진행합니다.")
+        elif not failures:
+            print("현재 모델이 정확도/지연 시간 기준을 통과하여 등록을 진행합니다.")
         else:
-            print("현재 모델의 성능이 이전 모델보다 낮아 등록을 건너뜁니다.")
+            print("현재 모델이 등록 기준을 통과하지 못해 등록을 건너뜁니다.")
+            for failure in failures:
+                print(f"- {failure}")
             return False
 
-        # ONNX 형식으로 모델 내보내기
-        onnx_path = self.model.export(format="onnx", dynamic=True)
-
         # 현재 실행 중인 MLflow run에 아티팩트로 모델 저장
-        mlflow.log_artifact(local_path=onnx_path)
+        primary_upload = self.logger.log_artifact(local_path=onnx_path)
+        run_id = self.logger.run_id
+
+        versions = {}
+        variant_tags = {}
+        if variant_options:
+            # variant export가 같은 파일을 덮어쓰므로 기본 모델 업로드가 끝난 뒤 variant 생성
+            primary_upload.result()
+            variants = export_variants(
+                self.model,
+                Path(onnx_path).parent / "variants",
+                self._val_path(),
+                img_size,
+                variant_options.get("static_batch_sizes"),
+                variant_options.get("int8_mode", "static"),
+                variant_options.get("calibration_size", 64),
+            )
+            variant_tags = self.evaluate_variants(variants, img_size)
+            variants.pop(PRIMARY_VARIANT)
+            for variant in variants.values():
+                self.logger.log_artifact(local_path=variant["path"], artifact_path="variants")
+
+        # 모델 등록은 업로드된 artifact를 참조하므로 모든 업로드가 끝날 때까지 대기
+        self.logger.wait()
+
+        if variant_options:
+            for name, variant in variants.items():
+                model_version = mlflow.register_model(
+                    f"runs:/{run_id}/variants/{os.path.basename(variant['path'])}",
+                    self.run_name,
+                    tags=variant_tags[name],
+                )
+                versions[name] = model_version.version
 
         # Model Registry에 모델 등록 또는 업데이트
-        mlflow.register_model(f"runs:/{mlflow.active_run().info.run_id}/{os.path.basename(onnx_path)}", self.run_name)
+        # 배포 설정은 최신 버전을 사용하므로 기본 모델을 가장 마지막에 등록
+        model_version = mlflow.register_model(
+            f"runs:/{run_id}/{os.path.basename(onnx_path)}",
+            self.run_name,
+            tags=variant_tags.get(PRIMARY_VARIANT, {"variant": PRIMARY_VARIANT}),
+        )
+        versions[PRIMARY_VARIANT] = model_version.version
+
+        if variant_tags:
+            self.set_fastest_alias(variant_tags, versions, variant_options.get("map_budget", 0.01))
         return True
 
+    def _val_path(self):
+        with open(self.data_yaml_path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)["val"]
+
+    def evaluate_onnx(self, onnx_path, img_size=640, batch_size=1):
+        """ONNX 모델을 검증 split으로 평가해 mAP50-95를 반환"""
+        valid_results = YOLO(onnx_path, task="detect").val(
+            data=self.data_yaml_path,
+            imgsz=img_size,
+            batch=batch_size,
+            exist_ok=True,
+            project=self.experiment_name,
+            name=f"{self.run_name}-{Path(onnx_path).stem}",
+        )
+        return valid_results.box.map
+
+    def evaluate_variants(self, variants, img_size=640):
+        """
+        variant별 CPU 지연 시간과 기본 모델 대비 mAP50-95 차이를 측정해 Model Registry 태그로 만듭니다.
+        static variant는 기본 모델과 같은 그래프에서 배치 크기만 고정한 것이므로 정확도 평가를 생략하고 기본 모델 결과를 사용합니다.
+        """
+        maps = {}
+        variant_tags = {}
+        for name, variant in variants.items():
+            batch_size = variant["batch_size"] or 1
+            latency = benchmark_onnx(variant["path"], img_size, [batch_size])[batch_size]
+            if variant["batch_size"] is None:
+                maps[name] = self.evaluate_onnx(variant["path"], img_size)
+            else:
+                maps[name] = maps[PRIMARY_VARIANT]
+            map_delta = maps[name] - maps[PRIMARY_VARIANT]
+
+            self.logger.log_metrics(
+                {
+                    f"variant_{name}_latency_p95_ms": latency["p95_ms"],
+                    f"variant_{name}_throughput": latency["throughput"],
+                    f"variant_{name}_map_delta": map_delta,
+                }
+            )
+            variant_tags[name] = {
+                "variant": name,
+                "batch_size": str(variant["batch_size"] or "dynamic"),
+                "latency_p50_ms": f"{latency['p50_ms']:.3f}",
+                "latency_p95_ms": f"{latency['p95_ms']:.3f}",
+                "throughput": f"{latency['throughput']:.1f}",
+                "mAP50-95": f"{maps[name]:.4f}",
+                "map_delta": f"{map_delta:.4f}",
+            }
+            print(f"{name}: p95 {latency['p95_ms']:.2f}ms (batch {batch_size}), mAP50-95 변화 {map_delta:+.4f}")
+        return variant_tags
+
+    def set_fastest_alias(self, variant_tags, versions, map_budget=0.01):
+        """
+        정확도 하락이 map_budget 이내인 variant 중 batch 1 요청을 처리할 수 있고 p95 지연 시간이 가장 짧은 버전에 fastest alias 지정
+        """
+        candidates = [
+            name
+            for name, tags in variant_tags.items()
+            if tags["batch_size"] in ["dynamic", "1"] and float(tags["map_delta"]) >= -map_budget
+        ]
+        if not candidates:
+            print(f"정확도 하락 허용 범위({map_budget}) 안의 variant가 없어 fastest alias를 지정하지 않습니다.")
+            return None
+
+        fastest = min(candidates, key=lambda name: float(variant_tags[name]["latency_p95_ms"]))
+        client = mlflow.tracking.MlflowClient()
+        client.set_registered_model_alias(self.run_name, "fastest", versions[fastest])
+        print(f"fastest alias 지정: {fastest} (버전 {versions[fastest]})")
+        return fastest
+
+    def end_run(self):
+        """남은 로그 전송과 artifact 업로드가 끝날 때까지 기다린 뒤 MLflow run 종료"""
+        if self.logger:
+            self.logger.close()
+        mlflow.end_run()
+
+
+def write_xcom_result(result):
+    """KubernetesPodOperator의 xcom sidecar가 읽을 수 있도록 결과를 JSON 파일로 기록"""
+    Path(KPO_XCOM_PATH).parent.mkdir(parents=True, exist_ok=True)
+    with open(KPO_XCOM_PATH, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def prepare_local_dataset(data_yaml_path, shards_path, local_data_dir):
+    """
+    shard로 패킹된 데이터셋을 로컬 디스크에 순차적으로 풀고, 로컬 경로를 가리키는 data.yaml을 생성합니다.
+    네트워크 스토리지의 작은 파일을 epoch마다 임의로 읽는 대신 큰 shard를 한 번만 순차적으로 읽습니다.
+    """
+    unpack_shards(shards_path, local_data_dir)
+
+    with open(data_yaml_path, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    local_data_dir = Path(local_data_dir).absolute()
+    config["path"] = str(local_data_dir)
+    for split in ["train", "val", "test"]:
+        config[split] = str(local_data_dir / split)
+
+    local_yaml_path = local_data_dir / "data.yaml"
+    with open(local_yaml_path, "w", encoding="utf-8") as f:
+        yaml.dump(config, f, default_flow_style=False)
+
+    print(f"로컬 데이터셋 준비 완료: {local_yaml_path}")
+    return str(local_yaml_path)
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="YOLO 모델 학습")
@@ -162,20 +390,116 @@ if __name__ == "__main__":
     parser.add_argument("--img_size", type=int, default=640, help="이미지 크기")
     parser.add_argument("--run_name", type=str, default="yolo11n-onnx", help="mlflow run name & model name")
     parser.add_argument("--force_register", type=str, default="False", help="모델 강제 등록 여부")
+    parser.add_argument("--model_path", type=str, default="yolo11n.pt", help="학습을 시작할 모델 가중치 경로")
+    parser.add_argument(
+        "--hyperparameters", type=str, default="{}", help="ultralytics train에 전달할 추가 하이퍼파라미터 (JSON)"
+    )
+    parser.add_argument(
+        "--trial_id", type=str, default="", help="sweep trial ID (지정하면 등록 없이 학습 결과만 xcom으로 반환)"
+    )
+    parser.add_argument("--output_dir", type=str, default="", help="학습 결과 저장 경로 (sweep trial에서 사용)")
+    parser.add_argument(
+        "--register_only", type=str, default="False", help="학습 없이 model_path의 가중치를 검증 후 등록"
+    )
+    parser.add_argument(
+        "--shards_path", type=str, default="", help="shard 데이터셋 경로 (지정하면 로컬 디스크에 풀어서 학습)"
+    )
+    parser.add_argument(
+        "--local_data_dir", type=str, default="/tmp/yolo_dataset", help="shard를 풀어놓을 로컬 디렉토리"
+    )
+    parser.add_argument("--profile_path", type=str, default="", help="profile_dataset 스테이지의 profile.json 경로")
+    parser.add_argument(
+        "--max_latency_ms", type=float, default=0.0, help="등록 허용 최대 batch 1 p95 지연 시간 (ms, 0이면 검사 안 함)"
+    )
+    parser.add_argument(
+        "--max_latency_regression", type=float, default=0.1, help="이전 모델 대비 허용 p95 지연 시간 증가 비율"
+    )
+    parser.add_argument(
+        "--min_map_delta", type=float, default=0.0, help="등록에 필요한 최소 mAP50-95 향상폭 (음수면 하락 허용)"
+    )
+    parser.add_argument("--export_variants", type=str, default="False", help="최적화된 ONNX variant 생성 및 등록 여부")
+    parser.add_argument(
+        "--static_batch_sizes", type=str, default="1,8", help="static shape variant를 만들 배치 크기 (쉼표 구분)"
+    )
+    parser.add_argument(
+        "--int8_mode", type=str, default="static", choices=["static", "dynamic", "none"], help="INT8 양자화 방식"
+    )
+    parser.add_argument("--calibration_size", type=int, default=64, help="INT8 calibration에 사용할 검증 이미지 수")
+    parser.add_argument(
+        "--variant_map_budget", type=float, default=0.01, help="fastest alias 선정 시 허용하는 최대 mAP50-95 하락폭"
+    )
 
     args = parser.parse_args()
 
     try:
-        yolo_model = YOLOModel()
-        train_results = yolo_model.train(
-            data_yaml_path=args.data_yaml_path,
-            epochs=args.epochs,
-            batch_size=args.batch_size,
-            img_size=args.img_size,
-        )
-        valid_results = yolo_model.validate()
-        is_registered = yolo_model.register_model(valid_results, args.force_register)
-        mlflow.end_run()
+        metrics = StageMetrics("train_yolo")
+        data_yaml_path = args.data_yaml_path
+        if args.shards_path:
+            with metrics.step("prepare_local_dataset"):
+                data_yaml_path = prepare_local_dataset(args.data_yaml_path, args.shards_path, args.local_data_dir)
+
+        hyperparameters = json.loads(args.hyperparameters)
+
+        if args.trial_id:
+            # sweep trial: 학습 후 최종 epoch 검증 결과와 가중치 경로만 반환하고 등록은 register_best 단계에서 수행
+            yolo_model = YOLOModel(run_name=f"{args.run_name}-{args.trial_id}", model_path=args.model_path)
+            with metrics.step("train"):
+                train_results = yolo_model.train(
+                    data_yaml_path=data_yaml_path,
+                    epochs=args.epochs,
+                    batch_size=args.batch_size,
+                    img_size=args.img_size,
+                    hyperparameters=hyperparameters,
+                    output_dir=args.output_dir or None,
+                )
+            trial_result = {
+                "trial_id": args.trial_id,
+                "map": float(train_results.box.map),
+                "weights": str(yolo_model.model.trainer.best),
+                "params": {"batch_size": args.batch_size, "img_size": args.img_size, **hyperparameters},
+            }
+            metrics.emit(logger=yolo_model.logger, trial_id=args.trial_id)
+            yolo_model.end_run()
+            write_xcom_result(trial_result)
+            print(f"XCOM_RETURN:{trial_result}")
+            sys.exit(0)
+
+        yolo_model = YOLOModel(run_name=args.run_name, model_path=args.model_path)
+        if args.register_only.lower() == "true":
+            yolo_model.data_yaml_path = data_yaml_path
+            yolo_model.log_dataset_info(data_yaml_path, args.profile_path)
+        else:
+            with metrics.step("train"):
+                train_results = yolo_model.train(
+                    data_yaml_path=data_yaml_path,
+                    epochs=args.epochs,
+                    batch_size=args.batch_size,
+                    img_size=args.img_size,
+                    profile_path=args.profile_path,
+                    hyperparameters=hyperparameters,
+                )
+        with metrics.step("validate"):
+            valid_results = yolo_model.validate()
+        variant_options = None
+        if args.export_variants.lower() == "true":
+            variant_options = {
+                "static_batch_sizes": [int(size) for size in args.static_batch_sizes.split(",") if size],
+                "int8_mode": args.int8_mode,
+                "calibration_size": args.calibration_size,
+                "map_budget": args.variant_map_budget,
+            }
+        with metrics.step("register"):
+            is_registered = yolo_model.register_model(
+                valid_results,
+                args.force_register,
+                img_size=args.img_size,
+                max_latency_ms=args.max_latency_ms,
+                max_latency_regression=args.max_latency_regression,
+                min_map_delta=args.min_map_delta,
+                variant_options=variant_options,
+            )
+        metrics.emit(logger=yolo_model.logger, is_registered=is_registered)
+        yolo_model.end_run()
         print(f"XCOM_RETURN:{is_registered}")
     except Exception as e:
         print(f"학습 실패: {e}")
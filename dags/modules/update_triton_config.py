@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import fcntl
 import os
 import shutil
 import subprocess
@@ -15,24 +16,65 @@ GIT_EMAIL = os.environ.get("GIT_EMAIL", "")
 GIT_TOKEN = os.environ.get("GIT_TOKEN", "")
 
 
-def clone_repo(repo_url, branch="main", target_dir=None):
-    """Git repository를 clone합니다."""
+def get_auth_repo_url(repo_url):
+    """Git 토큰이 있는 경우 URL에 인증 정보 추가"""
+    # https://github.com/user/repo.git -> https://token@github.com/user/repo.git
+    if GIT_TOKEN and repo_url.startswith("https://"):
+        return repo_url.replace("https://", f"https://{GIT_TOKEN}@")
+    return repo_url
+
+
+def run_git(args, cwd=None):
+    """git 명령 실행 (실패하면 CalledProcessError 발생)"""
+    command = ["git"] + (["-C", cwd] if cwd else []) + args
+    return subprocess.run(command, check=True, capture_output=True, text=True)
+
+
+def update_mirror(repo_url, mirror_dir):
+    """
+    PVC에 유지하는 bare mirror를 생성하거나 변경된 부분만 fetch합니다.
+    토큰이 mirror 설정에 남지 않도록 원격 URL은 fetch할 때만 인자로 전달합니다.
+    """
+    lock_path = f"{mirror_dir.rstrip('/')}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    # 여러 DAG 실행이 같은 mirror를 동시에 갱신하지 않도록 파일 잠금
+    with open(lock_path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if not os.path.exists(os.path.join(mirror_dir, "HEAD")):
+            print(f"Git mirror 생성 중: {mirror_dir}")
+            run_git(["init", "--bare", mirror_dir])
+            # 로컬 clone에서 blob 필터(--filter=blob:none)를 사용할 수 있도록 허용
+            run_git(["config", "uploadpack.allowFilter", "true"], cwd=mirror_dir)
+        print(f"Git mirror 업데이트 중: {repo_url} -> {mirror_dir}")
+        run_git(["fetch", "--prune", get_auth_repo_url(repo_url), "+refs/heads/*:refs/heads/*"], cwd=mirror_dir)
+
+
+def clone_repo(repo_url, branch="main", target_dir=None, mirror_dir=None, sparse_paths=None):
+    """
+    Git repository를 clone합니다.
+    최신 커밋 하나만(--depth 1) blob 없이 받아서 sparse_paths에 해당하는 파일만 checkout하며,
+    mirror_dir이 주어지면 원격 대신 PVC의 mirror에서 clone합니다.
+    """
     if target_dir is None:
         target_dir = tempfile.mkdtemp()
 
-    # Git 토큰이 있는 경우 URL에 인증 정보 추가
-    auth_repo_url = repo_url
-    if GIT_TOKEN:
-        # https://github.com/user/repo.git -> https://token@github.com/user/repo.git
-        if repo_url.startswith("https://"):
-            auth_repo_url = repo_url.replace("https://", f"https://{GIT_TOKEN}@")
+    auth_repo_url = get_auth_repo_url(repo_url)
+    if auth_repo_url != repo_url:
         print("Git 인증 정보가 URL에 추가되었습니다.")
 
     print(f"Git repository 클론 중: {repo_url} -> {target_dir}")
     try:
-        subprocess.run(
-            ["git", "clone", "-b", branch, auth_repo_url, target_dir], check=True, capture_output=True, text=True
-        )
+        source_url = auth_repo_url
+        if mirror_dir:
+            update_mirror(repo_url, mirror_dir)
+            # 로컬 경로는 file:// 형식이어야 --depth와 --filter가 적용됨
+            source_url = f"file://{os.path.abspath(mirror_dir)}"
+
+        run_git(["clone", "--depth", "1", "--filter=blob:none", "--sparse", "-b", branch, source_url, target_dir])
+        if sparse_paths:
+            run_git(["sparse-checkout", "set"] + sparse_paths, cwd=target_dir)
+        # push와 누락된 blob 조회는 실제 원격 저장소로 수행
+        run_git(["remote", "set-url", "origin", auth_repo_url], cwd=target_dir)
         return target_dir
     except subprocess.CalledProcessError as e:
         print(f"Git clone 실패: {e.stderr}")
@@ -66,7 +108,26 @@ def configure_git(repo_dir):
         return False
 
 
-def get_current_model_version(values_path, model_name):
+def get_server_env(server, name):
+    for env_var in server.get("env", []):
+        if env_var.get("name") == name:
+            return env_var
+    return None
+
+
+def is_target_server(server, model_name, alias=None):
+    """
+    서버가 model_name 모델을 서빙하는 갱신 대상인지 확인합니다.
+    서버 env에 alias와 다른 MLFLOW_MODEL_ALIAS가 있는 서버(예: shadow 후보 서버)는 대상에서 제외합니다.
+    """
+    name_env = get_server_env(server, "MLFLOW_MODEL_NAME")
+    if name_env is None or name_env.get("value") != model_name:
+        return False
+    alias_env = get_server_env(server, "MLFLOW_MODEL_ALIAS")
+    return alias_env is None or alias_env.get("value") == alias
+
+
+def get_current_model_version(values_path, model_name, alias=None):
     """values.yaml 파일에서 현재 설정된 모델 버전을 가져옵니다."""
     try:
         with open(values_path, "r", encoding="utf-8") as f:
@@ -75,7 +136,7 @@ def get_current_model_version(values_path, model_name):
         for server in values.get("tritonServers", []):
             # MLFLOW_MODEL_NAME 환경 변수의 값이 model_name과 일치하는지 확인
             for env_var in server.get("env", []):
-                if env_var.get("name") == "MLFLOW_MODEL_NAME" and env_var.get("value") == model_name:
+                if env_var.get("name") == "MLFLOW_MODEL_NAME" and is_target_server(server, model_name, alias):
                     # 일치하는 서버를 찾았으면, 해당 서버의 MLFLOW_MODEL_VERSION 환경 변수 값 반환
                     for version_env in server.get("env", []):
                         if version_env.get("name") == "MLFLOW_MODEL_VERSION":
@@ -91,23 +152,111 @@ def get_current_model_version(values_path, model_name):
         return None
 
 
-def get_latest_model_version(model_name):
-    """MLflow에서 최신 모델 버전을 가져옵니다."""
-    try:
-        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-        print(f"MLflow tracking URI 설정: {MLFLOW_TRACKING_URI}")
-
-        client = mlflow.tracking.MlflowClient()
-        versions = client.search_model_versions(f"name='{model_name}'")
-        if versions:
-            return max(int(v.version) for v in versions)
-        return 1  # 기본값
-    except Exception as e:
-        print(f"MLflow에서 최신 버전 조회 실패: {str(e)}")
-        return 1  # 에러 발생 시 기본값
+def get_mlflow_client():
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    print(f"MLflow tracking URI 설정: {MLFLOW_TRACKING_URI}")
+    return mlflow.tracking.MlflowClient()
+
+
+def get_registered_models(client, model_names):
+    """
+    model_names의 registered model을 이름으로 하나씩 조회해 이름 -> RegisteredModel 매핑을 반환합니다. (등록되지 않은 모델은 제외)
+    전체 registered model 목록을 페이지 단위로 받아 client에서 거르지 않도록 values.yaml에 있는 모델만 조회합니다.
+    """
+    registered_models = {}
+    for model_name in sorted(model_names):
+        try:
+            registered_models[model_name] = client.get_registered_model(model_name)
+        except mlflow.exceptions.MlflowException as e:
+            if e.error_code != "RESOURCE_DOES_NOT_EXIST":
+                raise
+    return registered_models
+
+
+def resolve_model_version(client, model_name, registered_model=None, alias=None, stage=None):
+    """
+    배포할 모델 버전을 결정합니다.
+    alias가 주어지면 alias가 가리키는 버전을, stage가 주어지면 해당 stage의 최신 버전을, 둘 다 없으면 가장 큰 버전을 사용합니다.
+    조건에 맞는 버전이 없으면 None을 반환합니다.
+    """
+    if alias:
+        if registered_model is not None:
+            version = registered_model.aliases.get(alias)
+            return int(version) if version is not None else None
+        try:
+            return int(client.get_model_version_by_alias(model_name, alias).version)
+        except mlflow.exceptions.MlflowException:
+            return None
+
+    if registered_model is not None and registered_model.latest_versions:
+        # latest_versions에는 stage별 최신 버전이 하나씩 들어있으므로 전체 버전을 조회할 필요가 없음
+        versions = [int(v.version) for v in registered_model.latest_versions if not stage or v.current_stage == stage]
+        return max(versions) if versions else None
+    if stage:
+        versions = client.get_latest_versions(model_name, stages=[stage])
+        return int(versions[0].version) if versions else None
+
+    # 가장 큰 버전 하나만 정렬해서 조회
+    versions = client.search_model_versions(f"name='{model_name}'", max_results=1, order_by=["version_number DESC"])
+    return int(versions[0].version) if versions else None
+
+
+def get_latest_model_version(model_name, alias=None, stage=None):
+    """
+    MLflow에서 배포할 모델 버전(기본값: 최신 버전)을 가져옵니다.
+    조건에 맞는 버전이 없으면 None을 반환하며, 임의의 기본 버전으로 대체하지 않습니다. (조회 실패 시 예외 발생)
+    """
+    client = get_mlflow_client()
+    return resolve_model_version(client, model_name, alias=alias, stage=stage)
+
+
+def reconcile_values_yaml(values_path, alias=None, stage=None):
+    """
+    values.yaml의 모든 tritonServers 항목을 MLflow와 비교해 모델 버전을 한 번에 갱신합니다.
+    서버 env에 MLFLOW_MODEL_ALIAS가 있으면 해당 서버는 그 alias를 우선 사용합니다.
+    변경 목록 [(모델 이름, 현재 버전, 새 버전)]을 반환하며, 변경이 있을 때만 파일을 씁니다.
+    """
+    print(f"values.yaml 전체 모델 버전 조정 중: {values_path}")
+    with open(values_path, "r", encoding="utf-8") as f:
+        values = yaml.safe_load(f)
+
+    servers = []
+    for server in values.get("tritonServers", []):
+        name_env = get_server_env(server, "MLFLOW_MODEL_NAME")
+        version_env = get_server_env(server, "MLFLOW_MODEL_VERSION")
+        if name_env is None or version_env is None:
+            continue
+        alias_env = get_server_env(server, "MLFLOW_MODEL_ALIAS")
+        servers.append((name_env["value"], version_env, alias_env["value"] if alias_env else alias))
+
+    client = get_mlflow_client()
+    registered_models = get_registered_models(client, {model_name for model_name, _, _ in servers})
+
+    changes = []
+    for model_name, version_env, server_alias in servers:
+        if model_name not in registered_models:
+            print(f"경고: MLflow에 {model_name} 모델이 등록되어 있지 않습니다.")
+            continue
+        new_version = resolve_model_version(
+            client, model_name, registered_models[model_name], alias=server_alias, stage=stage
+        )
+        if new_version is None:
+            print(f"경고: {model_name} 모델에서 조건(alias: {server_alias}, stage: {stage})에 맞는 버전이 없습니다.")
+            continue
+        current_version = str(version_env.get("value"))
+        if current_version != str(new_version):
+            version_env["value"] = str(new_version)
+            changes.append((model_name, current_version, str(new_version)))
+
+    for model_name, current_version, new_version in changes:
+        print(f"{model_name} 업데이트 필요: 현재 버전({current_version}) -> 새 버전({new_version})")
+    if changes:
+        with open(values_path, "w", encoding="utf-8") as f:
+            yaml.dump(values, f, default_flow_style=False)
+    return changes
 
 
-def update_values_yaml(values_path, model_name, new_version):
+def update_values_yaml(values_path, model_name, new_version, alias=None):
     """values.yaml 파일에서 특정 모델의 버전을 업데이트합니다."""
     print(f"values.yaml 업데이트 중: {values_path} (모델: {model_name}, 새 버전: {new_version})")
 
@@ -119,7 +268,7 @@ def update_values_yaml(values_path, model_name, new_version):
         for server in values.get("tritonServers", []):
             # MLFLOW_MODEL_NAME 환경 변수의 값이 model_name과 일치하는지 확인
             for env_var in server.get("env", []):
-                if env_var.get("name") == "MLFLOW_MODEL_NAME" and env_var.get("value") == model_name:
+                if env_var.get("name") == "MLFLOW_MODEL_NAME" and is_target_server(server, model_name, alias):
                     # 일치하는 서버를 찾았으면, 해당 서버의 MLFLOW_MODEL_VERSION 환경 변수 업데이트
                     for version_env in server.get("env", []):
                         if version_env.get("name") == "MLFLOW_MODEL_VERSION":
@@ -143,7 +292,35 @@ def update_values_yaml(values_path, model_name, new_version):
         return False
 
 
-def commit_and_push_changes(repo_dir, file_path, model_name, new_version):
+def push_with_retry(repo_dir, branch="main", max_retries=3):
+    """
+    push가 거절되면(다른 실행이 먼저 push한 경우) 원격 브랜치의 최신 커밋을 받아
+    방금 만든 커밋을 그 위로 rebase한 뒤 다시 push합니다.
+    """
+    for attempt in range(max_retries + 1):
+        result = subprocess.run(
+            ["git", "-C", repo_dir, "push", "origin", f"HEAD:{branch}"], capture_output=True, text=True, check=False
+        )
+        if result.returncode == 0:
+            return True
+        if attempt == max_retries:
+            break
+
+        print(f"Git push 거절됨, 원격 변경사항을 받아 rebase 후 재시도합니다. ({attempt + 1}/{max_retries})")
+        try:
+            run_git(["fetch", "--depth", "1", "origin", branch], cwd=repo_dir)
+            # shallow clone이므로 HEAD~1(clone 시점의 커밋) 이후의 커밋, 즉 방금 만든 커밋만 옮김
+            run_git(["rebase", "--onto", "FETCH_HEAD", "HEAD~1"], cwd=repo_dir)
+        except subprocess.CalledProcessError as e:
+            subprocess.run(["git", "-C", repo_dir, "rebase", "--abort"], capture_output=True, check=False)
+            print(f"Git rebase 실패: {e.stderr}")
+            return False
+
+    print(f"Git push 실패: {result.stderr}")
+    return False
+
+
+def commit_and_push_changes(repo_dir, file_path, commit_message, branch="main"):
     """변경사항을 커밋하고 원격 저장소로 푸시합니다."""
     try:
         print("Git 변경사항 커밋 및 푸시 중...")
@@ -155,7 +332,6 @@ def commit_and_push_changes(repo_dir, file_path, model_name, new_version):
             return False
 
         # 변경 사항 커밋
-        commit_message = f"Update {model_name} version to {new_version}"
         result = subprocess.run(
             ["git", "-C", repo_dir, "commit", "-m", commit_message], capture_output=True, text=True, check=False
         )
@@ -164,9 +340,7 @@ def commit_and_push_changes(repo_dir, file_path, model_name, new_version):
             return False
 
         # 원격 저장소로 푸시
-        result = subprocess.run(["git", "-C", repo_dir, "push"], capture_output=True, text=True, check=False)
-        if result.returncode != 0:
-            print(f"Git push 실패: {result.stderr}")
+        if not push_with_retry(repo_dir, branch):
             return False
 
         print("Git 변경사항 성공적으로 커밋 및 푸시 완료")
@@ -176,6 +350,14 @@ def commit_and_push_changes(repo_dir, file_path, model_name, new_version):
         return False
 
 
+def print_git_help():
+    print("Git 변경사항 적용 실패.")
+    print("다음 환경 변수가 올바르게 설정되었는지 확인하세요:")
+    print("  GIT_USERNAME: Git 사용자 이름")
+    print("  GIT_EMAIL: Git 이메일")
+    print("  GIT_TOKEN: Git 인증 토큰")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Triton Inference Server 설정 업데이트")
     parser.add_argument("--model_name", type=str, default="yolo11n-onnx", help="업데이트할 모델 이름")
@@ -190,6 +372,14 @@ if __name__ == "__main__":
         help="values.yaml 파일의 상대 경로",
     )
     parser.add_argument("--configure_git", action="store_true", help="Git config 설정하기")
+    parser.add_argument(
+        "--mirror_dir", type=str, default="", help="재사용할 bare mirror 경로 (PVC 경로를 지정하면 실행마다 증분 fetch)"
+    )
+    parser.add_argument(
+        "--reconcile", action="store_true", help="values.yaml의 모든 tritonServers 모델 버전을 한 커밋으로 갱신"
+    )
+    parser.add_argument("--alias", type=str, default="", help="배포할 버전을 가리키는 MLflow model alias")
+    parser.add_argument("--stage", type=str, default="", help="배포할 버전의 MLflow stage (alias가 없을 때 사용)")
 
     args = parser.parse_args()
 
@@ -202,7 +392,13 @@ if __name__ == "__main__":
         print("경고: Git 사용자 정보(GIT_USERNAME, GIT_EMAIL)가 설정되지 않았습니다.")
 
     # Git repository 클론
-    temp_dir = clone_repo(args.repo_url, args.branch)
+    # values.yaml이 있는 디렉토리만 checkout
+    temp_dir = clone_repo(
+        args.repo_url,
+        args.branch,
+        mirror_dir=args.mirror_dir or None,
+        sparse_paths=[os.path.dirname(args.values_path)] if os.path.dirname(args.values_path) else [],
+    )
 
     try:
         # Git 설정 (사용자 이름, 이메일 등)
@@ -218,14 +414,47 @@ if __name__ == "__main__":
         # values.yaml 파일 경로
         values_full_path = os.path.join(temp_dir, args.values_path)
 
+        if args.reconcile:
+            changes = reconcile_values_yaml(values_full_path, args.alias or None, args.stage or None)
+            if not changes:
+                print("모든 모델이 MLflow 버전과 동일합니다. 업데이트가 필요하지 않습니다.")
+                sys.exit(0)
+
+            # 여러 모델의 변경을 하나의 커밋으로 반영해 Argo CD sync도 한 번만 일어나도록 함
+            commit_message = f"Update {len(changes)} Triton model versions\n\n" + "\n".join(
+                f"- {model_name}: {current_version} -> {new_version}"
+                for model_name, current_version, new_version in changes
+            )
+            if commit_and_push_changes(temp_dir, args.values_path, commit_message, args.branch):
+                print(f"Triton Inference Server 설정이 성공적으로 업데이트되었습니다. 변경된 모델: {len(changes)}개")
+            else:
+                print_git_help()
+                sys.exit(1)
+            sys.exit(0)
+
         # 현재 values.yaml에 설정된 모델 버전 확인
-        current_version = get_current_model_version(values_full_path, args.model_name)
+        current_version = get_current_model_version(values_full_path, args.model_name, args.alias or None)
         if current_version is None:
             print(f"values.yaml에서 {args.model_name} 모델의 현재 버전을 확인할 수 없습니다.")
             sys.exit(1)
 
         # MLflow의 최신 모델 버전 가져오기
-        mlflow_latest_version = get_latest_model_version(args.model_name)
+        try:
+            mlflow_latest_version = get_latest_model_version(args.model_name, args.alias or None, args.stage or None)
+        except Exception as e:
+            print(f"MLflow에서 최신 버전 조회 실패: {str(e)}")
+            sys.exit(1)
+
+        # 배포할 버전을 찾지 못하면 현재 배포를 그대로 유지 (다른 버전으로 되돌리지 않음)
+        if mlflow_latest_version is None:
+            if args.alias or args.stage:
+                print(
+                    f"{args.model_name} 모델에서 조건(alias: {args.alias or None}, stage: {args.stage or None})에 맞는 버전이 없습니다. "
+                    "values.yaml을 변경하지 않습니다."
+                )
+                sys.exit(1)
+            print(f"MLflow에 등록된 {args.model_name} 모델 버전이 없습니다. values.yaml을 변경하지 않습니다.")
+            sys.exit(0)
 
         # 버전이 같으면 업데이트하지 않음
         if str(mlflow_latest_version) == str(current_version):
@@ -237,18 +466,15 @@ if __name__ == "__main__":
         print(f"{args.model_name} 업데이트 필요: 현재 버전({current_version}) -> 최신 버전({mlflow_latest_version})")
 
         # values.yaml 파일 업데이트
-        if update_values_yaml(values_full_path, args.model_name, mlflow_latest_version):
+        if update_values_yaml(values_full_path, args.model_name, mlflow_latest_version, args.alias or None):
             # 변경사항 커밋 및 푸시
-            if commit_and_push_changes(temp_dir, args.values_path, args.model_name, mlflow_latest_version):
+            commit_message = f"Update {args.model_name} version to {mlflow_latest_version}"
+            if commit_and_push_changes(temp_dir, args.values_path, commit_message, args.branch):
                 print(
                     f"Triton Inference Server 설정이 성공적으로 업데이트되었습니다. 모델: {args.model_name}, 버전: {mlflow_latest_version}"
                 )
             else:
-                print("Git 변경사항 적용 실패.")
-                print("다음 환경 변수가 올바르게 설정되었는지 확인하세요:")
-                print("  GIT_USERNAME: Git 사용자 이름")
-                print("  GIT_EMAIL: Git 이메일")
-                print("  GIT_TOKEN: Git 인증 토큰")
+                print_git_help()
         else:
             print("values.yaml 업데이트 실패.")
     finally:
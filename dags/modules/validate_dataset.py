@@ -4,6 +4,18 @@ import sys
 from pathlib import Path
 
 import cv2
+from build_annotation_store import load_annotation_store
+from stage_cache import (
+    add_cache_arguments,
+    build_manifest,
+    compute_fingerprint,
+    is_cache_enabled,
+    load_cached_result,
+    save_cached_result,
+)
+from stage_metrics import StageMetrics
+
+STAGE_NAME = "validate_dataset"
 
 
 def validate_image(image_path: str) -> bool:
@@ -17,16 +29,26 @@ def validate_image(image_path: str) -> bool:
         return False
 
 
-def validate_dataset(data_path):
-    """데이터셋 검증"""
+def validate_dataset(data_path, annotation_store=None):
+    """
+    데이터셋 검증
+    annotation_store를 지정하면 저장소에 기록된 이미지/라벨 매핑을 사용해 데이터셋을 다시 순회하지 않습니다.
+    """
     data_path = Path(data_path)
     print(f"데이터셋 검증 중: {data_path}")
 
     invalid_files = []
 
+    if annotation_store:
+        store = load_annotation_store(annotation_store)
+        pairs = ((store.image_path(idx), store.label_path(idx)) for idx in range(len(store)))
+    else:
+        pairs = (
+            (img_path, next(data_path.rglob(f"{img_path.stem}.txt"), None)) for img_path in data_path.rglob("*.jpg")
+        )
+
     # 이미지와 라벨 파일 검증
-    for img_path in data_path.rglob("*.jpg"):
-        label_path = next(data_path.rglob(f"{img_path.stem}.txt"), None)
+    for img_path, label_path in pairs:
 
         # 이미지 파일 검증
         if not validate_image(img_path):
@@ -47,15 +69,52 @@ def validate_dataset(data_path):
     return True
 
 
-if __name__ == "__main__":
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="데이터셋 검증")
     parser.add_argument("--data_path", type=str, help="데이터셋 경로", default="./data/raw")
+    parser.add_argument(
+        "--annotation_store",
+        type=str,
+        default="",
+        help="build_annotation_store 결과 경로 (지정하면 데이터셋을 다시 순회하지 않음)",
+    )
+    add_cache_arguments(parser)
+
+    return parser.parse_args(argv)
+
 
-    args = parser.parse_args()
+def main(args):
+    """데이터셋을 검증하고 검증 결과를 반환 (데이터셋이 바뀌지 않았으면 캐시 재사용)"""
+    metrics = StageMetrics(STAGE_NAME)
+    with metrics.step("cache_lookup"):
+        # 저장소는 데이터셋의 이미지/라벨 매핑을 그대로 담고 있으므로 저장소가 바뀌지 않으면 결과도 같음
+        input_paths = [args.annotation_store or args.data_path]
+        input_manifest = build_manifest(input_paths)
+        fingerprint = compute_fingerprint(STAGE_NAME, {}, input_manifest=input_manifest)
+        cached = load_cached_result(args.cache_dir, STAGE_NAME, fingerprint) if is_cache_enabled(args) else None
+    if cached is not None:
+        print(f"캐시 적중: 변경되지 않은 데이터셋은 이미 검증되었습니다 ({args.data_path})")
+        metrics.emit(cache_hit=True)
+        return cached
+
+    # 저장소를 사용하면 입력 파일 수가 아닌 저장소의 이미지 수를 처리 항목 수로 기록
+    num_items = (
+        len(load_annotation_store(args.annotation_store)) if args.annotation_store else input_manifest["num_files"]
+    )
+    with metrics.step("validate", items=num_items):
+        is_valid = validate_dataset(args.data_path, args.annotation_store or None)
+    # 검증에 실패한 경우에는 다음 실행에서도 실패 목록을 다시 확인할 수 있도록 캐시하지 않음
+    if is_valid:
+        save_cached_result(args.cache_dir, STAGE_NAME, fingerprint, is_valid)
+    metrics.emit(cache_hit=False, is_valid=is_valid)
+    return is_valid
+
+
+if __name__ == "__main__":
+    args = parse_args()
 
     try:
-        is_valid = validate_dataset(args.data_path)
-        print(f"XCOM_RETURN:{is_valid}")
+        print(f"XCOM_RETURN:{main(args)}")
     except Exception as e:
         print(f"검증 실패: {e}")
         sys.exit(1)
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+성능 테스트용 가짜 Triton Inference Server
+API 서버가 사용하는 KServe v2 HTTP 프로토콜 일부(live/ready, 모델 metadata/config, binary tensor infer)를 구현해
+GPU와 실제 모델 없이 apis/의 배치, 연결 재사용, backpressure 동작을 재현 가능한 조건에서 측정할 수 있게 합니다.
+--grpc-port를 지정하면 같은 모델을 KServe v2 gRPC(live/ready, metadata/config, ModelInfer, ModelStreamInfer)로도 제공합니다.
+
+- 지연 시간: --latency-dist 분포(fixed/normal/lognormal/exponential) + 배치 크기에 비례하는 비용(--per-item-ms)
+- 동시 실행: --instances개의 모델 인스턴스만 동시에 추론하고 나머지 요청은 대기 (Triton instance_group과 동일)
+- 오류 주입: --error-rate 비율로 오류 응답, --slow-rate 비율로 --slow-ms만큼 지연 추가
+- 출력: --onnx-model을 지정하면 onnxruntime으로 실제 계산, 아니면 --canned-output(.npy) 또는 입력 기반 합성 출력
+
+사용 예시:
+    python examples/fake_triton_server.py --port 8000 --latency-ms 15 --per-item-ms 4 --instances 2
+    ONNX_MODEL_TRITON_URL=localhost:8000 uvicorn main:app --port 8080   # apis 디렉토리에서 실행
+
+    python examples/fake_triton_server.py --port 8000 --grpc-port 8001   # tritonclient[grpc] 필요
+    TRITON_PROTOCOL=grpc_stream ONNX_MODEL_TRITON_GRPC_URL=localhost:8001 uvicorn main:app --port 8080
+"""
+
+import argparse
+import hashlib
+import json
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+NUM_CLASSES = 80
+NUM_ANCHORS = 8400
+# KServe v2 datatype <-> numpy dtype
+DATATYPES = {
+    "BOOL": np.bool_,
+    "UINT8": np.uint8,
+    "INT8": np.int8,
+    "INT16": np.int16,
+    "INT32": np.int32,
+    "INT64": np.int64,
+    "FP16": np.float16,
+    "FP32": np.float32,
+    "FP64": np.float64,
+}
+NUMPY_DATATYPES = {np.dtype(dtype): name for name, dtype in DATATYPES.items()}
+MODEL_PATH = re.compile(
+    r"^/v2/models/(?P<name>[^/]+)(?:/versions/(?P<version>[^/]+))?(?P<action>/ready|/config|/stats|/infer)?$"
+)
+
+
+class InferenceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyModel:
+    """배치 크기에 따른 추론 시간 샘플링"""
+
+    def __init__(self, dist, mean_ms, stddev_ms, per_item_ms, slow_rate, slow_ms, seed):
+        self.dist = dist
+        self.mean_ms = mean_ms
+        self.stddev_ms = stddev_ms
+        self.per_item_ms = per_item_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, batch_size):
+        with self._lock:
+            if self.dist == "fixed":
+                base = self.mean_ms
+            elif self.dist == "normal":
+                base = self._rng.gauss(self.mean_ms, self.stddev_ms)
+            elif self.dist == "lognormal":
+                # 평균과 표준편차가 mean_ms, stddev_ms가 되도록 파라미터 변환
+                sigma2 = np.log(1 + (self.stddev_ms / max(self.mean_ms, 1e-9)) ** 2)
+                base = self._rng.lognormvariate(np.log(max(self.mean_ms, 1e-9)) - sigma2 / 2, np.sqrt(sigma2))
+            else:
+                base = self._rng.expovariate(1 / self.mean_ms) if self.mean_ms > 0 else 0.0
+            slow = self.slow_ms if self._rng.random() < self.slow_rate else 0.0
+        return max(0.0, base + self.per_item_ms * (batch_size - 1) + slow) / 1000
+
+
+class FakeModel:
+    """
+    YOLO onnx-model을 흉내내는 모델
+    images(FP32, [-1, 3, H, W]) 입력을 받아 output0(FP32, [-1, 4 + 80, 8400])을 반환합니다.
+    """
+
+    def __init__(self, args):
+        self.name = args.model_name
+        self.versions = [str(version) for version in args.versions]
+        self.max_batch_size = args.max_batch_size
+        self.num_detections = args.detections
+        self.dynamic_shape = args.dynamic_shape
+        self.latency = LatencyModel(
+            args.latency_dist,
+            args.latency_ms,
+            args.latency_stddev_ms,
+            args.per_item_ms,
+            args.slow_rate,
+            args.slow_ms,
+            args.seed,
+        )
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self._error_rng = random.Random(args.seed + 1)
+        self.instances = args.instances
+        self._instances = threading.Semaphore(args.instances)
+        self._stats_lock = threading.Lock()
+        self.stats = {"request_count": 0, "inference_count": 0, "failure_count": 0, "queue_ns": 0, "compute_ns": 0}
+        self.canned_output = np.load(args.canned_output).astype(np.float32) if args.canned_output else None
+        # 합성 출력의 배경 (모든 anchor의 score가 conf_threshold보다 낮음)
+        rng = np.random.default_rng(args.seed)
+        self._background = np.concatenate(
+            [
+                rng.uniform(0, 640, (2, NUM_ANCHORS)),
+                rng.uniform(8, 200, (2, NUM_ANCHORS)),
+                rng.uniform(0, 0.1, (NUM_CLASSES, NUM_ANCHORS)),
+            ]
+        ).astype(np.float32)
+        self.session = None
+        if args.onnx_model:
+            # onnxruntime은 ONNX 출력을 사용할 때만 필요
+            import onnxruntime
+
+            self.session = onnxruntime.InferenceSession(args.onnx_model, providers=["CPUExecutionProvider"])
+
+    def metadata(self):
+        size, anchors = (-1, -1) if self.dynamic_shape else (640, NUM_ANCHORS)
+        return {
+            "name": self.name,
+            "versions": self.versions,
+            "platform": "onnxruntime_onnx",
+            "inputs": [{"name": "images", "datatype": "FP32", "shape": [-1, 3, size, size]}],
+            "outputs": [{"name": "output0", "datatype": "FP32", "shape": [-1, 4 + NUM_CLASSES, anchors]}],
+        }
+
+    def config(self):
+        size, anchors = (-1, -1) if self.dynamic_shape else (640, NUM_ANCHORS)
+        return {
+            "name": self.name,
+            "platform": "onnxruntime_onnx",
+            "max_batch_size": self.max_batch_size,
+            "input": [{"name": "images", "data_type": "TYPE_FP32", "dims": [3, size, size]}],
+            "output": [{"name": "output0", "data_type": "TYPE_FP32", "dims": [4 + NUM_CLASSES, anchors]}],
+            "instance_group": [{"kind": "KIND_CPU", "count": self.instances}],
+        }
+
+    def check_version(self, version):
+        if version and version not in self.versions:
+            raise InferenceError(400, f"Request for unknown model: '{self.name}' version {version} is not found")
+
+    def _synthetic_output(self, images):
+        """입력을 샘플링한 해시로 seed를 정해 같은 입력에는 항상 같은 감지 결과를 반환 (배경은 모든 입력이 공유)"""
+        height, width = images.shape[2:]
+        num_anchors = count_anchors(height, width)
+        background = (
+            self._background
+            if num_anchors == NUM_ANCHORS
+            else np.resize(self._background, (4 + NUM_CLASSES, num_anchors))
+        )
+        outputs = np.repeat(background[None], len(images), axis=0)
+        for output, image in zip(outputs, images):
+            rng = np.random.default_rng(
+                int.from_bytes(hashlib.md5(image[:, ::16, ::16].tobytes()).digest()[:8], "little")
+            )
+            anchors = rng.choice(num_anchors, size=self.num_detections, replace=False)
+            output[0, anchors] = rng.uniform(0, width, self.num_detections)
+            output[1, anchors] = rng.uniform(0, height, self.num_detections)
+            output[2:4, anchors] = rng.uniform(8, 200, (2, self.num_detections))
+            output[4 + rng.integers(0, NUM_CLASSES, self.num_detections), anchors] = rng.uniform(
+                0.5, 1.0, self.num_detections
+            )
+        return outputs
+
+    def _compute(self, images):
+        if self.session is not None:
+            return self.session.run(["output0"], {"images": images})[0]
+        if self.canned_output is not None:
+            canned = self.canned_output.reshape(-1, *self.canned_output.shape[-2:])
+            return np.repeat(canned[:1], len(images), axis=0)
+        return self._synthetic_output(images)
+
+    def infer(self, inputs):
+        images = inputs.get("images")
+        if images is None:
+            raise InferenceError(400, "expected input 'images'")
+        # dynamic shape가 아니면 [N, 3, 640, 640]만 허용
+        if images.ndim != 4 or images.shape[1] != 3 or (not self.dynamic_shape and images.shape[2:] != (640, 640)):
+            raise InferenceError(400, f"unexpected shape for input 'images', got {list(images.shape)}")
+        batch_size = images.shape[0]
+        if self.max_batch_size and batch_size > self.max_batch_size:
+            raise InferenceError(400, f"batch size {batch_size} exceeds max_batch_size {self.max_batch_size}")
+
+        with self._stats_lock:
+            self.stats["request_count"] += 1
+        queued = time.perf_counter_ns()
+        with self._instances:
+            started = time.perf_counter_ns()
+            with self._stats_lock:
+                inject_error = self._error_rng.random() < self.error_rate
+            # 샘플링한 추론 시간 동안 모델 인스턴스를 점유 (출력 계산이 더 빨리 끝나면 남은 시간만큼 대기)
+            # dynamic shape 모델의 추론 시간은 입력 픽셀 수에 비례 (640x640 기준)
+            scale = images.shape[2] * images.shape[3] / (640 * 640) if self.dynamic_shape else 1.0
+            deadline = time.perf_counter() + self.latency.sample(batch_size) * scale
+            output = None if inject_error else self._compute(images.astype(np.float32, copy=False))
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            finished = time.perf_counter_ns()
+
+        with self._stats_lock:
+            self.stats["queue_ns"] += started - queued
+            self.stats["compute_ns"] += finished - started
+            if inject_error:
+                self.stats["failure_count"] += 1
+            else:
+                self.stats["inference_count"] += batch_size
+        if inject_error:
+            raise InferenceError(self.error_status, "injected error from fake triton server")
+        return {"output0": output}
+
+
+def count_anchors(height, width):
+    """YOLOv8 출력의 anchor 개수 (stride 8, 16, 32 feature map의 위치 수 합계, 640x640이면 8400)"""
+    return sum((height // stride) * (width // stride) for stride in (8, 16, 32))
+
+
+def decode_inputs(header, binary):
+    """infer 요청의 JSON 헤더와 binary 영역에서 입력 텐서 복원 (binary_data_size가 없으면 JSON data 사용)"""
+    inputs = {}
+    offset = 0
+    for tensor in header.get("inputs", []):
+        dtype = DATATYPES.get(tensor["datatype"])
+        if dtype is None:
+            raise InferenceError(400, f"unsupported datatype {tensor['datatype']}")
+        size = tensor.get("parameters", {}).get("binary_data_size")
+        if size is not None:
+            array = np.frombuffer(binary[offset : offset + size], dtype=dtype)
+            offset += size
+        else:
+            array = np.asarray(tensor.get("data", []), dtype=dtype)
+        try:
+            inputs[tensor["name"]] = array.reshape(tensor["shape"])
+        except ValueError as e:
+            raise InferenceError(400, f"input '{tensor['name']}': {e}") from e
+    return inputs
+
+
+def encode_outputs(header, outputs, model_name, model_version):
+    """
+    infer 응답 생성 (JSON 헤더, binary 영역)
+    요청에서 binary_data_output 또는 출력별 binary_data를 요청한 출력만 binary로, 나머지는 JSON data로 반환합니다.
+    """
+    requested = {tensor["name"]: tensor.get("parameters", {}) for tensor in header.get("outputs", [])}
+    binary_default = header.get("parameters", {}).get("binary_data_output", False)
+    response = {"model_name": model_name, "model_version": model_version, "outputs": []}
+    if "id" in header:
+        response["id"] = header["id"]
+    chunks = []
+    for name, array in outputs.items():
+        if requested and name not in requested:
+            continue
+        tensor = {"name": name, "datatype": NUMPY_DATATYPES[array.dtype], "shape": list(array.shape)}
+        if requested.get(name, {}).get("binary_data", binary_default):
+            data = np.ascontiguousarray(array).tobytes()
+            tensor["parameters"] = {"binary_data_size": len(data)}
+            chunks.append(data)
+        else:
+            tensor["data"] = array.flatten().tolist()
+        response["outputs"].append(tensor)
+    return response, b"".join(chunks)
+
+
+class TritonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    model = None
+    quiet = True
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode())
+
+    def _model_route(self):
+        match = MODEL_PATH.match(self.path.split("?")[0])
+        if match is None:
+            return None
+        if match["name"] != self.model.name:
+            raise InferenceError(400, f"Request for unknown model: '{match['name']}' is not found")
+        self.model.check_version(match["version"])
+        return match["version"] or self.model.versions[-1], match["action"] or ""
+
+    def do_GET(self):  # pylint: disable=C0103
+        path = self.path.split("?")[0]
+        if path in ("/v2/health/live", "/v2/health/ready"):
+            return self._send(200)
+        if path == "/v2":
+            return self._send_json(
+                200, {"name": "fake-triton", "version": "2.56.0", "extensions": ["binary_tensor_data"]}
+            )
+        try:
+            route = self._model_route()
+        except InferenceError as e:
+            return self._send_json(e.status, {"error": str(e)})
+        if route is None:
+            return self._send_json(404, {"error": "Not Found"})
+        version, action = route
+        if action == "/ready":
+            return self._send(200)
+        if action == "/config":
+            return self._send_json(200, self.model.config())
+        if action == "/stats":
+            return self._send_json(
+                200, {"model_stats": [{"name": self.model.name, "version": version, **self.model.stats}]}
+            )
+        if action == "":
+            return self._send_json(200, self.model.metadata())
+        return self._send_json(405, {"error": "Method Not Allowed"})
+
+    def do_POST(self):  # pylint: disable=C0103
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            route = self._model_route()
+            if route is None or route[1] != "/infer":
+                return self._send_json(404, {"error": "Not Found"})
+            header_length = self.headers.get("Inference-Header-Content-Length")
+            header_length = int(header_length) if header_length is not None else len(body)
+            header = json.loads(body[:header_length])
+            outputs = self.model.infer(decode_inputs(header, body[header_length:]))
+            response, binary = encode_outputs(header, outputs, self.model.name, route[0])
+        except InferenceError as e:
+            return self._send_json(e.status, {"error": str(e)})
+        except (ValueError, KeyError) as e:
+            return self._send_json(400, {"error": f"failed to parse the request: {e}"})
+
+        response_header = json.dumps(response).encode()
+        if binary:
+            return self._send(
+                200,
+                response_header + binary,
+                content_type="application/octet-stream",
+                headers={"Inference-Header-Content-Length": str(len(response_header))},
+            )
+        return self._send(200, response_header)
+
+
+# HTTP 상태 코드 -> gRPC 상태 코드 이름 (그 외는 INTERNAL)
+GRPC_STATUS_CODES = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED", 503: "UNAVAILABLE"}
+
+
+def create_grpc_server(model, address, max_workers=16):
+    """
+    KServe v2 gRPC 서버 생성 (tritonclient[grpc]는 --grpc-port를 지정할 때만 필요)
+    stream으로 받은 요청은 Triton처럼 동시에 처리하므로 응답 순서가 요청 순서와 다를 수 있고, 오류 응답에도 요청 id를 채웁니다.
+    """
+    import grpc
+    from google.protobuf import json_format
+    from tritonclient.grpc import model_config_pb2, service_pb2, service_pb2_grpc
+
+    def infer(request):
+        """ModelInferRequest -> ModelInferResponse (raw_input_contents/raw_output_contents 사용)"""
+        version = request.model_version or model.versions[-1]
+        if request.model_name != model.name:
+            raise InferenceError(400, f"Request for unknown model: '{request.model_name}' is not found")
+        model.check_version(request.model_version)
+        if len(request.raw_input_contents) != len(request.inputs):
+            raise InferenceError(400, "expected raw_input_contents for every input")
+        inputs = {}
+        for tensor, content in zip(request.inputs, request.raw_input_contents):
+            dtype = DATATYPES.get(tensor.datatype)
+            if dtype is None:
+                raise InferenceError(400, f"unsupported datatype {tensor.datatype}")
+            try:
+                inputs[tensor.name] = np.frombuffer(content, dtype=dtype).reshape(list(tensor.shape))
+            except ValueError as e:
+                raise InferenceError(400, f"input '{tensor.name}': {e}") from e
+
+        outputs = model.infer(inputs)
+        requested = {tensor.name for tensor in request.outputs}
+        response = service_pb2.ModelInferResponse(model_name=model.name, model_version=version, id=request.id)
+        for name, array in outputs.items():
+            if requested and name not in requested:
+                continue
+            response.outputs.add(name=name, datatype=NUMPY_DATATYPES[array.dtype], shape=list(array.shape))
+            response.raw_output_contents.append(np.ascontiguousarray(array).tobytes())
+        return response
+
+    class Servicer(service_pb2_grpc.GRPCInferenceServiceServicer):
+        def _abort(self, context, error):
+            context.abort(getattr(grpc.StatusCode, GRPC_STATUS_CODES.get(error.status, "INTERNAL")), str(error))
+
+        def ServerLive(self, request, context):  # pylint: disable=C0103
+            return service_pb2.ServerLiveResponse(live=True)
+
+        def ServerReady(self, request, context):  # pylint: disable=C0103
+            return service_pb2.ServerReadyResponse(ready=True)
+
+        def ServerMetadata(self, request, context):  # pylint: disable=C0103
+            return service_pb2.ServerMetadataResponse(
+                name="fake-triton", version="2.56.0", extensions=["binary_tensor_data"]
+            )
+
+        def ModelReady(self, request, context):  # pylint: disable=C0103
+            ready = request.name == model.name and (not request.version or request.version in model.versions)
+            return service_pb2.ModelReadyResponse(ready=ready)
+
+        def ModelMetadata(self, request, context):  # pylint: disable=C0103
+            try:
+                if request.name != model.name:
+                    raise InferenceError(400, f"Request for unknown model: '{request.name}' is not found")
+                model.check_version(request.version)
+            except InferenceError as e:
+                self._abort(context, e)
+            return json_format.ParseDict(model.metadata(), service_pb2.ModelMetadataResponse())
+
+        def ModelConfig(self, request, context):  # pylint: disable=C0103
+            try:
+                if request.name != model.name:
+                    raise InferenceError(400, f"Request for unknown model: '{request.name}' is not found")
+                model.check_version(request.version)
+            except InferenceError as e:
+                self._abort(context, e)
+            config = json_format.ParseDict(model.config(), model_config_pb2.ModelConfig())
+            return service_pb2.ModelConfigResponse(config=config)
+
+        def ModelInfer(self, request, context):  # pylint: disable=C0103
+            try:
+                return infer(request)
+            except InferenceError as e:
+                self._abort(context, e)
+
+        def ModelStreamInfer(self, request_iterator, context):  # pylint: disable=C0103
+            responses = queue.Queue()
+            # 요청 하나마다 응답 하나를 보내므로 받은 요청 수와 보낸 응답 수가 같아지면 stream을 종료
+            received = {"count": 0, "done": False}
+            condition = threading.Condition()
+
+            def handle(request):
+                try:
+                    response = service_pb2.ModelStreamInferResponse(infer_response=infer(request))
+                except InferenceError as e:
+                    response = service_pb2.ModelStreamInferResponse(
+                        error_message=str(e), infer_response=service_pb2.ModelInferResponse(id=request.id)
+                    )
+                responses.put(response)
+
+            def read_requests():
+                try:
+                    for request in request_iterator:
+                        with condition:
+                            received["count"] += 1
+                        executor.submit(handle, request)
+                finally:
+                    # 클라이언트가 stream을 끊어도 응답을 기다리는 루프가 종료되도록 항상 종료 신호를 보냄
+                    with condition:
+                        received["done"] = True
+                    responses.put(None)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                threading.Thread(target=read_requests, daemon=True).start()
+                sent = 0
+                while True:
+                    response = responses.get()
+                    if response is not None:
+                        sent += 1
+                        yield response
+                    with condition:
+                        if received["done"] and sent == received["count"]:
+                            return
+
+    # 이미지 텐서는 gRPC 기본 메시지 크기 제한(4MB)보다 크므로 제한을 해제
+    server = grpc.server(
+        ThreadPoolExecutor(max_workers=max_workers),
+        options=[("grpc.max_receive_message_length", -1), ("grpc.max_send_message_length", -1)],
+    )
+    service_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(Servicer(), server)
+    server.add_insecure_port(address)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Triton Inference Server (KServe v2 HTTP subset)")
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="Bind host")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port")
+    parser.add_argument("--grpc-port", type=int, default=0, help="gRPC port (0 = HTTP only)")
+    parser.add_argument("--model-name", type=str, default="onnx-model", help="Model name to serve")
+    parser.add_argument("--versions", type=int, nargs="+", default=[1], help="Model versions to serve")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="Max batch size (0 = no limit)")
+    parser.add_argument(
+        "--dynamic-shape",
+        action="store_true",
+        help="Serve [-1, 3, -1, -1] input like an ONNX exported with dynamic=True",
+    )
+    parser.add_argument("--instances", type=int, default=1, help="Number of concurrent model instances")
+    parser.add_argument(
+        "--latency-dist",
+        choices=["fixed", "normal", "lognormal", "exponential"],
+        default="lognormal",
+        help="Latency distribution",
+    )
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean latency for batch size 1 (ms)")
+    parser.add_argument("--latency-stddev-ms", type=float, default=5.0, help="Latency standard deviation (ms)")
+    parser.add_argument("--per-item-ms", type=float, default=5.0, help="Additional latency per extra batch item (ms)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests with an extra delay")
+    parser.add_argument("--slow-ms", type=float, default=500.0, help="Extra delay for slow requests (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected errors")
+    parser.add_argument("--detections", type=int, default=10, help="Detections per image in synthetic outputs")
+    parser.add_argument("--canned-output", type=str, default="", help="Path to a recorded output0 tensor (.npy)")
+    parser.add_argument("--onnx-model", type=str, default="", help="Compute outputs with onnxruntime from this model")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for latency and error injection")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    TritonHandler.model = FakeModel(args)
+    TritonHandler.quiet = not args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), TritonHandler)
+    server.daemon_threads = True
+    print(f"가짜 Triton 서버 시작: http://{args.host}:{args.port} (model={args.model_name}, versions={args.versions})")
+    grpc_server = None
+    if args.grpc_port:
+        grpc_server = create_grpc_server(TritonHandler.model, f"{args.host}:{args.grpc_port}")
+        grpc_server.start()
+        print(f"gRPC 서버 시작: {args.host}:{args.grpc_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if grpc_server is not None:
+            grpc_server.stop(grace=None)
+
+
+if __name__ == "__main__":
+    main()
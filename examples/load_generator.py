@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# pip install httpx
+"""
+API 서버 부하 생성기 (asyncio)
+
+모드
+- closed: 고정된 동시 요청 수(--concurrency)로 응답을 받는 즉시 다음 요청을 보냅니다.
+- open: 평균 --rate req/s의 포아송 도착 과정으로 요청을 보냅니다. 응답 지연과 무관하게 예정된 시각에 요청을 보내고,
+  지연 시간은 예정 시각부터 측정하므로 서버가 밀릴 때의 대기 시간(coordinated omission)도 포함됩니다.
+- replay: API 서버가 REQUEST_CAPTURE_PATH에 기록한 요청 로그(JSONL)를 원래 간격(--speed 배속)대로 다시 보냅니다.
+
+사용 예시:
+    python examples/load_generator.py --mode closed --concurrency 16 --duration 60
+    python examples/load_generator.py --mode open --rate 50 --duration 60 --output result.json
+    python examples/load_generator.py --mode replay --replay-file requests.jsonl --speed 2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+DEFAULT_IMAGE_URL = "https://djl.ai/examples/src/test/resources/dog_bike_car.jpg"
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class LatencyHistogram:
+    """
+    HDR histogram 방식의 지연 시간 히스토그램 (마이크로초 단위 정수 기록)
+    값의 크기에 따라 bucket 폭을 2배씩 넓혀 significant_figures 자리의 상대 정밀도를 유지하므로
+    요청 수와 관계없이 메모리 사용량이 일정하고 p999 같은 꼬리 백분위수도 정확하게 계산됩니다.
+    """
+
+    def __init__(self, significant_figures=3):
+        # 2 * 10^significant_figures 보다 큰 2의 거듭제곱만큼 bucket을 나누면 상대 오차가 10^-significant_figures 이하
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self.counts = Counter()
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _bucket(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return (value >> shift) << shift, shift
+
+    def record(self, seconds):
+        value = max(1, int(seconds * 1_000_000))
+        self.counts[self._bucket(value)] += 1
+        self.total += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile):
+        """백분위수(ms), bucket의 가장 큰 값으로 보고"""
+        if self.total == 0:
+            return None
+        target = max(1, math.ceil(self.total * percentile / 100))
+        seen = 0
+        for (lower, shift), count in sorted(self.counts.items()):
+            seen += count
+            if seen >= target:
+                return min(lower + (1 << shift) - 1, self.max) / 1000
+        return self.max / 1000
+
+    def mean(self):
+        if self.total == 0:
+            return None
+        return sum((lower + ((1 << shift) - 1) / 2) * count for (lower, shift), count in self.counts.items()) / (
+            self.total * 1000
+        )
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "min_ms": self.min / 1000 if self.min is not None else None,
+            "mean_ms": round(self.mean(), 3) if self.total else None,
+            "max_ms": self.max / 1000 if self.total else None,
+            **{f"p{str(p).replace('.', '')}_ms": self.percentile(p) for p in PERCENTILES},
+        }
+
+
+class Stats:
+    """
+    요청 결과 집계 (전체/요청 종류별 히스토그램, 상태 코드, 오류 종류)
+    동시 요청 수 상한 때문에 보내지 못한 요청은 dropped로 따로 세고 요청 수와 실패 수에는 포함하지 않습니다.
+    """
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.by_name = {}
+        self.status_codes = Counter()
+        self.errors = Counter()
+        self.dropped = 0
+        self.started = None
+        self.finished = None
+
+    def record(self, name, seconds, status_code=None, error=None):
+        self.latency.record(seconds)
+        self.by_name.setdefault(name, LatencyHistogram()).record(seconds)
+        if error is not None:
+            self.errors[error] += 1
+        else:
+            self.status_codes[str(status_code)] += 1
+            if status_code >= 400:
+                self.errors[f"HTTP {status_code}"] += 1
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        total = self.latency.total
+        failed = sum(self.errors.values())
+        return {
+            "duration_seconds": round(elapsed, 3),
+            "requests": total,
+            "succeeded": total - failed,
+            "failed": failed,
+            "dropped": self.dropped,
+            "throughput_rps": round(total / elapsed, 3) if elapsed > 0 else 0.0,
+            "goodput_rps": round((total - failed) / elapsed, 3) if elapsed > 0 else 0.0,
+            "latency": self.latency.summary(),
+            "latency_by_request": {name: histogram.summary() for name, histogram in self.by_name.items()},
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors),
+        }
+
+
+def load_payloads(payload_file, image_urls, model_version):
+    """
+    요청 목록 [{"name", "method", "path", "body", "weight"}]
+    payload 파일이 없으면 image_url마다 predict 요청을 만들고 health 요청을 소량 섞습니다.
+    """
+    if payload_file:
+        payloads = json.loads(Path(payload_file).read_text())
+    else:
+        payloads = [
+            {
+                "name": f"predict[{idx}]",
+                "method": "POST",
+                "path": "/onnx-model/predict",
+                "body": {"model_version": model_version, "image_url": url},
+                "weight": 1.0,
+            }
+            for idx, url in enumerate(image_urls or [DEFAULT_IMAGE_URL])
+        ]
+        payloads.append({"name": "health", "method": "GET", "path": "/health", "weight": 0.05 * len(payloads)})
+    for idx, payload in enumerate(payloads):
+        payload.setdefault("name", f"{payload.get('method', 'GET')} {payload['path']}#{idx}")
+        payload.setdefault("method", "GET")
+        payload.setdefault("weight", 1.0)
+    return payloads
+
+
+def load_replay(replay_file):
+    """
+    캡처된 요청 로그(JSONL) 로드
+    각 줄의 timestamp를 첫 요청 기준 offset(초)으로 바꾸며, timestamp가 없으면 0초 간격으로 보냅니다.
+    """
+    records = []
+    with open(replay_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record.get("timestamp", 0))
+    first = records[0].get("timestamp", 0) if records else 0
+    return [
+        {
+            "name": f"{record.get('method', 'GET')} {record['path'].split('?')[0]}",
+            "method": record.get("method", "GET"),
+            "path": record["path"],
+            "body": record.get("body"),
+            "offset": record.get("timestamp", first) - first,
+        }
+        for record in records
+    ]
+
+
+async def send(client, payload, stats, scheduled=None, measuring=True):
+    """
+    요청 하나를 보내고 결과를 기록
+    scheduled(open/replay 모드의 예정 시각)가 주어지면 실제 전송 시각 대신 예정 시각부터 지연 시간을 측정합니다.
+    """
+    start = scheduled if scheduled is not None else time.perf_counter()
+    body = payload.get("body")
+    kwargs = {}
+    if isinstance(body, (dict, list)):
+        kwargs["json"] = body
+    elif body:
+        kwargs["content"] = body.encode() if isinstance(body, str) else body
+        kwargs["headers"] = {"Content-Type": "application/json"}
+    try:
+        response = await client.request(payload["method"], payload["path"], **kwargs)
+        await response.aread()
+        status_code, error = response.status_code, None
+    except httpx.HTTPError as e:
+        status_code, error = None, type(e).__name__
+    if measuring:
+        stats.record(payload["name"], time.perf_counter() - start, status_code, error)
+
+
+def picker(payloads, seed):
+    rng = random.Random(seed)
+    weights = [payload["weight"] for payload in payloads]
+    return lambda: rng.choices(payloads, weights=weights)[0]
+
+
+async def run_closed(client, payloads, stats, args):
+    pick = picker(payloads, args.seed)
+    deadline = time.perf_counter() + args.warmup + args.duration
+    measure_from = time.perf_counter() + args.warmup
+    sent = 0
+
+    async def worker():
+        nonlocal sent
+        while time.perf_counter() < deadline and (not args.requests or sent < args.requests):
+            measuring = time.perf_counter() >= measure_from
+            if measuring:
+                sent += 1
+            await send(client, pick(), stats, measuring=measuring)
+
+    await asyncio.sleep(0)
+    stats.started = measure_from
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def run_scheduled(client, schedule, stats, max_inflight, measure_from=None):
+    """(예정 시각, payload) 목록대로 요청을 보냄 (open/replay 모드 공통)"""
+    semaphore = asyncio.Semaphore(max_inflight)
+    tasks = set()
+    dropped = 0
+
+    async def fire(scheduled, payload):
+        try:
+            await send(client, payload, stats, scheduled=scheduled, measuring=scheduled >= measure_from)
+        finally:
+            semaphore.release()
+
+    for scheduled, payload in schedule:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if semaphore.locked():
+            # 동시 요청 수 상한에 도달하면 부하 생성기가 밀리지 않도록 요청을 보내지 않고 dropped로 기록
+            dropped += 1
+            if scheduled >= measure_from:
+                stats.dropped += 1
+            continue
+        await semaphore.acquire()
+        task = asyncio.create_task(fire(scheduled, payload))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return dropped
+
+
+def poisson_schedule(payloads, rate, duration, start, seed):
+    """평균 rate req/s 포아송 도착 과정 (지수 분포 간격)"""
+    rng = random.Random(seed)
+    pick = picker(payloads, seed + 1)
+    now = start
+    while True:
+        now += rng.expovariate(rate)
+        if now >= start + duration:
+            return
+        yield now, pick()
+
+
+async def run(args):
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        if args.mode == "closed":
+            payloads = load_payloads(args.payload_file, args.image_url, args.model_version)
+            await run_closed(client, payloads, stats, args)
+        elif args.mode == "open":
+            payloads = load_payloads(args.payload_file, args.image_url, args.model_version)
+            start = time.perf_counter()
+            stats.started = start + args.warmup
+            schedule = poisson_schedule(payloads, args.rate, args.warmup + args.duration, start, args.seed)
+            await run_scheduled(client, schedule, stats, args.max_inflight, measure_from=stats.started)
+        else:
+            records = load_replay(args.replay_file)
+            if args.requests:
+                records = records[: args.requests]
+            start = time.perf_counter()
+            stats.started = start
+            schedule = ((start + record["offset"] / args.speed, record) for record in records)
+            await run_scheduled(client, schedule, stats, args.max_inflight, measure_from=start)
+    stats.finished = time.perf_counter()
+    return stats
+
+
+def print_report(report):
+    latency = report["latency"]
+    print(f"\n=== 결과 ({report['duration_seconds']}초) ===")
+    print(f"요청 수: {report['requests']} (성공 {report['succeeded']}, 실패 {report['failed']})")
+    if report["dropped"]:
+        print(f"보내지 못한 요청: {report['dropped']} (--max-inflight 상한 도달, 요청 수에서 제외)")
+    print(f"처리량: {report['throughput_rps']} req/s (성공 기준 {report['goodput_rps']} req/s)")
+    if latency["count"]:
+        print(
+            "지연 시간(ms): "
+            + ", ".join(f"{key[:-3]} {latency[key]:.2f}" for key in latency if key.startswith("p"))
+            + f", max {latency['max_ms']:.2f}"
+        )
+    for name, summary in report["latency_by_request"].items():
+        print(f"  {name:<40} {summary['count']:>8}건  p50 {summary['p50_ms']:.2f}  p99 {summary['p99_ms']:.2f}")
+    if report["errors"]:
+        print("오류:")
+        for error, count in sorted(report["errors"].items(), key=lambda item: -item[1]):
+            print(f"  {error}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async load generator for the API server")
+    parser.add_argument("--base-url", type=str, default="http://localhost:8080", help="API server base URL")
+    parser.add_argument("--mode", choices=["closed", "open", "replay"], default="closed", help="Load mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent requests (closed mode)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Mean arrival rate in req/s (open mode)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measurement duration in seconds")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Warmup seconds excluded from the results")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = no limit)")
+    parser.add_argument("--max-inflight", type=int, default=256, help="Max in-flight requests (open/replay mode)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds")
+    parser.add_argument("--payload-file", type=str, default="", help="JSON list of weighted request payloads")
+    parser.add_argument("--image-url", type=str, action="append", help="Image URL for predict requests (repeatable)")
+    parser.add_argument("--model-version", type=str, default="1", help="Model version for predict requests")
+    parser.add_argument("--replay-file", type=str, default="", help="Captured request log (JSONL) to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for arrivals and payload mix")
+    parser.add_argument("--output", type=str, default="", help="Path to save the JSON report")
+    args = parser.parse_args()
+
+    if args.mode == "replay" and not args.replay_file:
+        parser.error("--mode replay에는 --replay-file이 필요합니다.")
+    if args.mode == "closed":
+        # closed 모드에서는 동시 요청 수만큼 연결을 사용
+        args.max_inflight = max(args.max_inflight, args.concurrency)
+
+    print(f"부하 생성 시작: {args.base_url} (mode={args.mode})")
+    stats = asyncio.run(run(args))
+    report = {"config": vars(args), **stats.report()}
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"결과 저장: {args.output}")
+    if report["requests"] == 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
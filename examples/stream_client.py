@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# pip install websockets opencv-python
+"""
+WebSocket 영상 추론(/onnx-model/stream) 클라이언트
+
+동영상 파일, 카메라(장치 번호) 또는 이미지 디렉토리의 frame을 JPEG로 인코딩해 --fps 속도로 보내고,
+서버가 보낸 감지 결과와 버린 frame 수, 클라이언트에서 측정한 frame 지연 시간(전송 ~ 결과 수신)을 출력합니다.
+서버의 추론이 전송 속도를 따라가지 못하면 서버가 frame을 버리므로 dropped가 늘어나고 지연 시간은 일정하게 유지됩니다.
+
+사용 예시:
+    python examples/stream_client.py --source video.mp4 --fps 30
+    python examples/stream_client.py --source 0 --fps 15 --input-size 320 --letterbox
+    python examples/stream_client.py --source images/ --fps 0 --max-frames 500 --output results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+import cv2
+import numpy as np
+import websockets
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def iter_frames(source):
+    """카메라 장치 번호, 동영상 파일 또는 이미지 디렉토리에서 frame을 순서대로 생성"""
+    path = Path(source)
+    if path.is_dir():
+        for file in sorted(file for file in path.rglob("*") if file.suffix.lower() in IMAGE_EXTENSIONS):
+            frame = cv2.imread(str(file))
+            if frame is not None:
+                yield frame
+        return
+
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+async def send_frames(websocket, args, sent_at):
+    frames = iter_frames(args.source)
+    interval = 1 / args.fps if args.fps > 0 else 0
+    start = time.perf_counter()
+    frame_id = 0
+    for frame in frames:
+        if args.max_frames and frame_id >= args.max_frames:
+            break
+        # 예정된 전송 시각까지 대기 (카메라처럼 일정한 속도로 전송)
+        delay = start + frame_id * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, args.jpeg_quality])
+        if not ok:
+            continue
+        sent_at[frame_id] = time.perf_counter()
+        await websocket.send(encoded.tobytes())
+        frame_id += 1
+    return frame_id
+
+
+async def receive_results(websocket, sent_at, stats, output):
+    async for message in websocket:
+        result = json.loads(message)
+        sent = sent_at.pop(result.get("frame_id"), None)
+        if result["type"] == "detections":
+            stats["latencies"].append((time.perf_counter() - sent) * 1000)
+            stats["server_ms"].append(result["timing"]["total_ms"])
+            stats["boxes"] += len(result["boxes"])
+        stats[result["type"]] += 1
+        if output is not None:
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if stats["done"] and not sent_at:
+            return
+
+
+async def run(args):
+    params = {"model_version": args.model_version}
+    if args.input_size:
+        params["input_size"] = args.input_size
+    if args.conf_threshold is not None:
+        params["conf_threshold"] = args.conf_threshold
+    if args.letterbox:
+        params["letterbox"] = "true"
+    url = f"{args.url}?{urlencode(params)}"
+
+    stats = {"latencies": [], "server_ms": [], "boxes": 0, "detections": 0, "dropped": 0, "error": 0, "done": False}
+    sent_at = {}
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        async with websockets.connect(url, max_size=None) as websocket:
+            print(f"서버 설정: {await websocket.recv()}")
+            receiver = asyncio.create_task(receive_results(websocket, sent_at, stats, output))
+            start = time.perf_counter()
+            stats["sent"] = await send_frames(websocket, args, sent_at)
+            stats["done"] = True
+            # 마지막으로 보낸 frame들의 결과를 기다림
+            if not sent_at:
+                receiver.cancel()
+            try:
+                await asyncio.wait_for(receiver, args.timeout)
+            except asyncio.TimeoutError:
+                print(f"{len(sent_at)}개 frame의 결과를 {args.timeout}초 안에 받지 못했습니다.")
+            except asyncio.CancelledError:
+                pass
+            stats["elapsed"] = time.perf_counter() - start
+    finally:
+        if output is not None:
+            output.close()
+    return stats
+
+
+def print_report(stats):
+    print(f"\n=== 결과 ({stats['elapsed']:.2f}초) ===")
+    print(f"보낸 frame: {stats['sent']}")
+    print(f"추론: {stats['detections']}, 버림: {stats['dropped']}, 오류: {stats['error']}")
+    if stats["latencies"]:
+        latencies = np.array(stats["latencies"])
+        print(f"처리량: {len(latencies) / stats['elapsed']:.2f} fps, 감지 개수: {stats['boxes']}")
+        print(
+            "지연 시간(ms, 전송 ~ 결과 수신): "
+            + ", ".join(f"p{p} {np.percentile(latencies, p):.2f}" for p in (50, 90, 99))
+            + f", max {latencies.max():.2f}"
+        )
+        print(f"서버 처리 시간(ms): p50 {np.percentile(stats['server_ms'], 50):.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket stream inference client")
+    parser.add_argument("--url", type=str, default="ws://localhost:8080/onnx-model/stream", help="Stream endpoint URL")
+    parser.add_argument("--source", type=str, required=True, help="Video file, camera index or image directory")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frames per second to send (0 = as fast as possible)")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames (0 = no limit)")
+    parser.add_argument("--jpeg-quality", type=int, default=90, help="JPEG quality of sent frames")
+    parser.add_argument("--model-version", type=str, default="1", help="Model version")
+    parser.add_argument("--input-size", type=int, default=0, help="Model input size (0 = server default)")
+    parser.add_argument("--conf-threshold", type=float, default=None, help="Confidence threshold")
+    parser.add_argument("--letterbox", action="store_true", help="Use letterbox preprocessing")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for the last results")
+    parser.add_argument("--output", type=str, default="", help="Path to save received messages (JSONL)")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run(args))
+    print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
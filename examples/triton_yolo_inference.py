@@ -1,6 +1,13 @@
 # pip install "tritonclient[all]"
 import argparse
+import glob
+import json
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import cv2
 import numpy as np
@@ -166,14 +173,6 @@ def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=
     # 출력 텐서 변환
     outputs = np.transpose(np.squeeze(output))
 
-    # 모든 감지에 대한 목록
-    boxes = []
-    scores = []
-    class_ids = []
-
-    # 출력 해석
-    rows = outputs.shape[0]
-
     # 원본 이미지 높이와 너비
     img_height, img_width = img_shape
 
@@ -182,36 +181,20 @@ def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=
     scale_x = img_width / input_size[0]  # 모델 입력 너비 기준으로 조정
     scale_y = img_height / input_size[1]  # 모델 입력 높이 기준으로 조정
 
-    for i in range(rows):
-        # 클래스 점수 가져오기
-        classes_scores = outputs[i][4:]
-
-        # 최대 점수 찾기
-        max_score = np.amax(classes_scores)
-
-        # 임계값 이상인 경우에만 처리
-        if max_score >= conf_threshold:
-            class_id = np.argmax(classes_scores)
-
-            # 상자 좌표 가져오기 (모델 출력은 일반적으로 정규화된 좌표임)
-            x, y, w, h = outputs[i][:4]
-
-            # 원본 이미지 크기에 맞게 좌표 조정
-            left = int((x - w / 2) * scale_x)
-            top = int((y - h / 2) * scale_y)
-            width = int(w * scale_x)
-            height = int(h * scale_y)
-
-            # 좌표가 이미지 범위를 벗어나지 않도록 조정
-            left = max(0, left)
-            top = max(0, top)
-            width = min(width, img_width - left)
-            height = min(height, img_height - top)
-
-            # 목록에 추가
-            boxes.append([left, top, width, height])
-            scores.append(max_score)
-            class_ids.append(class_id)
+    # 클래스 최대 점수가 임계값 이상인 행만 한 번에 선택 (행 단위 Python 반복 대신 numpy 연산)
+    max_scores = np.amax(outputs[:, 4:], axis=1)
+    candidates = outputs[max_scores >= conf_threshold]
+    scores = list(max_scores[max_scores >= conf_threshold])
+    class_ids = list(np.argmax(candidates[:, 4:], axis=1))
+
+    # 상자 좌표 (중심 x, 중심 y, 너비, 높이)를 원본 이미지 크기에 맞게 조정
+    # 스케일 곱셈은 float64로 계산해 행 단위 계산과 같은 정수 좌표가 나오도록 함
+    x, y, w, h = (candidates[:, i] for i in range(4))
+    left = np.maximum(0, ((x - w / 2).astype(np.float64) * scale_x).astype(np.int64))
+    top = np.maximum(0, ((y - h / 2).astype(np.float64) * scale_y).astype(np.int64))
+    width = np.minimum((w.astype(np.float64) * scale_x).astype(np.int64), img_width - left)
+    height = np.minimum((h.astype(np.float64) * scale_y).astype(np.int64), img_height - top)
+    boxes = np.stack([left, top, width, height], axis=1).tolist()
 
     # 결과 필터링을 위한 변수 초기화
     filtered_boxes = []
@@ -246,7 +229,246 @@ def postprocess_output(output, img_shape, input_size=(640, 640), conf_threshold=
     return filtered_boxes, filtered_scores, filtered_class_ids
 
 
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
+PARQUET_FLUSH_ROWS = 1000
+
+
+def iter_sources(input_path, frame_step=1):
+    """
+    bulk 입력(디렉토리, glob 패턴, 동영상 파일)을 (이름, 이미지 경로 또는 프레임) 순서대로 생성
+    동영상은 frame_step 프레임마다 하나씩 디코딩합니다.
+    """
+    path = Path(input_path)
+    if path.is_file() and path.suffix.lower() in VIDEO_EXTENSIONS:
+        capture = cv2.VideoCapture(str(path))
+        index = 0
+        try:
+            while capture.grab():
+                if index % frame_step == 0:
+                    ok, frame = capture.retrieve()
+                    if ok:
+                        yield f"{path}#frame={index}", frame
+                index += 1
+        finally:
+            capture.release()
+        return
+
+    files = path.rglob("*") if path.is_dir() else map(Path, glob.glob(input_path, recursive=True))
+    for file in sorted(file for file in files if file.suffix.lower() in IMAGE_EXTENSIONS):
+        yield str(file), str(file)
+
+
+def load_and_preprocess(item, input_size):
+    """이미지 디코딩과 전처리 (cv2가 GIL을 해제하므로 스레드 풀에서 병렬로 실행)"""
+    name, source = item
+    image = cv2.imread(source) if isinstance(source, str) else source
+    if image is None:
+        return name, None, None
+    return name, image.shape[:2], preprocess_image(image, input_size)
+
+
+def bounded_map(executor, func, items, window):
+    """executor.map과 같지만 결과를 기다리는 작업을 window개로 제한해 메모리 사용량을 일정하게 유지"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def create_client_factory(args):
+    """
+    (프로토콜, 클라이언트 모듈, 클라이언트 생성 함수) 반환
+    --protocol auto이면 gRPC를 우선 사용하고, tritonclient[grpc]가 없거나 gRPC 포트에 연결할 수 없으면 HTTP를 사용합니다.
+    """
+    if args.protocol in ("auto", "grpc"):
+        grpc_url = args.grpc_url or f"{args.triton_url.rsplit(':', 1)[0]}:8001"
+        try:
+            import tritonclient.grpc as grpcclient
+
+            if grpcclient.InferenceServerClient(url=grpc_url).is_server_live():
+                return "grpc", grpcclient, lambda: grpcclient.InferenceServerClient(url=grpc_url)
+        except Exception as e:
+            if args.protocol == "grpc":
+                raise
+            print(f"gRPC({grpc_url})를 사용할 수 없어 HTTP로 요청합니다: {e}")
+    return "http", httpclient, lambda: httpclient.InferenceServerClient(url=args.triton_url)
+
+
+def get_max_batch_size(client, model_name, model_version):
+    config = client.get_model_config(model_name, model_version)
+    # gRPC 클라이언트는 {"config": {...}} 형태로 반환
+    config = config.get("config", config) if isinstance(config, dict) else {}
+    return int(config.get("max_batch_size", 0))
+
+
+class ResultWriter:
+    """bulk 추론 결과를 JSONL 또는 Parquet(pyarrow 필요) 파일로 저장"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = []
+        self._parquet = path.endswith(".parquet")
+        self._writer = None
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            detection = pa.struct(
+                [
+                    ("class_id", pa.int32()),
+                    ("class_name", pa.string()),
+                    ("score", pa.float32()),
+                    ("box", pa.list_(pa.int32())),
+                ]
+            )
+            self._schema = pa.schema(
+                [
+                    ("source", pa.string()),
+                    ("width", pa.int32()),
+                    ("height", pa.int32()),
+                    ("detections", pa.list_(detection)),
+                    ("error", pa.string()),
+                ]
+            )
+            self._pa = pa
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        if not self._parquet:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        self.rows.append(record)
+        if len(self.rows) >= PARQUET_FLUSH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self.rows, schema=self._schema))
+            self.rows = []
+
+    def close(self):
+        if self._parquet:
+            self._flush()
+            self._writer.close()
+        else:
+            self._file.close()
+
+
+def run_bulk(args):
+    """
+    디렉토리/glob/동영상의 이미지를 파이프라인으로 추론
+    디코딩과 전처리는 --workers개의 스레드, 추론과 후처리는 최대 --max-inflight개의 배치 요청이 동시에 진행되며
+    이미지는 모델의 max_batch_size까지 묶어서 요청합니다.
+    """
+    protocol, client_module, create_client = create_client_factory(args)
+    max_batch_size = get_max_batch_size(create_client(), args.model_name, args.model_version)
+    batch_size = args.batch_size or max(1, max_batch_size)
+    if max_batch_size:
+        batch_size = min(batch_size, max_batch_size)
+    elif batch_size > 1:
+        print("모델이 배치를 지원하지 않아(max_batch_size=0) 배치 크기를 1로 사용합니다.")
+        batch_size = 1
+    print(f"bulk 추론 시작: {args.input} (protocol={protocol}, batch_size={batch_size})")
+
+    # 클라이언트는 스레드 간에 공유하지 않고 추론 스레드마다 하나씩 재사용
+    local = threading.local()
+    stats = {"images": 0, "failed": 0, "batches": 0}
+
+    def infer_batch(batch):
+        if getattr(local, "client", None) is None:
+            local.client = create_client()
+        names, shapes, tensors = zip(*batch)
+        input_data = np.concatenate(tensors)
+        inputs = [client_module.InferInput("images", input_data.shape, "FP32")]
+        inputs[0].set_data_from_numpy(input_data)
+        outputs = [client_module.InferRequestedOutput(args.output_name)]
+        try:
+            response = local.client.infer(
+                model_name=args.model_name, inputs=inputs, outputs=outputs, model_version=args.model_version
+            )
+        except InferenceServerException as e:
+            return [{"source": name, "error": str(e)} for name in names]
+        output = response.as_numpy(args.output_name)
+
+        records = []
+        for index, (name, (height, width)) in enumerate(zip(names, shapes)):
+            boxes, scores, class_ids = postprocess_output(
+                output[index : index + 1],
+                (height, width),
+                input_size=args.input_size,
+                conf_threshold=args.conf_thres,
+                iou_threshold=args.iou_thres,
+            )
+            detections = [
+                {
+                    "class_id": int(class_id),
+                    "class_name": CLASS_NAMES[class_id] if class_id < len(CLASS_NAMES) else f"class_{class_id}",
+                    "score": round(float(score), 4),
+                    "box": [int(value) for value in box],
+                }
+                for box, score, class_id in zip(boxes, scores, class_ids)
+            ]
+            records.append({"source": name, "width": width, "height": height, "detections": detections})
+        return records
+
+    def write_records(records):
+        stats["batches"] += 1
+        for record in records:
+            stats["failed" if "error" in record else "images"] += 1
+            writer.write(record)
+
+    writer = ResultWriter(args.output_file)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(args.workers) as prepare_pool, ThreadPoolExecutor(args.max_inflight) as infer_pool:
+            prepared = bounded_map(
+                prepare_pool,
+                lambda item: load_and_preprocess(item, args.input_size),
+                iter_sources(args.input, args.frame_step),
+                window=max(args.workers, batch_size) * 2,
+            )
+            pending = deque()
+            batch = []
+            for name, shape, tensor in prepared:
+                if tensor is None:
+                    stats["failed"] += 1
+                    writer.write({"source": name, "error": "failed to decode image"})
+                    continue
+                batch.append((name, shape, tensor))
+                if len(batch) < batch_size:
+                    continue
+                pending.append(infer_pool.submit(infer_batch, batch))
+                batch = []
+                # 동시에 진행 중인 배치 요청 수 제한 (가장 오래된 요청부터 결과 기록)
+                while len(pending) >= args.max_inflight:
+                    write_records(pending.popleft().result())
+            if batch:
+                pending.append(infer_pool.submit(infer_batch, batch))
+            while pending:
+                write_records(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"결과 저장: {args.output_file}")
+    print(
+        f"처리한 이미지: {stats['images']}개 (실패 {stats['failed']}개, 배치 {stats['batches']}개), "
+        f"소요 시간: {elapsed:.2f}초, 처리량: {stats['images'] / elapsed if elapsed > 0 else 0:.2f} images/s"
+    )
+
+
 def main(args):
+    # --input이 지정되면 여러 이미지를 한 번에 처리
+    if args.input:
+        run_bulk(args)
+        return
+
     # 이미지 로드 및 전처리
     image = cv2.imread(args.image_path)
     if image is None:
@@ -322,6 +544,14 @@ if __name__ == "__main__":
     parser.add_argument("--conf-thres", type=float, default=0.5, help="Confidence threshold for detections")
     parser.add_argument("--iou-thres", type=float, default=0.5, help="IoU threshold for NMS")
     parser.add_argument("--output-image", type=str, default="dog_detection.jpg", help="Path to save the output image")
+    parser.add_argument("--input", type=str, default="", help="Bulk mode input (directory, glob or video)")
+    parser.add_argument("--output-file", type=str, default="detections.jsonl", help="Bulk output (.jsonl/.parquet)")
+    parser.add_argument("--batch-size", type=int, default=0, help="Bulk mode batch size (0 means model max_batch_size)")
+    parser.add_argument("--workers", type=int, default=4, help="Bulk mode decode/preprocess threads")
+    parser.add_argument("--max-inflight", type=int, default=4, help="Bulk mode max concurrent infer requests")
+    parser.add_argument("--protocol", choices=["auto", "grpc", "http"], default="auto", help="Bulk mode protocol")
+    parser.add_argument("--grpc-url", type=str, default="", help="Triton gRPC URL (default: <host>:8001)")
+    parser.add_argument("--frame-step", type=int, default=1, help="Bulk mode: use every N-th frame of a video")
     args = parser.parse_args()
 
     main(args)